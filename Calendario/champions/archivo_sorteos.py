@@ -0,0 +1,247 @@
+"""
+Archivo binario de sorteos: registros de ancho fijo que se leen con
+numpy.memmap como un array estructurado, sin parsear nada.
+
+Un fichero es una cabecera de CABECERA_BYTES seguida de registros:
+
+    semilla     uint64            semilla con la que se generó el sorteo
+    bombo       uintW[n]          bombo (1..) de cada equipo
+    partidos    uintW[E, 2]       partidos (local, visitante)
+    jornada     uintW[E]          jornada (1..) de cada partido; 0 = sin calendario
+    nodos       uint32            nodos del solver
+    ms          float32           tiempo del solver en milisegundos
+
+Los equipos son el índice canónico de la temporada (orden del fichero de
+temporadas/, ver temporada.py), cuyo nombre va en la cabecera junto con n,
+E y el ancho W de los índices: 1 byte hasta 256 equipos y 2 bytes con más
+(ancho_indice). En la Champions (n = 36, E = 144) cada registro ocupa 484 bytes: un
+millón de sorteos caben en menos de 500 MB, frente a unos 45 KB por
+sorteo de los volcados de texto (ejemplo_exitoso).
+
+Varios procesos pueden añadir registros al mismo fichero a la vez: cada
+lote se escribe con una sola llamada a os.write sobre un descriptor en
+modo O_APPEND y bajo un flock exclusivo, así que los registros nunca se
+entremezclan. Un registro a medias al final (proceso interrumpido) se
+ignora al leer.
+
+Uso:
+    python archivo_sorteos.py sorteos.bin -n 1000     # añade 1000 sorteos
+    python archivo_sorteos.py sorteos.bin --resumen
+"""
+
+import argparse
+import fcntl
+import os
+import random
+import struct
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from formato import CHAMPIONS
+
+MAGIA = b"CHLSORT1"
+VERSION = 2
+CABECERA_BYTES = 64
+
+# magia, versión, n, E, tamaño de registro, temporada (32 bytes, utf-8),
+# ancho de los índices en bytes (0 en la versión 1, siempre de 1 byte)
+_CABECERA = struct.Struct("<8sHHHI32sB")
+
+
+def ancho_indice(n: int) -> int:
+    """Bytes por índice de equipo, bombo o jornada con n equipos."""
+    if n <= 256:
+        return 1
+    if n <= 65536:
+        return 2
+    raise ValueError(f"Demasiados equipos para el archivo: {n}")
+
+
+@lru_cache(maxsize=None)
+def dtype_registro(n: int, n_partidos: int) -> np.dtype:
+    """dtype estructurado (empaquetado, sin relleno) de un registro."""
+    indice = f"<u{ancho_indice(n)}"
+    return np.dtype([
+        ("semilla", "<u8"),
+        ("bombo", indice, (n,)),
+        ("partidos", indice, (n_partidos, 2)),
+        ("jornada", indice, (n_partidos,)),
+        ("nodos", "<u4"),
+        ("ms", "<f4"),
+    ])
+
+
+def _cabecera(temporada: str, n: int, n_partidos: int) -> bytes:
+    datos = _CABECERA.pack(
+        MAGIA, VERSION, n, n_partidos, dtype_registro(n, n_partidos).itemsize,
+        temporada.encode("utf-8")[:32], ancho_indice(n),
+    )
+    return datos.ljust(CABECERA_BYTES, b"\0")
+
+
+def leer_cabecera(ruta: str):
+    """(temporada, n, E) de un archivo; ValueError si no lo es."""
+    with open(ruta, "rb") as f:
+        datos = f.read(CABECERA_BYTES)
+    if len(datos) < CABECERA_BYTES:
+        raise ValueError(f"{ruta}: cabecera incompleta")
+    magia, version, n, n_partidos, tam, temporada, ancho = _CABECERA.unpack_from(datos)
+    if magia != MAGIA or version not in (1, VERSION):
+        raise ValueError(f"{ruta}: no es un archivo de sorteos (versión {VERSION})")
+    if (ancho or 1) != ancho_indice(n):
+        raise ValueError(f"{ruta}: índices de {ancho or 1} bytes para {n} equipos")
+    if tam != dtype_registro(n, n_partidos).itemsize:
+        raise ValueError(f"{ruta}: tamaño de registro {tam} inesperado")
+    return temporada.rstrip(b"\0").decode("utf-8"), n, n_partidos
+
+
+# ------------------------------------------------------------
+# Escritura
+# ------------------------------------------------------------
+
+def nuevos_registros(k: int, n: int, n_partidos=None):
+    """Array de k registros a cero, listo para rellenar (por defecto, del formato Champions)."""
+    if n_partidos is None:
+        n_partidos = n * CHAMPIONS.partidos // 2
+    return np.zeros(k, dtype=dtype_registro(n, n_partidos))
+
+
+def rellenar_registro(registro, estado, partidos, indice, calendario=None, semilla=0, ms=0.0) -> None:
+    """
+    Copia en registro (un elemento de nuevos_registros) un sorteo resuelto.
+    partidos son pares (local, visitante) de índices de estado.teams (los
+    de fixtures.asignar_local_visitante), indice la posición canónica de
+    cada nombre (cargar_temporada().indice) y calendario, opcional, el de
+    league_calendar.generate_league_calendar sobre esos mismos partidos.
+    """
+    canon = np.fromiter((indice[t.name] for t in estado.teams), dtype=np.intp, count=estado.n)
+    registro["semilla"] = semilla
+    registro["bombo"][canon] = [t.pot for t in estado.teams]
+    registro["partidos"] = canon[np.asarray(partidos, dtype=np.intp)]
+    registro["nodos"] = estado.calls
+    registro["ms"] = ms
+    if calendario is not None:
+        jornada_de = {p: j for j, ps in calendario.items() for p in ps}
+        registro["jornada"] = [jornada_de[tuple(p)] for p in partidos]
+
+
+def agregar(ruta: str, registros, temporada: str) -> None:
+    """
+    Añade registros al final de ruta (creándolo con su cabecera si no
+    existe). Seguro con varios procesos escribiendo a la vez.
+    """
+    n = registros.dtype["bombo"].shape[0]
+    n_partidos = registros.dtype["jornada"].shape[0]
+    cabecera = _cabecera(temporada, n, n_partidos)
+
+    fd = os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        if os.fstat(fd).st_size == 0:
+            os.write(fd, cabecera)
+        else:
+            _, n_f, e_f = leer_cabecera(ruta)
+            if (n_f, e_f) != (n, n_partidos):
+                raise ValueError(f"{ruta}: registros de {n_f} equipos y {e_f} partidos")
+        os.write(fd, np.ascontiguousarray(registros).tobytes())
+    finally:
+        os.close(fd)
+
+
+# ------------------------------------------------------------
+# Lectura
+# ------------------------------------------------------------
+
+def abrir(ruta: str):
+    """Los registros completos de ruta como numpy.memmap de solo lectura."""
+    _, n, n_partidos = leer_cabecera(ruta)
+    dtype = dtype_registro(n, n_partidos)
+    k = (os.path.getsize(ruta) - CABECERA_BYTES) // dtype.itemsize
+    if k == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(ruta, dtype=dtype, mode="r", offset=CABECERA_BYTES, shape=(k,))
+
+
+def orientaciones(registros):
+    """(k, n, n) bool con orientacion[s, local, visitante] (ver validador_lotes)."""
+    k = len(registros)
+    n = registros.dtype["bombo"].shape[0]
+    p = np.asarray(registros["partidos"], dtype=np.intp)
+    orientacion = np.zeros((k, n, n), dtype=bool)
+    orientacion[np.arange(k)[:, None], p[..., 0], p[..., 1]] = True
+    return orientacion
+
+
+def calendarios(registros):
+    """
+    (k, J, P, 2) con los partidos de cada jornada (ver validador_lotes).
+    Todos los registros deben tener calendario.
+    """
+    jornada = np.asarray(registros["jornada"])
+    if (jornada == 0).any():
+        raise ValueError("Hay registros sin calendario")
+    k, n_partidos = jornada.shape
+    n_jornadas = int(jornada.max())
+    orden = np.argsort(jornada, axis=1, kind="stable")
+    partidos = np.take_along_axis(np.asarray(registros["partidos"]), orden[..., None], axis=1)
+    return partidos.reshape(k, n_jornadas, n_partidos // n_jornadas, 2)
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def _generar(k: int, semilla: int, con_calendario: bool):
+    from data import load_teams
+    from fixtures import asignar_local_visitante, generar_partidos_unicos
+    from league_calendar import generate_league_calendar
+    from solver import resolver
+    from state import DrawState
+    from temporada import cargar_temporada
+
+    tabla = cargar_temporada()
+    registros = nuevos_registros(k, len(tabla), tabla.formato.n_aristas)
+    hechos = 0
+    for seed in range(semilla, semilla + k):
+        rng = random.Random(seed)
+        estado = DrawState(load_teams(rng, tabla), backend="bitset", formato=tabla.formato)
+        t0 = time.perf_counter()
+        if not resolver(estado, max_nodos=1000, rng=rng, reinicios=50):
+            continue
+        ms = (time.perf_counter() - t0) * 1000
+        partidos = asignar_local_visitante(estado, generar_partidos_unicos(estado), rng)
+        calendario = generate_league_calendar(partidos, seed) if con_calendario else None
+        rellenar_registro(registros[hechos], estado, partidos, tabla.indice, calendario, seed, ms)
+        hechos += 1
+    return registros[:hechos], tabla.nombre
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivo binario de sorteos")
+    parser.add_argument("ruta")
+    parser.add_argument("-n", "--sorteos", type=int, default=0, help="sorteos a generar y añadir")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--sin-calendario", action="store_true")
+    parser.add_argument("--resumen", action="store_true")
+    args = parser.parse_args()
+
+    if args.sorteos:
+        t0 = time.perf_counter()
+        registros, temporada = _generar(args.sorteos, args.semilla, not args.sin_calendario)
+        agregar(args.ruta, registros, temporada)
+        print(f"{len(registros)} sorteos añadidos en {time.perf_counter() - t0:.1f} s")
+
+    if args.resumen:
+        temporada, n, n_partidos = leer_cabecera(args.ruta)
+        r = abrir(args.ruta)
+        print(f"{args.ruta}: temporada {temporada}, {n} equipos, {n_partidos} partidos por sorteo")
+        print(f"  {len(r)} sorteos de {r.dtype.itemsize} bytes")
+        if len(r):
+            print(f"  nodos medios {r['nodos'].mean():.0f} | ms medios {r['ms'].mean():.2f}")
+            print(f"  con calendario: {int((r['jornada'][:, 0] > 0).sum())}")
+
+
+if __name__ == "__main__":
+    main()
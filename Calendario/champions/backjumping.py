@@ -0,0 +1,236 @@
+"""
+Backjumping dirigido por conflictos (CBJ) y aprendizaje de nogoods.
+
+El backtracking cronológico de search deshace solo el último add_edge,
+aunque el fallo lo haya causado una decisión muy anterior (p. ej. dos
+españoles compitiendo por las últimas plazas del bombo 3). Aquí cada fallo
+devuelve el conjunto de decisiones que lo explican (como máscara de bits
+sobre la profundidad de cada decisión) y la búsqueda salta directamente a
+la más profunda de ellas.
+
+Explicación de un equipo k sin candidatos suficientes (en un bombo q, o en
+total si la MRV es por equipos): para cada equipo m (del bombo q) que no es
+candidato de k se toma la primera regla que lo excluye y las decisiones que
+la hacen cierta:
+
+    - k y m ya son rivales                 → la decisión (k, m)
+    - m ya tiene todos sus rivales         → todos los rivales de m
+    - k ya tiene por_bombo rivales del bombo de m → esos rivales de k
+    - m ya tiene por_bombo rivales del bombo de k → esos rivales de m
+    - k al límite de rivales del país de m         → esos rivales de k
+    - m al límite de rivales del país de k         → esos rivales de m
+    - m no pasa el forward checking         → todos los rivales de m
+
+Si el propio k no pasa el forward checking basta con sus rivales.
+
+Los conjuntos de conflicto pequeños se guardan como nogoods (conjuntos de
+emparejamientos que no pueden darse juntos en ningún sorteo válido) en un
+almacén acotado, indexados por cada uno de sus emparejamientos, y se
+comprueban cada vez que se añade uno de ellos.
+"""
+
+from collections import OrderedDict, defaultdict
+
+from bitset_state import iter_bits
+
+
+class AlmacenNogoods:
+    """Nogoods aprendidos (frozensets de pares i < j), con tamaño acotado y FIFO."""
+
+    def __init__(self, max_nogoods: int = 50_000, max_tam: int = 12):
+        self.max_nogoods = max_nogoods
+        self.max_tam = max_tam
+        self.nogoods = OrderedDict()
+        self.por_arista = defaultdict(list)
+        self.aprendidos = 0
+        self.podas = 0
+        self.expulsados = 0
+
+    def __len__(self) -> int:
+        return len(self.nogoods)
+
+    def aprender(self, ng: frozenset) -> None:
+        if not ng or len(ng) > self.max_tam or ng in self.nogoods:
+            return
+        self.nogoods[ng] = None
+        for e in ng:
+            self.por_arista[e].append(ng)
+        self.aprendidos += 1
+
+        if len(self.nogoods) > self.max_nogoods:
+            viejo, _ = self.nogoods.popitem(last=False)
+            for e in viejo:
+                self.por_arista[e].remove(viejo)
+            self.expulsados += 1
+
+    def violado(self, arista, rival_mask):
+        """Devuelve un nogood que contiene arista y está completo en el estado, o None."""
+        for ng in self.por_arista.get(arista, ()):
+            if all((rival_mask[a] >> b) & 1 for a, b in ng):
+                self.podas += 1
+                return ng
+        return None
+
+
+class BusquedaCBJ:
+    """
+    Búsqueda con CBJ sobre un DomainStore. Ramifica como search_dominios:
+    MRV por equipos, o por pares (equipo, bombo) con por_bombo=True.
+
+    Los nogoods aprendidos solo son válidos para los mismos equipos y los
+    mismos emparejamientos iniciales (los previos a la búsqueda se tratan
+    como fijos y no aparecen en las explicaciones).
+    """
+
+    def __init__(self, store, nogoods: AlmacenNogoods = None, rng=None, por_bombo: bool = False):
+        self.store = store
+        self.estado = store.estado
+        self.nogoods = nogoods if nogoods is not None else AlmacenNogoods()
+        self.rng = rng
+        self.por_bombo = por_bombo
+
+        # Decisiones activas: pila[d] = par (i, j) añadido a profundidad d
+        self.pila = []
+        self.nivel = {}
+
+        self.saltos = 0
+        self.niveles_saltados = 0
+
+    # ------------------------------------------------------------
+    # Explicaciones
+    # ------------------------------------------------------------
+
+    def _niveles(self, t: int, filtro=None) -> int:
+        """Máscara de profundidades de las decisiones que afectan a t."""
+        mask = 0
+        nivel = self.nivel
+        for m in self.estado.adj[t]:
+            if filtro is not None and not filtro(m):
+                continue
+            d = nivel.get((min(t, m), max(t, m)))
+            if d is not None:  # los emparejamientos previos a la búsqueda son fijos
+                mask |= 1 << d
+        return mask
+
+    def explicar(self, k: int, q=None) -> int:
+        """Decisiones que explican qué equipos (del bombo q) no son candidatos de k."""
+        estado = self.estado
+        bits = estado.bits
+        teams = estado.teams
+
+        if not (bits.viable_mask >> k) & 1:
+            return self._niveles(k)
+
+        pot_k, country_k = teams[k].pot, teams[k].country
+        pot_count, country_count = estado.pot_count, estado.country_count
+        formato = estado.formato
+        zona = bits.all_mask if q is None else bits.pot_mask[q]
+        excluidos = zona & ~bits.same_country[k] & ~self.store.dominio(k)
+
+        mask = 0
+        for m in iter_bits(excluidos):
+            pot_m, country_m = teams[m].pot, teams[m].country
+            if (bits.rival_mask[k] >> m) & 1:
+                d = self.nivel.get((min(k, m), max(k, m)))
+                if d is not None:
+                    mask |= 1 << d
+            elif pot_count[k][pot_m] >= formato.por_bombo:
+                mask |= self._niveles(k, lambda r: teams[r].pot == pot_m)
+            elif pot_count[m][pot_k] >= formato.por_bombo:
+                mask |= self._niveles(m, lambda r: teams[r].pot == pot_k)
+            elif country_count[k][country_m] >= formato.max_por_pais:
+                mask |= self._niveles(k, lambda r: teams[r].country == country_m)
+            elif country_count[m][country_k] >= formato.max_por_pais:
+                mask |= self._niveles(m, lambda r: teams[r].country == country_k)
+            elif estado.deg[m] >= formato.partidos:
+                mask |= self._niveles(m)
+            else:
+                # m no pasa el forward checking
+                mask |= self._niveles(m)
+        return mask
+
+    def _aristas(self, mask: int) -> frozenset:
+        return frozenset(self.pila[d] for d in iter_bits(mask))
+
+    # ------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------
+
+    def buscar(self) -> bool:
+        """Completa el sorteo desde el estado actual. True si lo consigue."""
+        from solver import LimiteNodos  # import diferido: solver importa este módulo
+
+        self._limite = LimiteNodos
+        ok, _ = self._rec(sum(self.estado.deg) // 2)
+        return ok
+
+    def _rec(self, edge_no: int):
+        estado = self.estado
+        store = self.store
+        estado.calls += 1
+        if estado.max_calls is not None and estado.calls > estado.max_calls:
+            raise self._limite()
+
+        if edge_no == estado.E:
+            return True, 0
+
+        if self.por_bombo:
+            slot = store.mrv_bombo(self.rng)
+            if slot is None:
+                return False, self.explicar(*store.ultimo_fallo)
+            i, q = slot
+        else:
+            i = store.mrv(self.rng)
+            if i is None:
+                return False, self.explicar(store.ultimo_fallo)
+            q = None
+        candidatos = store.candidatos(i, q, self.rng)
+
+        d = len(self.pila)
+        bit_d = 1 << d
+        conflicto = 0
+
+        for j in candidatos:
+            par = (min(i, j), max(i, j))
+            store.add_edge(i, j)
+            self.pila.append(par)
+            self.nivel[par] = d
+
+            ng = self.nogoods.violado(par, estado.bits.rival_mask)
+            if ng is not None:
+                ok, c = False, 0
+                for e in ng:
+                    nivel_e = self.nivel.get(e)
+                    if nivel_e is not None:
+                        c |= 1 << nivel_e
+            else:
+                ok, c = self._rec(edge_no + 1)
+
+            if ok:
+                return True, 0
+
+            self.pila.pop()
+            del self.nivel[par]
+            store.remove_edge(i, j)
+
+            if not c & bit_d:
+                # El fallo no depende de esta decisión: saltamos por encima
+                self.saltos += 1
+                self.niveles_saltados += d - (c.bit_length() - 1 if c else -1)
+                return False, c
+
+            conflicto |= c & ~bit_d
+
+        # Al salir del bucle el estado es el de la entrada: se añade por qué
+        # los demás equipos no eran candidatos de i
+        conflicto |= self.explicar(i, q)
+        self.nogoods.aprender(self._aristas(conflicto))
+        return False, conflicto
+
+    def resumen(self) -> str:
+        ng = self.nogoods
+        return (
+            f"CBJ: {self.saltos} saltos ({self.niveles_saltados} niveles) | "
+            f"nogoods: {len(ng)} guardados, {ng.aprendidos} aprendidos, "
+            f"{ng.podas} podas, {ng.expulsados} expulsados"
+        )
@@ -0,0 +1,112 @@
+"""Comparativa de rendimiento del solver sobre bombos fijos (mismas semillas)."""
+
+import argparse
+import random
+import time
+
+import solver
+from data import load_teams
+from backjumping import BusquedaCBJ
+from dominios import DomainStore
+from iterativo import BusquedaIterativa
+from state import DrawState
+from transposicion import TablaTransposicion
+
+# Semillas de bombos que el solver original resuelve en un tiempo razonable
+SEMILLAS = [3, 4, 5, 11, 12, 13]
+
+# Semillas difíciles para el orden determinista (cientos de miles de nodos)
+SEMILLAS_DIFICILES = [1, 6, 9, 10]
+
+# Bombos sin solución (5 ingleses en un bombo): miden lo que cuesta demostrarlo
+SEMILLAS_IMPOSIBLES = [2, 8]
+
+# "dominios" usa las máscaras de bits más el DomainStore incremental;
+# "dominios+tt" añade la tabla de transposición de estados fallidos;
+# "bombo" ramifica por pares (equipo, bombo) con backtracking cronológico
+# y "cbj" hace lo mismo con backjumping y aprendizaje de nogoods;
+# "iterativo" es "dominios" con pila explícita (mismo árbol) y "pares"
+# resuelve por separado cada par de bombos (descomposicion.py)
+BACKENDS = ["sets", "bitset", "dominios", "dominios+tt", "bombo", "cbj", "iterativo", "pares"]
+
+
+def ejecutar(seed: int, backend: str, max_nodos=None, simetria: bool = True):
+    """Resuelve el sorteo de la semilla dada con un backend y devuelve métricas."""
+    random.seed(seed)
+    estado = DrawState(load_teams(), backend="sets" if backend == "sets" else "bitset")
+    estado.simetria = simetria
+    tabla = TablaTransposicion() if backend.endswith("+tt") else None
+    estado.max_calls = max_nodos
+
+    busqueda = None
+
+    t0 = time.perf_counter()
+    try:
+        if backend == "cbj":
+            busqueda = BusquedaCBJ(DomainStore(estado), por_bombo=True)
+            found = busqueda.buscar()
+        elif backend == "iterativo":
+            estado.max_calls = None
+            found = BusquedaIterativa(estado).ejecutar(max_nodos)
+        elif backend == "pares":
+            found = solver.resolver(estado, rng=random.Random(seed), reinicios=50, modo="bombos")
+        elif backend == "bombo":
+            found = solver.search_dominios(DomainStore(estado), por_bombo=True)
+        elif backend.startswith("dominios"):
+            found = solver.search_dominios(DomainStore(estado), tabla=tabla)
+        else:
+            found = solver.search(estado)
+    except solver.LimiteNodos:
+        found = None
+    dt = time.perf_counter() - t0
+
+    if tabla is not None:
+        print(f"{'':20s}{tabla.resumen()}")
+    if busqueda is not None:
+        print(f"{'':20s}{busqueda.resumen()}")
+
+    firma = [sorted(r) for r in estado.adj] if found else None
+    return found, estado.calls, dt, firma, estado.podas_simetria
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seeds", type=int, nargs="*", default=SEMILLAS)
+    parser.add_argument("--backends", nargs="*", default=BACKENDS)
+    parser.add_argument("--dificiles", action="store_true", help="usar SEMILLAS_DIFICILES")
+    parser.add_argument("--imposibles", action="store_true", help="usar SEMILLAS_IMPOSIBLES")
+    parser.add_argument("--max-nodos", type=int, default=None)
+    parser.add_argument("--sin-simetria", action="store_true", help="desactivar la ruptura de simetrías")
+    args = parser.parse_args()
+    if args.dificiles:
+        args.seeds = SEMILLAS_DIFICILES
+    if args.imposibles:
+        args.seeds = SEMILLAS_IMPOSIBLES
+
+    print(
+        f"{'semilla':>7s}  {'backend':11s} {'ok':>5s} {'nodos':>8s} {'podas':>7s} "
+        f"{'tiempo (s)':>11s} {'nodos/s':>10s}"
+    )
+    totales = {b: [0, 0.0] for b in args.backends}
+
+    for seed in args.seeds:
+        firmas = {}
+        for backend in args.backends:
+            found, nodos, dt, firma, podas = ejecutar(seed, backend, args.max_nodos, not args.sin_simetria)
+            firmas[backend] = firma
+            totales[backend][0] += nodos
+            totales[backend][1] += dt
+            print(f"{seed:7d}  {backend:11s} {str(found):>5s} {nodos:8d} {podas:7d} {dt:11.3f} {nodos / dt:10.0f}")
+
+        # Con la MRV por equipos todos deben construir exactamente el mismo sorteo
+        por_equipo = [f for b, f in firmas.items() if f is not None and b not in ("bombo", "cbj", "pares")]
+        if len({str(f) for f in por_equipo}) > 1:
+            print(f"❌ Semilla {seed}: los backends producen sorteos distintos")
+
+    print()
+    for backend, (nodos, dt) in totales.items():
+        print(f"TOTAL {backend:11s} {nodos:8d} nodos en {dt:.3f} s → {nodos / dt:.0f} nodos/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Representación alternativa del estado del sorteo con máscaras de bits.
+
+Cada conjunto de equipos se guarda como un entero de Python donde el bit j
+indica el equipo de índice j. Así el filtrado de candidatos de
+``compute_candidates`` se reduce a unas pocas operaciones AND / ANDNOT /
+popcount en lugar de recorrer los 36 equipos.
+
+Máscaras estáticas (no cambian durante la búsqueda):
+    pot_mask[p]          equipos del bombo p
+    country_mask[c]      equipos del país c
+    same_country[i]      equipos del país de i (incluido el propio i)
+    prohibido[i]         rivales vetados a i (reparacion.py); a diferencia
+                         del resto, se conserva en reset
+
+Máscaras dinámicas (se actualizan en add_edge / remove_edge):
+    rival_mask[i]        rivales ya asignados a i
+    open_mask            equipos con menos de formato.partidos rivales
+    pot_full[i]          equipos de los bombos que i ya tiene completos
+    pot_sat[p]           equipos que ya tienen formato.por_bombo rivales del bombo p
+    country_full[i]      equipos de los países que i ya tiene al límite
+    country_sat[c]       equipos que ya tienen el máximo de rivales del país c
+    viable_mask          equipos que superan el "forward checking" básico
+    posibles_n[i]        nº de equipos que i aún podría recibir (caché)
+"""
+
+from formato import CHAMPIONS
+
+# Por debajo de este k, kesimo_bit quita los bits bajos uno a uno en vez de bisecar
+KESIMO_LINEAL = 8
+
+
+def iter_bits(mask: int):
+    """Itera los índices de los bits activos de ``mask`` en orden creciente."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def kesimo_bit(mask: int, k: int) -> int:
+    """Índice del k-ésimo bit activo de ``mask`` (desde 0), por bisección."""
+    if k < KESIMO_LINEAL:
+        for _ in range(k):
+            mask &= mask - 1
+        return (mask & -mask).bit_length() - 1
+    lo, hi = 0, mask.bit_length() - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if (mask & ((2 << mid) - 1)).bit_count() > k:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def bit_al_azar(mask: int, rng) -> int:
+    """Índice de un bit activo de ``mask`` (no vacía) elegido al azar."""
+    return kesimo_bit(mask, rng.randrange(mask.bit_count()))
+
+
+class BitsetState:
+    """Máscaras de bits equivalentes a adj / deg / pot_count / country_count."""
+
+    def __init__(self, teams, formato=CHAMPIONS):
+        # Límites del formato, como atributos para no buscarlos en cada actualización
+        self.partidos = formato.partidos
+        self.por_bombo = formato.por_bombo
+        self.max_por_pais = formato.max_por_pais
+        self.prohibido = [0] * len(teams)
+        self.reset(teams)
+
+    def prohibir(self, i: int, j: int) -> None:
+        """Veta el emparejamiento (i, j). Hay que llamarlo antes de añadir emparejamientos."""
+        self.prohibido[i] |= 1 << j
+        self.prohibido[j] |= 1 << i
+        self._update_viable(i, 0)
+        self._update_viable(j, 0)
+
+    def reset(self, teams) -> None:
+        """Reconstruye las máscaras estáticas y vacía las dinámicas."""
+        n = len(teams)
+        self.n = n
+        self.all_mask = (1 << n) - 1
+        self.pot = [t.pot for t in teams]
+        self.country = [t.country for t in teams]
+
+        n_bombos = max(t.pot for t in teams)
+        self.pot_mask = [0] * (n_bombos + 1)  # índice 0 no usado
+        self.country_mask = {}
+        for i, t in enumerate(teams):
+            self.pot_mask[t.pot] |= 1 << i
+            self.country_mask[t.country] = self.country_mask.get(t.country, 0) | (1 << i)
+        self.same_country = [self.country_mask[c] for c in self.country]
+
+        self.rival_mask = [0] * n
+        self.open_mask = self.all_mask
+        self.pot_full = [0] * n
+        self.pot_sat = [0] * (n_bombos + 1)
+        self.country_full = [0] * n
+        self.country_sat = {c: 0 for c in self.country_mask}
+        self.viable_mask = 0
+        self.posibles_n = [0] * n
+        for i in range(n):
+            self._update_viable(i, 0)
+
+    # ------------------------------------------------------------
+    # Forward checking
+    # ------------------------------------------------------------
+
+    def posibles(self, i: int) -> int:
+        """Equipos que i aún podría recibir como rivales (sin mirar su grado)."""
+        return (
+            self.all_mask
+            & ~self.rival_mask[i]
+            & ~self.same_country[i]
+            & ~self.prohibido[i]
+            & ~self.pot_full[i]
+        ).bit_count()
+
+    def _update_viable(self, i: int, deg_i: int) -> None:
+        self.posibles_n[i] = self.posibles(i)
+        if self.posibles_n[i] >= self.partidos - deg_i:
+            self.viable_mask |= 1 << i
+        else:
+            self.viable_mask &= ~(1 << i)
+
+    # ------------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------------
+
+    def _count_changed(self, i, pot_j, country_j, pot_count_i, country_count_i, deg_i):
+        bit_i = 1 << i
+
+        if pot_count_i >= self.por_bombo:
+            self.pot_full[i] |= self.pot_mask[pot_j]
+            self.pot_sat[pot_j] |= bit_i
+        else:
+            self.pot_full[i] &= ~self.pot_mask[pot_j]
+            self.pot_sat[pot_j] &= ~bit_i
+
+        if country_count_i >= self.max_por_pais:
+            self.country_full[i] |= self.country_mask[country_j]
+            self.country_sat[country_j] |= bit_i
+        else:
+            self.country_full[i] &= ~self.country_mask[country_j]
+            self.country_sat[country_j] &= ~bit_i
+
+        if deg_i >= self.partidos:
+            self.open_mask &= ~bit_i
+        else:
+            self.open_mask |= bit_i
+
+        self._update_viable(i, deg_i)
+
+    def add_edge(self, i, j, deg, pot_count, country_count) -> None:
+        """Refleja en las máscaras un add_edge(i, j) ya aplicado a los contadores."""
+        self.rival_mask[i] |= 1 << j
+        self.rival_mask[j] |= 1 << i
+        self._sync_pair(i, j, deg, pot_count, country_count)
+
+    def remove_edge(self, i, j, deg, pot_count, country_count) -> None:
+        """Refleja en las máscaras un remove_edge(i, j) ya aplicado a los contadores."""
+        self.rival_mask[i] &= ~(1 << j)
+        self.rival_mask[j] &= ~(1 << i)
+        self._sync_pair(i, j, deg, pot_count, country_count)
+
+    def _sync_pair(self, i, j, deg, pot_count, country_count) -> None:
+        pi, pj = self.pot[i], self.pot[j]
+        ci, cj = self.country[i], self.country[j]
+        self._count_changed(i, pj, cj, pot_count[i][pj], country_count[i][cj], deg[i])
+        self._count_changed(j, pi, ci, pot_count[j][pi], country_count[j][ci], deg[j])
+
+    # ------------------------------------------------------------
+    # Candidatos
+    # ------------------------------------------------------------
+
+    def candidates_mask(self, i: int) -> int:
+        """Máscara de candidatos válidos para i (mismas reglas que compute_candidates)."""
+        if not (self.viable_mask >> i) & 1:
+            return 0
+        return (
+            self.open_mask
+            & self.viable_mask
+            & ~self.rival_mask[i]
+            & ~self.same_country[i]
+            & ~self.prohibido[i]
+            & ~self.pot_full[i]
+            & ~self.pot_sat[self.pot[i]]
+            & ~self.country_full[i]
+            & ~self.country_sat[self.country[i]]
+        )
@@ -0,0 +1,268 @@
+"""
+Muestreo (casi) uniforme de sorteos con una cadena de Markov de intercambios.
+
+El solver da sorteos válidos, pero con su orden de candidatos no da todos
+con la misma probabilidad, así que las frecuencias de montecarlo.py no son
+probabilidades sobre el conjunto de sorteos válidos. Aquí se parte de un
+sorteo válido (con los bombos fijos) y se aplican intercambios dobles de
+aristas dentro de un mismo par de bombos:
+
+    (a, b), (c, d)  →  (a, d), (c, b)     con bombo(a) = bombo(c), bombo(b) = bombo(d)
+
+Cada equipo conserva su grado y sus rivales por bombo. Las demás reglas
+del formato (no repetir rival, no jugar contra el propio país y el tope
+de rivales por país extranjero) se comprueban en O(1) sobre máscaras de rivales y
+contadores por país; si el intercambio no es válido la cadena se queda
+donde está. La propuesta es simétrica (primera arista al azar, segunda al
+azar dentro de su par de bombos, que siempre tiene el mismo tamaño), así
+que la distribución estacionaria es la uniforme sobre los sorteos
+alcanzables. Que desde cualquier sorteo se alcancen todos no está
+demostrado para estas reglas: el diagnóstico de mezcla sirve para ver
+si la cadena se mueve lo suficiente.
+
+Diagnóstico (diagnostico_mezcla): tasa de aceptación y, sobre la serie
+"aristas en común con el sorteo inicial" de las muestras, su tiempo de
+autocorrelación integrado (ventana automática de Sokal) y el tamaño
+efectivo de la muestra.
+
+Uso:
+    python cadena_intercambios.py --oficiales -n 20000 --adelgazado 100
+    python cadena_intercambios.py --semilla-bombos 3 --pareja "Real Madrid" "Liverpool"
+"""
+
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from bitset_state import iter_bits
+
+# Pasos de la cadena entre dos muestras y antes de la primera
+ADELGAZADO = 100
+CALENTAMIENTO = 10_000
+
+# Ventana de Sokal para el tiempo de autocorrelación integrado
+VENTANA_SOKAL = 5
+
+
+class CadenaIntercambios:
+    """Cadena de intercambios dobles sobre un sorteo válido (estado resuelto)."""
+
+    def __init__(self, estado, rng=random):
+        self.rng = rng
+        self.teams = estado.teams
+        n = estado.n
+        pot = [t.pot for t in self.teams]
+        ids = {}
+        pais = [ids.setdefault(t.country, len(ids)) for t in self.teams]
+        self.pais = pais
+
+        # tope[i][c] = rivales permitidos a i del país c
+        self.tope = [
+            [
+                estado.formato.limite_mismo_pais(self.teams[i].country)
+                if c == pais[i] else estado.formato.max_por_pais
+                for c in range(len(ids))
+            ]
+            for i in range(n)
+        ]
+
+        self.vecinos = [0] * n
+        self.cuenta_pais = [[0] * len(ids) for _ in range(n)]
+
+        # Aristas (a, b) con bombo(a) <= bombo(b); cada una pertenece para
+        # siempre a su par de bombos, así que los grupos no cambian
+        self.aristas = []
+        grupos = {}
+        for i, rivales in enumerate(estado.adj):
+            for j in rivales:
+                if i < j:
+                    a, b = (i, j) if pot[i] <= pot[j] else (j, i)
+                    clave = (pot[a], pot[b])
+                    grupos.setdefault(clave, []).append(len(self.aristas))
+                    self.aristas.append([a, b])
+                    self.vecinos[a] |= 1 << b
+                    self.vecinos[b] |= 1 << a
+                    self.cuenta_pais[a][pais[b]] += 1
+                    self.cuenta_pais[b][pais[a]] += 1
+        self.grupos = grupos
+        self.grupo = [None] * len(self.aristas)
+        for clave, miembros in grupos.items():
+            for e in miembros:
+                self.grupo[e] = (miembros, clave[0] == clave[1])
+
+        self.inicial = list(self.vecinos)
+        self.pasos = 0
+        self.aceptados = 0
+
+    # ------------------------------------------------------------
+    # Un paso
+    # ------------------------------------------------------------
+
+    def paso(self) -> bool:
+        """Propone un intercambio y lo aplica si es válido. True si se aplicó."""
+        rng = self.rng
+        aristas = self.aristas
+        self.pasos += 1
+
+        e1 = rng.randrange(len(aristas))
+        miembros, mismo_bombo = self.grupo[e1]
+        e2 = miembros[rng.randrange(len(miembros))]
+        if e1 == e2:
+            return False
+
+        a, b = aristas[e1]
+        c, d = aristas[e2]
+        if mismo_bombo and rng.random() < 0.5:
+            c, d = d, c
+
+        # Nuevas aristas (a, d) y (c, b): distintas de sí mismas y no repetidas
+        if a == d or c == b:
+            return False
+        vecinos = self.vecinos
+        if (vecinos[a] >> d) & 1 or (vecinos[c] >> b) & 1:
+            return False
+
+        # Cada extremo cambia un rival de un país por otro: solo se mira el que gana
+        pais, cuenta, tope = self.pais, self.cuenta_pais, self.tope
+        pa, pb, pc, pd = pais[a], pais[b], pais[c], pais[d]
+        if pb != pd:
+            if cuenta[a][pd] >= tope[a][pd] or cuenta[c][pb] >= tope[c][pb]:
+                return False
+        if pa != pc:
+            if cuenta[d][pa] >= tope[d][pa] or cuenta[b][pc] >= tope[b][pc]:
+                return False
+
+        # Aplicar
+        vecinos[a] ^= (1 << b) | (1 << d)
+        vecinos[c] ^= (1 << d) | (1 << b)
+        vecinos[b] ^= (1 << a) | (1 << c)
+        vecinos[d] ^= (1 << c) | (1 << a)
+        if pb != pd:
+            cuenta[a][pb] -= 1
+            cuenta[a][pd] += 1
+            cuenta[c][pd] -= 1
+            cuenta[c][pb] += 1
+        if pa != pc:
+            cuenta[b][pa] -= 1
+            cuenta[b][pc] += 1
+            cuenta[d][pc] -= 1
+            cuenta[d][pa] += 1
+        aristas[e1] = [a, d]
+        aristas[e2] = [c, b]
+        self.aceptados += 1
+        return True
+
+    def avanzar(self, pasos: int) -> None:
+        paso = self.paso
+        for _ in range(pasos):
+            paso()
+
+    # ------------------------------------------------------------
+    # Muestras
+    # ------------------------------------------------------------
+
+    def solapamiento(self) -> int:
+        """Aristas en común con el sorteo inicial."""
+        return sum((m & m0).bit_count() for m, m0 in zip(self.vecinos, self.inicial)) // 2
+
+    def sorteo(self):
+        """Vista del sorteo actual con teams y adj (lo que usa montecarlo.acumular_sorteo)."""
+        return SimpleNamespace(teams=self.teams, adj=[list(iter_bits(m)) for m in self.vecinos])
+
+    def muestras(self, n: int, adelgazado: int = ADELGAZADO, calentamiento: int = CALENTAMIENTO):
+        """Genera n sorteos separados por adelgazado pasos, tras calentamiento pasos."""
+        self.avanzar(calentamiento)
+        for _ in range(n):
+            self.avanzar(adelgazado)
+            yield self.sorteo()
+
+    @property
+    def aceptacion(self) -> float:
+        return self.aceptados / max(self.pasos, 1)
+
+
+# ------------------------------------------------------------
+# Diagnóstico de mezcla
+# ------------------------------------------------------------
+
+def tiempo_autocorrelacion(serie):
+    """Tiempo de autocorrelación integrado (en muestras) con la ventana de Sokal."""
+    import numpy as np
+
+    x = np.asarray(serie, dtype=float)
+    n = len(x)
+    x = x - x.mean()
+    var = x.var()
+    if n < 4 or var == 0:
+        return 1.0
+    # Autocovarianza por FFT
+    f = np.fft.rfft(x, 2 * n)
+    acf = np.fft.irfft(f * np.conj(f))[:n] / (var * n)
+    tau = 1.0
+    for m in range(1, n):
+        tau += 2 * acf[m]
+        if m >= VENTANA_SOKAL * tau:
+            break
+    return max(tau, 1.0)
+
+
+def diagnostico_mezcla(cadena, serie):
+    """Aceptación, tiempo de autocorrelación (muestras) y tamaño efectivo de la serie."""
+    tau = tiempo_autocorrelacion(serie)
+    return {
+        "aceptacion": cadena.aceptacion,
+        "tau": tau,
+        "muestras_efectivas": len(serie) / tau,
+    }
+
+
+def main():
+    from data import load_teams
+    from montecarlo import ResultadoMC, acumular_sorteo
+    from solver import resolver
+    from state import DrawState
+
+    parser = argparse.ArgumentParser(description="Muestreo uniforme de sorteos por intercambios de aristas")
+    parser.add_argument("-n", "--muestras", type=int, default=10_000)
+    parser.add_argument("--adelgazado", type=int, default=ADELGAZADO)
+    parser.add_argument("--calentamiento", type=int, default=CALENTAMIENTO)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--semilla-bombos", type=int, default=0)
+    parser.add_argument("--oficiales", action="store_true", help="bombos reales de la temporada")
+    parser.add_argument("--pareja", nargs=2, metavar=("EQUIPO_A", "EQUIPO_B"))
+    parser.add_argument("--salida", help="fichero .npz con los arrays de montecarlo.ResultadoMC")
+    args = parser.parse_args()
+
+    teams = load_teams(random.Random(args.semilla_bombos), oficiales=args.oficiales)
+    estado = DrawState(teams, backend="bitset")
+    if not resolver(estado, max_nodos=1000, rng=random.Random(args.semilla), reinicios=50, por_bombo=True):
+        print("❌ Estos bombos no tienen sorteo válido")
+        return
+
+    cadena = CadenaIntercambios(estado, random.Random(args.semilla))
+    res = ResultadoMC.vacio()
+    serie = []
+    t0 = time.perf_counter()
+    for sorteo in cadena.muestras(args.muestras, args.adelgazado, args.calentamiento):
+        acumular_sorteo(res, sorteo)
+        res.resueltos += 1
+        serie.append(cadena.solapamiento())
+    dt = time.perf_counter() - t0
+
+    diag = diagnostico_mezcla(cadena, serie)
+    print(f"{args.muestras} muestras en {dt:.1f} s ({args.muestras / dt:.0f} muestras/s, adelgazado {args.adelgazado})")
+    print(
+        f"Aceptación {diag['aceptacion']:.1%} | solapamiento medio con el inicial "
+        f"{sum(serie) / len(serie):.1f}/{len(cadena.aristas)} | tau {diag['tau']:.1f} muestras "
+        f"| muestras efectivas {diag['muestras_efectivas']:.0f}"
+    )
+    if args.pareja:
+        a, b = args.pareja
+        print(f"P({a} vs {b}) = {res.probabilidad(a, b):.4f}")
+    if args.salida:
+        res.guardar(args.salida)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,13 @@
-"""Parámetros del sorteo y lista de equipos de la temporada 2025-2026."""
+"""
+Parámetros del sorteo (los equipos de cada temporada están en temporadas/).
+
+N_BOMBOS, N_MATCHES, PER_POT y los límites de países definen el formato
+de la Champions (formato.CHAMPIONS); el resto de módulos leen el Formato
+de cada sorteo (estado.formato), no estas constantes.
+"""
+
+# Número de bombos
+N_BOMBOS = 4
 
 # Número de rivales por equipo
 N_MATCHES = 8
@@ -19,42 +28,23 @@ MAX_SAME_COUNTRY = {
 # Pedro te ha dicho que aquí se puede ser laxo y permitir hasta 3.
 MAX_RIVALS_PER_COUNTRY = 3
 
-# Lista de los 36 equipos de la fase liga 2025-2026
-ALL_TEAMS_2026 = [
-    "Real Madrid",
-    "Pafos",
-    "PSV",
-    "Qarabag",
-    "Atlético de Madrid",
-    "Tottenham",
-    "Marseille",
-    "Juventus",
-    "Union Saint-Gilloise",
-    "Galatasaray",
-    "Newcastle",
-    "Bayer Leverkusen",
-    "Arsenal",
-    "Slavia Praha",
-    "Olympiacos",
-    "Athletic Club",
-    "Villarreal",
-    "Paris Saint-Germain",
-    "Napoli",
-    "Inter",
-    "Bayern München",
-    "Manchester City",
-    "Benfica",
-    "Eintracht Frankfurt",
-    "Atalanta",
-    "Borussia Dortmund",
-    "Sporting CP",
-    "Chelsea",
-    "Club Brugge",
-    "Bodo/Glimt",
-    "Kairat Almaty",
-    "Monaco",
-    "Liverpool",
-    "Ajax",
-    "Barcelona",
-    "Copenhagen",
-]
+# Representación del estado usada por compute_candidates:
+#   "sets"   → conjuntos y contadores (versión original)
+#   "bitset" → máscaras de bits (bitset_state.py)
+BACKEND_ESTADO = "sets"
+
+# Ruptura de simetrías en el backtracking: si (i, j) falla, no se prueba
+# (i, j2) con j2 del mismo bombo y país que j y los mismos rivales.
+ROMPER_SIMETRIA = True
+
+# Temporada por defecto (fichero temporadas/<TEMPORADA>.json, ver temporada.py).
+# La variable de entorno CHAMPIONS_TEMPORADA la sustituye sin tocar código.
+TEMPORADA = "2025-26"
+
+
+def __getattr__(nombre):
+    # Compatibilidad: la lista de equipos se lee de la temporada al pedirla
+    if nombre == "ALL_TEAMS_2026":
+        from temporada import cargar_temporada
+        return list(cargar_temporada().nombres)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
@@ -1,19 +1,65 @@
-from state import teams, adj, deg, pot_count, country_count
-from config import N_MATCHES, PER_POT, MAX_SAME_COUNTRY, MAX_RIVALS_PER_COUNTRY
+from collections import Counter
+from bitset_state import iter_bits
 
 
-def compute_candidates(i: int):
+def bombos_viables(teams) -> bool:
+    """
+    Comprobación rápida de bombos imposibles: si un país tiene más de la
+    mitad de los equipos de un bombo, sus equipos no pueden encontrar
+    todos sus rivales (por_bombo) extranjeros dentro de ese mismo bombo.
+    """
+    por_bombo = Counter((t.pot, t.country) for t in teams)
+    tam_bombo = Counter(t.pot for t in teams)
+    return all(2 * cnt <= tam_bombo[pot] for (pot, _), cnt in por_bombo.items())
+
+
+def clases_equivalencia(teams):
+    """
+    clase[i] = identificador del par (bombo, país) de cada equipo. Dos
+    equipos de la misma clase son intercambiables para todas las reglas de
+    compute_candidates: si además tienen los mismos rivales, cambiar uno por
+    otro es una simetría del sorteo parcial.
+    """
+    ids = {}
+    return [ids.setdefault((t.pot, t.country), len(ids)) for t in teams]
+
+
+def compute_candidates(estado, i: int):
+    """
+    Devuelve los candidatos válidos para el equipo i usando la
+    representación elegida en estado.backend. Ambas devuelven
+    la misma lista en el mismo orden (índice creciente).
+    """
+    if estado.instr is not None:
+        estado.instr.clasificar(estado, i)
+    if estado.backend == "bitset":
+        return compute_candidates_bitset(estado, i)
+    return compute_candidates_sets(estado, i)
+
+
+def compute_candidates_bitset(estado, i: int):
+    """Versión con máscaras de bits de compute_candidates_sets."""
+    return list(iter_bits(estado.bits.candidates_mask(i)))
+
+
+def compute_candidates_sets(estado, i: int):
     """
     Devuelve los candidatos válidos para emparejar con el equipo i
     aplicando TODAS las restricciones:
         ❌ no repetir rival
-        ❌ no exceder 8 rivales
+        ❌ no exceder formato.partidos rivales (8 en la Champions)
         ❌ no contra equipos del mismo país (regla Champions)
-        ❌ no exceder el límite por bombo (2 por bombo)
-        ❌ no exceder el límite de rivales por país extranjero (máx. 3)
+        ❌ no exceder el límite por bombo (formato.por_bombo)
+        ❌ no exceder el límite de rivales por país extranjero (formato.max_por_pais)
         ❌ no crear conflicto con rivales futuros (forward checking básico)
     """
 
+    teams = estado.teams
+    adj, deg = estado.adj, estado.deg
+    pot_count, country_count = estado.pot_count, estado.country_count
+    formato = estado.formato
+    partidos, por_bombo, max_por_pais = formato.partidos, formato.por_bombo, formato.max_por_pais
+
     candidates = []
 
     ti = teams[i]
@@ -28,8 +74,8 @@ def compute_candidates(i: int):
         if j in adj[i]:
             continue
 
-        # 2. no sobrepasar 8 rivales
-        if deg[j] >= N_MATCHES:
+        # 2. no sobrepasar el número de rivales del formato
+        if deg[j] >= partidos:
             continue
 
         # 3. REGLA IMPORTANTE DEL PROFESOR:
@@ -39,22 +85,22 @@ def compute_candidates(i: int):
 
         # 4. no exceder rivales por bombo
         pj = teams[j].pot
-        if pot_count[i][pj] >= PER_POT:
+        if pot_count[i][pj] >= por_bombo:
             continue
-        if pot_count[j][pot_i] >= PER_POT:
+        if pot_count[j][pot_i] >= por_bombo:
             continue
 
-        # 4.b) no exceder el límite de rivales de un mismo país extranjero (máx. 3)
+        # 4.b) no exceder el límite de rivales de un mismo país extranjero
         country_j = teams[j].country
-        if country_count[i][country_j] >= MAX_RIVALS_PER_COUNTRY:
+        if country_count[i][country_j] >= max_por_pais:
             continue
-        if country_count[j][country_i] >= MAX_RIVALS_PER_COUNTRY:
+        if country_count[j][country_i] >= max_por_pais:
             continue
 
         # 5. "forward checking" básico:
-        #    ambos equipos deben poder completar 8 rivales
-        restantes_i = N_MATCHES - deg[i]
-        restantes_j = N_MATCHES - deg[j]
+        #    ambos equipos deben poder completar sus rivales
+        restantes_i = partidos - deg[i]
+        restantes_j = partidos - deg[j]
 
         posibles_i = sum(
             1
@@ -62,7 +108,7 @@ def compute_candidates(i: int):
             if k != i
             and k not in adj[i]
             and teams[k].country != country_i
-            and pot_count[i][teams[k].pot] < PER_POT
+            and pot_count[i][teams[k].pot] < por_bombo
         )
 
         posibles_j = sum(
@@ -71,7 +117,7 @@ def compute_candidates(i: int):
             if k != j
             and k not in adj[j]
             and teams[k].country != teams[j].country
-            and pot_count[j][teams[k].pot] < PER_POT
+            and pot_count[j][teams[k].pot] < por_bombo
         )
 
         if posibles_i < restantes_i:
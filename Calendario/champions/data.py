@@ -2,10 +2,10 @@
 
 import random
 from dataclasses import dataclass
-from config import ALL_TEAMS_2026
+from temporada import cargar_temporada
 
 
-@dataclass
+@dataclass(slots=True)
 class Team:
     name: str
     country: str
@@ -13,47 +13,60 @@ class Team:
     idx: int
 
 
-# Mapa de países para cada equipo
-country_map = {
-    "Real Madrid": "ESP", "Pafos": "CYP", "PSV": "NED", "Qarabag": "AZE",
-    "Atlético de Madrid": "ESP", "Tottenham": "ENG", "Marseille": "FRA",
-    "Juventus": "ITA", "Union Saint-Gilloise": "BEL",
+def __getattr__(nombre):
+    # Compatibilidad: country_map y TEAM_CITY se leen de la temporada al pedirlos
+    if nombre == "country_map":
+        return cargar_temporada().pais
+    if nombre == "TEAM_CITY":
+        # Equipos que comparten ciudad (no pueden jugar en casa el mismo día)
+        return cargar_temporada().ciudad
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
-    "Galatasaray": "TUR", "Newcastle": "ENG", "Bayer Leverkusen": "GER",
-    "Arsenal": "ENG", "Slavia Praha": "CZE", "Olympiacos": "GRE",
-    "Athletic Club": "ESP", "Villarreal": "ESP", "Paris Saint-Germain": "FRA",
 
-    "Napoli": "ITA", "Inter": "ITA", "Bayern München": "GER",
-    "Manchester City": "ENG", "Benfica": "POR", "Eintracht Frankfurt": "GER",
-    "Atalanta": "ITA", "Borussia Dortmund": "GER", "Sporting CP": "POR",
+def generar_bombos_aleatorios(rng=random, temporada=None):
+    """
+    Devuelve los bombos (listas del mismo tamaño: 4 de 9 equipos en la
+    Champions) generados aleatoriamente.
+    rng permite usar un random.Random propio (p. ej. con semilla fija) y
+    temporada el nombre o la ruta de otra temporada (ver temporada.py).
+    """
+    tabla = cargar_temporada(temporada)
+    equipos = list(tabla.nombres)
+    rng.shuffle(equipos)
+    tam = len(equipos) // tabla.n_bombos
+    return [equipos[p * tam:(p + 1) * tam] for p in range(tabla.n_bombos)]
 
-    "Chelsea": "ENG", "Club Brugge": "BEL", "Bodo/Glimt": "NOR",
-    "Kairat Almaty": "KAZ", "Monaco": "FRA", "Liverpool": "ENG",
-    "Ajax": "NED", "Barcelona": "ESP", "Copenhagen": "DEN",
-}
 
+def bombos_oficiales(temporada=None):
+    """Los bombos del sorteo real de la temporada, en el orden del fichero."""
+    tabla = cargar_temporada(temporada)
+    bombos = [[] for _ in range(tabla.n_bombos)]
+    for name, pot in zip(tabla.nombres, tabla.bombos):
+        bombos[pot - 1].append(name)
+    return bombos
 
-def generar_bombos_aleatorios():
-    """Devuelve una lista de 4 bombos (listas de 9 equipos) generados aleatoriamente."""
-    equipos = ALL_TEAMS_2026.copy()
-    random.shuffle(equipos)
-    return [
-        equipos[0:9],
-        equipos[9:18],
-        equipos[18:27],
-        equipos[27:36],
-    ]
 
-
-def load_teams():
-    """Crea la lista de Team a partir de bombos aleatorios."""
+def load_teams(rng=random, temporada=None, oficiales=False, bombos=None):
+    """
+    Crea la lista de Team a partir de bombos aleatorios (o de los bombos
+    reales de la temporada con oficiales=True, o de bombos dados como
+    listas de nombres).
+    """
+    tabla = cargar_temporada(temporada)
+    if bombos is not None:
+        desconocidos = [name for bombo in bombos for name in bombo if name not in tabla.indice]
+        if desconocidos:
+            raise ValueError(f"Equipos que no están en la temporada {tabla.nombre}: {desconocidos}")
+    elif oficiales:
+        bombos = bombos_oficiales(temporada)
+    else:
+        bombos = generar_bombos_aleatorios(rng, temporada)
     teams = []
-    bombos = generar_bombos_aleatorios()
     idx = 0
 
     for pot_number, bombo in enumerate(bombos, start=1):
         for name in bombo:
-            country = country_map.get(name, "UNK")
+            country = tabla.pais.get(name, "UNK")
             teams.append(
                 Team(
                     name=name,
@@ -0,0 +1,200 @@
+"""
+Resolución por descomposición en pares de bombos.
+
+Como cada equipo tiene exactamente por_bombo rivales de cada bombo
+(estado.formato), todo
+sorteo válido se parte en subgrafos independientes salvo por las reglas de
+país:
+
+    - para cada bombo p, un grafo por_bombo-regular entre los equipos de p
+      (con por_bombo = 2, una unión de ciclos; con 1, un emparejamiento);
+    - para cada par de bombos p < q, un grafo bipartito por_bombo-regular
+      entre p y q, que es siempre la unión de por_bombo emparejamientos
+      perfectos (teorema de König).
+
+Los subproblemas se resuelven uno tras otro sobre el mismo DomainStore:
+los dominios ya incluyen los vetos por país y el tope de
+formato.max_por_pais con los rivales asignados en los subproblemas
+anteriores, así que así se coordinan los límites de país entre ellos.
+Después de cada paso se comprueba que a ningún equipo le falten
+candidatos en ningún bombo (la misma poda que mrv_bombo); si falla, se
+deshace el paso y se repite con otro orden aleatorio.
+
+Los bipartitos se construyen con emparejamientos perfectos por caminos de
+aumento (algoritmo de Kuhn sobre las máscaras de bits); los de un mismo
+bombo, con un backtracking pequeño sobre sus equipos. Solo se usan
+por_bombo y los bombos de los equipos, así que vale para cualquier
+formato (todos tienen bombos del mismo tamaño). Se parte de un estado
+vacío.
+"""
+
+import random
+
+from bitset_state import bit_al_azar, iter_bits
+from formato import CHAMPIONS
+
+# Intentos de cada subproblema antes de reiniciar el sorteo entero
+INTENTOS_SUBPROBLEMA = 20
+
+# Nodos máximos del backtracking de un subproblema dentro de un bombo de
+# la Champions; con otros formatos, proporcional al tamaño del bombo
+MAX_NODOS_BOMBO = 200
+
+
+def pares_de_bombos(teams):
+    """Subproblemas en orden: primero cada bombo consigo mismo, luego los pares p < q."""
+    bombos = sorted({t.pot for t in teams})
+    return [(p, p) for p in bombos] + [(p, q) for p in bombos for q in bombos if p < q]
+
+
+def _contar_nodo(estado) -> None:
+    from solver import LimiteNodos  # import diferido: solver importa este módulo
+
+    estado.calls += 1
+    if estado.max_calls is not None and estado.calls > estado.max_calls:
+        raise LimiteNodos()
+
+
+def _completo(store) -> bool:
+    """False si algún equipo abierto ya no puede completar algún bombo."""
+    return store.mrv_bombo() is not None or not store.estado.bits.open_mask
+
+
+def _deshacer_hasta(store, n: int) -> None:
+    while len(store.aristas) > n:
+        store.remove_edge(*store.aristas[-1])
+
+
+# ------------------------------------------------------------
+# Bipartitos: emparejamientos perfectos
+# ------------------------------------------------------------
+
+def emparejamiento_perfecto(store, lado_a: int, lado_b: int, rng):
+    """
+    Emparejamiento perfecto entre las máscaras lado_a y lado_b usando solo
+    aristas de los dominios actuales, o None si no existe. Los empates se
+    rompen con rng para que cada intento dé un emparejamiento distinto.
+    """
+    estado = store.estado
+    dominio = store.dominio
+    pareja = {}  # equipo de lado_b -> equipo de lado_a
+
+    def aumentar(i, visitados):
+        _contar_nodo(estado)
+        # Candidatos al azar de uno en uno, sin los visitados por el camino
+        libres = dominio(i) & lado_b & ~visitados[0]
+        while libres:
+            j = bit_al_azar(libres, rng)
+            visitados[0] |= 1 << j
+            if j not in pareja or aumentar(pareja[j], visitados):
+                pareja[j] = i
+                return True
+            libres &= ~visitados[0]
+        return False
+
+    orden = list(iter_bits(lado_a))
+    rng.shuffle(orden)
+    for i in orden:
+        if not aumentar(i, [0]):
+            return None
+    return [(i, j) for j, i in pareja.items()]
+
+
+def _resolver_bipartito(store, p: int, q: int, rng) -> bool:
+    """por_bombo emparejamientos perfectos sucesivos entre los bombos p y q."""
+    pot_mask = store.estado.bits.pot_mask
+    inicio = len(store.aristas)
+    ronda = 0
+
+    while ronda < store.estado.formato.por_bombo:
+        antes = len(store.aristas)
+        for _ in range(INTENTOS_SUBPROBLEMA):
+            m = emparejamiento_perfecto(store, pot_mask[p], pot_mask[q], rng)
+            if m is None:
+                break
+            for i, j in m:
+                store.add_edge(i, j)
+            if _completo(store):
+                break
+            _deshacer_hasta(store, antes)
+        else:
+            m = None
+
+        if m is None:
+            # Esta ronda no tiene solución con las anteriores: se repite todo el par
+            _deshacer_hasta(store, inicio)
+            return False
+        ronda += 1
+
+    return True
+
+
+# ------------------------------------------------------------
+# Dentro de un bombo: backtracking sobre sus equipos
+# ------------------------------------------------------------
+
+def _resolver_bombo(store, p: int, rng) -> bool:
+    """Grafo por_bombo-regular entre los equipos del bombo p."""
+    estado = store.estado
+    mask_p = estado.bits.pot_mask[p]
+    pot_count = estado.pot_count
+    por_bombo = estado.formato.por_bombo
+    limite = [MAX_NODOS_BOMBO * estado.formato.tam_bombo // CHAMPIONS.tam_bombo]
+
+    def rec():
+        _contar_nodo(estado)
+        limite[0] -= 1
+        if limite[0] < 0:
+            return False
+
+        # MRV dentro del bombo
+        best, best_size = None, None
+        for i in iter_bits(mask_p):
+            need = por_bombo - pot_count[i][p]
+            if need <= 0:
+                continue
+            s = (store.dominio(i) & mask_p).bit_count()
+            if s < need:
+                return False
+            if best is None or s < best_size:
+                best, best_size = i, s
+        if best is None:
+            return _completo(store)
+
+        candidatos = store.dominio(best) & mask_p
+        while candidatos:
+            j = bit_al_azar(candidatos, rng)
+            candidatos ^= 1 << j
+            store.add_edge(best, j)
+            if rec():
+                return True
+            store.remove_edge(best, j)
+        return False
+
+    return rec()
+
+
+# ------------------------------------------------------------
+# Coordinación
+# ------------------------------------------------------------
+
+def buscar_por_bombos(store, rng=None) -> bool:
+    """
+    Un intento de completar el sorteo resolviendo los subproblemas en
+    orden. True si lo consigue; si no, deshace lo que añadió y devuelve
+    False (que no demuestra que no haya solución).
+    """
+    rng = rng or random.Random(0)
+    estado = store.estado
+    inicio = len(store.aristas)
+
+    for p, q in pares_de_bombos(estado.teams):
+        if p == q:
+            ok = any(_resolver_bombo(store, p, rng) for _ in range(INTENTOS_SUBPROBLEMA))
+        else:
+            ok = any(_resolver_bipartito(store, p, q, rng) for _ in range(INTENTOS_SUBPROBLEMA))
+        if not ok:
+            _deshacer_hasta(store, inicio)
+            return False
+
+    return True
@@ -0,0 +1,332 @@
+"""Almacén incremental de dominios (candidatos de cada equipo) con trail para deshacer.
+
+El dominio de un equipo abierto es bits.candidates_mask, que ya son unas
+pocas operaciones con máscaras; lo caro de la MRV es encontrar el equipo
+(o el par equipo-bombo) con menos candidatos sin recorrer todos los
+equipos en cada nodo. Al añadir un emparejamiento (i, j) cambian:
+
+    - los dominios de i y de j, que son los únicos cuyos contadores cambian;
+    - el bit de i (o de j) en los dominios de los equipos que lo tenían
+      como candidato y ya no pueden tenerlo.
+
+La relación "j es candidato de i" es simétrica, así que los equipos del
+segundo grupo son exactamente los que salen del dominio de i o de j, y
+cada uno pierde un candidato del bombo de i (o de j). Cuando i llena un
+bombo son todos los candidatos que le quedaban en él, unos n/8 equipos
+con 256 equipos: actualizarlos uno a uno hace cuadrático el sorteo.
+
+Por eso los tamaños de los dominios no se guardan equipo a equipo sino
+"en rodajas": tamanos[b] es la máscara de los equipos cuyo tamaño tiene
+el bit b activo. Restar uno a todos los equipos de una máscara es una
+resta con acarreo sobre las rodajas (unas log2(n) operaciones con
+enteros), igual que encontrar el menor tamaño entre los abiertos y los
+equipos que lo tienen. mrv_bombo hace lo mismo con los pares (equipo,
+bombo), codificados como el bit bombo * n + equipo para que los de un
+bombo q se obtengan desplazando una máscara de equipos q * n bits; las
+rodajas de pares se crean la primera vez que se usa, y las de equipos,
+la primera vez que se usa mrv. El trail guarda las rodajas anteriores a
+cada add_edge (los enteros de Python son inmutables, así que basta con
+la lista).
+
+Sin rng, mrv y mrv_bombo eligen lo mismo que un recorrido completo (el
+primero de los empatados, por equipo y luego por bombo); con rng, uno de
+los empatados al azar, buscado por bisección sobre la máscara.
+"""
+
+from bitset_state import bit_al_azar, iter_bits
+
+
+class DomainStore:
+    """Dominios sobre estado.bits con MRV incremental; add_edge / remove_edge deben ir en orden LIFO."""
+
+    def __init__(self, estado):
+        self.estado = estado
+        n = estado.n
+        self.n_bombos = len(estado.bits.pot_mask)  # incluye el índice 0, no usado
+        # Los tamaños de dominio caben en ancho bits
+        self.ancho = n.bit_length()
+
+        # grado[d] = equipos con d rivales, para ordenar candidatos sin recorrerlos
+        self.grado = [0] * (estado.formato.partidos + 1)
+        for i in range(n):
+            self.grado[estado.deg[i]] |= 1 << i
+
+        # Rodajas de tamaños por equipo y por par (equipo, bombo), y exige[r] =
+        # pares a los que aún les faltan al menos r rivales (r = 1..por_bombo;
+        # exige[1] son los pares activos). None hasta que se usan.
+        self.tamanos = None
+        self.tamanos_bombo = None
+        self.exige = None
+
+        # trail[k] = (tamanos, tamanos_bombo, exige) antes del k-ésimo add_edge
+        self.trail = []
+
+        # Emparejamientos añadidos a través del store, en orden
+        self.aristas = []
+
+        # Último equipo (mrv) o hueco (equipo, bombo) (mrv_bombo) sin candidatos suficientes
+        self.ultimo_fallo = None
+
+    def dominio(self, k: int) -> int:
+        """Máscara de candidatos de k (0 si ya tiene todos sus rivales)."""
+        estado = self.estado
+        if estado.deg[k] >= estado.bits.partidos:
+            return 0
+        return estado.bits.candidates_mask(k)
+
+    # ------------------------------------------------------------
+    # Rodajas
+    # ------------------------------------------------------------
+
+    def _crear_tamanos(self) -> None:
+        self.tamanos = [0] * self.ancho
+        for i in iter_bits(self.estado.bits.open_mask):
+            _cambiar(self.tamanos, 1 << i, self.dominio(i).bit_count())
+
+    def _crear_tamanos_bombo(self) -> None:
+        estado = self.estado
+        self.tamanos_bombo = [0] * self.ancho
+        self.exige = [0] * (estado.bits.por_bombo + 1)
+        for i in range(estado.n):
+            self._cambiar_pares(i, 0, self.dominio(i))
+            for q in range(1, self.n_bombos):
+                self._fijar_exige(i, q)
+
+    def _cambiar_pares(self, i: int, old: int, new: int) -> None:
+        """Pasa los tamaños de los pares de i del dominio old al new (solo los bombos que cambian)."""
+        n = self.estado.n
+        pot_mask = self.estado.bits.pot_mask
+        cambio = old ^ new
+        for q in range(1, self.n_bombos):
+            m = pot_mask[q]
+            if cambio & m:
+                diferencia = (old & m).bit_count() ^ (new & m).bit_count()
+                _cambiar(self.tamanos_bombo, 1 << (q * n + i), diferencia)
+
+    def _fijar_exige(self, i: int, q: int) -> None:
+        """Bits de exige del par (i, q) a partir de pot_count."""
+        bits = self.estado.bits
+        bit = 1 << (q * self.estado.n + i)
+        need = bits.por_bombo - self.estado.pot_count[i][q]
+        exige = self.exige
+        for r in range(1, bits.por_bombo + 1):
+            if need >= r:
+                exige[r] |= bit
+            else:
+                exige[r] &= ~bit
+
+    # ------------------------------------------------------------
+    # Emparejamientos
+    # ------------------------------------------------------------
+
+    def add_edge(self, i: int, j: int) -> None:
+        """Añade (i, j) al DrawState y actualiza los tamaños afectados."""
+        estado = self.estado
+        tamanos, tamanos_bombo = self.tamanos, self.tamanos_bombo
+        self.trail.append((tamanos, tamanos_bombo, self.exige))
+
+        antes = (self.dominio(i), self.dominio(j)) if tamanos is not None or tamanos_bombo is not None else None
+        estado.add_edge(i, j)
+        grado = self.grado
+        for t in (i, j):
+            d = estado.deg[t]
+            grado[d - 1] ^= 1 << t
+            grado[d] |= 1 << t
+        self.aristas.append((i, j))
+        if antes is None:
+            return
+
+        if tamanos is not None:
+            self.tamanos = tamanos = tamanos.copy()
+        if tamanos_bombo is not None:
+            self.tamanos_bombo = tamanos_bombo = tamanos_bombo.copy()
+            self.exige = self.exige.copy()
+
+        n, pot = estado.n, estado.bits.pot
+        ambos = (1 << i) | (1 << j)
+        for t, old in zip((i, j), antes):
+            new = self.dominio(t)
+            if new == old:
+                continue
+            perdidos = old & ~new & ~ambos
+            if perdidos:
+                if tamanos is not None:
+                    _restar_uno(tamanos, perdidos)
+                if tamanos_bombo is not None:
+                    _restar_uno(tamanos_bombo, perdidos << (pot[t] * n))
+            if tamanos is not None:
+                _cambiar(tamanos, 1 << t, old.bit_count() ^ new.bit_count())
+            if tamanos_bombo is not None:
+                self._cambiar_pares(t, old, new)
+        if tamanos_bombo is not None:
+            # pot_count solo cambia en el bombo del otro equipo
+            self._fijar_exige(i, pot[j])
+            self._fijar_exige(j, pot[i])
+
+    def remove_edge(self, i: int, j: int) -> None:
+        """Elimina (i, j), que debe ser el último emparejamiento añadido."""
+        # Si las rodajas se crearon después de este add_edge, vuelven a None
+        # y se reconstruyen cuando hagan falta
+        self.tamanos, self.tamanos_bombo, self.exige = self.trail.pop()
+        self.aristas.pop()
+        estado = self.estado
+        estado.remove_edge(i, j)
+        grado = self.grado
+        for t in (i, j):
+            d = estado.deg[t]
+            grado[d + 1] ^= 1 << t
+            grado[d] |= 1 << t
+
+    def deshacer_todo(self) -> None:
+        """Elimina todos los emparejamientos añadidos a través del store."""
+        while self.aristas:
+            self.remove_edge(*self.aristas[-1])
+
+    # ------------------------------------------------------------
+    # MRV
+    # ------------------------------------------------------------
+
+    def mrv(self, rng=None):
+        """
+        Equipo abierto con menos candidatos (el primero en caso de empate,
+        o uno al azar si se pasa rng), o None si algún equipo abierto se ha
+        quedado sin candidatos.
+        """
+        abiertos = self.estado.bits.open_mask
+        if not abiertos:
+            return None
+        if self.tamanos is None:
+            self._crear_tamanos()
+        s, m = _minimo(self.tamanos, abiertos)
+        if s == 0:
+            self.ultimo_fallo = (m & -m).bit_length() - 1
+            return None
+        return _elegir(m, rng)
+
+    def mrv_bombo(self, rng=None):
+        """
+        Variante más fina de mrv: elige el par (equipo, bombo) al que le
+        faltan rivales y tiene menos candidatos en ese bombo. Devuelve
+        (i, q) o None si algún equipo ya no puede completar algún bombo.
+        """
+        if self.tamanos_bombo is None:
+            self._crear_tamanos_bombo()
+        exige, tamanos = self.exige, self.tamanos_bombo
+        activos = exige[1]
+        if not activos:
+            return None
+
+        # Pares con menos candidatos de los rivales que les faltan
+        fallos = 0
+        for r in range(1, len(exige)):
+            fallos |= exige[r] & _menores(tamanos, r)
+        if fallos:
+            self.ultimo_fallo = self._primer_par(fallos)
+            return None
+
+        _, m = _minimo(tamanos, activos)
+        if rng is None:
+            return self._primer_par(m)
+        q, i = divmod(_elegir(m, rng), self.estado.n)
+        return i, q
+
+    def _primer_par(self, m: int):
+        """(equipo, bombo) del par de m con menor equipo y, entre sus pares, menor bombo."""
+        n = self.estado.n
+        todos = (1 << n) - 1
+        filas = [(m >> (q * n)) & todos for q in range(self.n_bombos)]
+        union = 0
+        for f in filas:
+            union |= f
+        i = (union & -union).bit_length() - 1
+        for q, f in enumerate(filas):
+            if (f >> i) & 1:
+                return i, q
+
+    # ------------------------------------------------------------
+    # Orden de los candidatos
+    # ------------------------------------------------------------
+
+    def candidatos(self, i: int, q=None, rng=None):
+        """
+        Candidatos de i (del bombo q, si se da) en el orden en que se
+        prueban: de menos a más rivales y, sin rng, por bombo, país y
+        nombre (el orden de search). Con rng los del mismo grado salen en
+        orden aleatorio y se sacan de uno en uno, así que solo se elige al
+        azar entre los que llegan a probarse; hay que consumirlos con el
+        estado del nodo (después de deshacer el emparejamiento anterior).
+        """
+        mask = self.dominio(i)
+        if q is not None:
+            mask &= self.estado.bits.pot_mask[q]
+        if rng is None:
+            teams, deg = self.estado.teams, self.estado.deg
+            return sorted(
+                iter_bits(mask),
+                key=lambda j: (deg[j], teams[j].pot, teams[j].country, teams[j].name),
+            )
+        return self._al_azar(mask, rng)
+
+    def _al_azar(self, mask: int, rng):
+        for g in range(len(self.grado)):
+            m = mask & self.grado[g]
+            while m:
+                j = _elegir(m, rng)
+                m ^= 1 << j
+                yield j
+
+
+def _cambiar(rodajas, bit: int, diferencia: int) -> None:
+    """Invierte en el elemento bit de las rodajas los bits de diferencia (valor viejo ^ nuevo)."""
+    b = 0
+    while diferencia:
+        if diferencia & 1:
+            rodajas[b] ^= bit
+        diferencia >>= 1
+        b += 1
+
+
+def _restar_uno(rodajas, mask: int) -> None:
+    """Resta 1 a todos los elementos de mask (todos mayores que 0)."""
+    acarreo = mask
+    for b in range(len(rodajas)):
+        r = rodajas[b]
+        rodajas[b] = r ^ acarreo
+        acarreo &= ~r
+        if not acarreo:
+            return
+
+
+def _minimo(rodajas, mask: int):
+    """(menor valor entre los elementos de mask, máscara de los que lo tienen); mask no vacía."""
+    valor = 0
+    for b in range(len(rodajas) - 1, -1, -1):
+        ceros = mask & ~rodajas[b]
+        if ceros:
+            mask = ceros
+        else:
+            valor |= 1 << b
+    return valor, mask
+
+
+def _menores(rodajas, c: int) -> int:
+    """Máscara de los elementos con valor menor que c."""
+    # Por encima de los bits de c todos tienen que ser 0
+    iguales = -1
+    for b in range(c.bit_length(), len(rodajas)):
+        iguales &= ~rodajas[b]
+    menores = 0
+    for b in range(c.bit_length() - 1, -1, -1):
+        if (c >> b) & 1:
+            menores |= iguales & ~rodajas[b]
+            iguales &= rodajas[b]
+        else:
+            iguales &= ~rodajas[b]
+    return menores
+
+
+def _elegir(mask: int, rng=None) -> int:
+    """El bit más bajo de mask o, con rng, uno al azar."""
+    if rng is None:
+        return (mask & -mask).bit_length() - 1
+    return bit_al_azar(mask, rng)
@@ -0,0 +1,160 @@
+"""
+Escalado del solver con el tamaño de la liga.
+
+Para cada formato (los de formato.FORMATOS y ligas sintéticas de
+formato.formato_sintetico) se resuelven varios sorteos con bombos
+aleatorios de una temporada inventada (temporada.temporada_sintetica) y se
+mide la mediana de tiempo y de nodos por variante del solver. La pendiente
+del ajuste log-log tiempo ~ equipos^k resume el escalado: k ≈ 1 es
+lineal en el número de equipos (o en el de emparejamientos, que es
+proporcional con los mismos partidos por equipo).
+
+Con 10 sorteos por formato de 36 a 256 equipos sale k ≈ 1,1 en bombo
+(entre 45 y 50 µs por emparejamiento, con un nodo por emparejamiento) y
+k ≈ 1,15 en pares, cuyos nodos crecen algo más que los emparejamientos
+(k ≈ 1,25). Lo que queda por encima de 1 es el coste de las operaciones
+con máscaras de n bits. Para llegar ahí, el DomainStore (dominios.py)
+actualiza los tamaños de dominio con rodajas de bits en vez de equipo a
+equipo (llenar un bombo quitaba un candidato a unos n/8 equipos), y con
+rng los candidatos de cada nodo se sacan al azar de uno en uno en vez de
+barajarlos todos (DomainStore.candidatos y descomposicion.py). La
+variante dominios reinicia mucho con pocos equipos y su pendiente no es
+representativa.
+
+Uso:
+    python escalado.py
+    python escalado.py --formatos sintetico-36 sintetico-64 sintetico-128 sintetico-256 --sorteos 5
+    python escalado.py --csv escalado.csv
+"""
+
+import argparse
+import math
+import random
+import statistics
+import time
+
+from data import load_teams
+from formato import obtener_formato
+from solver import resolver
+from state import DrawState
+from temporada import temporada_sintetica
+
+FORMATOS = ["conference", "champions", "europa", "sintetico-64", "sintetico-128", "sintetico-256"]
+
+# "dominios" es la MRV por equipos, "bombo" ramifica por (equipo, bombo) y
+# "pares" resuelve por separado cada par de bombos (como en benchmark.py)
+VARIANTES = ["dominios", "bombo", "pares"]
+
+SORTEOS = 10
+REINICIOS = 50
+
+# Nodos por intento: los 1000 de montecarlo.py en la Champions (144
+# emparejamientos), proporcionales al número de emparejamientos
+NODOS_POR_ARISTA = 7
+
+ANCHO_GRAFICO = 50
+
+
+def medir(formato, variante: str, semilla: int, nodos_por_arista: int = NODOS_POR_ARISTA):
+    """(ok, nodos, ms) de un sorteo con bombos aleatorios de la liga sintética del formato."""
+    tabla = temporada_sintetica(formato, semilla)
+    rng = random.Random(semilla)
+    estado = DrawState(load_teams(rng, tabla), backend="bitset", formato=tabla.formato)
+    max_nodos = nodos_por_arista * estado.E
+    t0 = time.perf_counter()
+    if variante == "pares":
+        ok = resolver(estado, max_nodos=max_nodos, rng=rng, reinicios=REINICIOS, modo="bombos")
+    else:
+        ok = resolver(estado, max_nodos=max_nodos, rng=rng, reinicios=REINICIOS, por_bombo=variante == "bombo")
+    return ok, estado.calls, (time.perf_counter() - t0) * 1000
+
+
+def pendiente_loglog(xs, ys) -> float:
+    """Pendiente del ajuste por mínimos cuadrados de log(y) frente a log(x)."""
+    lx = [math.log(x) for x in xs]
+    ly = [math.log(y) for y in ys]
+    mx, my = statistics.fmean(lx), statistics.fmean(ly)
+    den = sum((a - mx) ** 2 for a in lx)
+    return sum((a - mx) * (b - my) for a, b in zip(lx, ly)) / den if den else float("nan")
+
+
+def grafico(filas, variante: str) -> None:
+    """Barras de tiempo (mediana) por número de equipos, en escala logarítmica."""
+    puntos = [f for f in filas if f["variante"] == variante and f["ms"] > 0]
+    if not puntos:
+        return
+    lo = math.log10(min(f["ms"] for f in puntos))
+    hi = math.log10(max(f["ms"] for f in puntos))
+    print(f"\n{variante}: ms por sorteo (mediana, escala log)")
+    for f in puntos:
+        largo = 1 + round((math.log10(f["ms"]) - lo) / max(hi - lo, 1e-9) * (ANCHO_GRAFICO - 1))
+        print(f"  {f['equipos']:4d} equipos {f['formato']:15s} {'█' * largo} {f['ms']:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalado del solver con el tamaño de la liga")
+    parser.add_argument("--formatos", nargs="*", default=FORMATOS)
+    parser.add_argument("--variantes", nargs="*", default=VARIANTES, choices=VARIANTES)
+    parser.add_argument("--sorteos", type=int, default=SORTEOS, help="sorteos por formato y variante")
+    parser.add_argument("--nodos-por-arista", type=int, default=NODOS_POR_ARISTA, help="límite de nodos por intento")
+    parser.add_argument("--csv", help="fichero donde guardar la tabla")
+    args = parser.parse_args()
+
+    formatos = sorted((obtener_formato(f) for f in args.formatos), key=lambda f: f.n_equipos)
+
+    print(
+        f"{'formato':15s} {'equipos':>7s} {'aristas':>7s} {'variante':9s} {'ok':>5s} "
+        f"{'nodos':>7s} {'ms':>9s} {'µs/arista':>10s}"
+    )
+    filas = []
+    for formato in formatos:
+        for variante in args.variantes:
+            medidas = [medir(formato, variante, s, args.nodos_por_arista) for s in range(args.sorteos)]
+            resueltos = [m for m in medidas if m[0]]
+            if not resueltos:
+                print(f"{formato.nombre:15s} {formato.n_equipos:7d} {formato.n_aristas:7d} {variante:9s}     0")
+                continue
+            fila = {
+                "formato": formato.nombre,
+                "equipos": formato.n_equipos,
+                "aristas": formato.n_aristas,
+                "variante": variante,
+                "resueltos": len(resueltos),
+                "sorteos": len(medidas),
+                "nodos": statistics.median(m[1] for m in resueltos),
+                "ms": statistics.median(m[2] for m in resueltos),
+            }
+            filas.append(fila)
+            print(
+                f"{fila['formato']:15s} {fila['equipos']:7d} {fila['aristas']:7d} {variante:9s} "
+                f"{len(resueltos):2d}/{len(medidas):<2d} {fila['nodos']:7.0f} {fila['ms']:9.1f} "
+                f"{fila['ms'] * 1000 / fila['aristas']:10.1f}"
+            )
+
+    for variante in args.variantes:
+        grafico(filas, variante)
+
+    # Pendientes solo con formatos de los mismos partidos por equipo
+    print("\nPendiente log-log frente a equipos (8 partidos por equipo):")
+    for variante in args.variantes:
+        puntos = [
+            f for f in filas
+            if f["variante"] == variante and obtener_formato(f["formato"]).partidos == 8
+        ]
+        if len({f["equipos"] for f in puntos}) >= 2:
+            equipos = [f["equipos"] for f in puntos]
+            k_ms = pendiente_loglog(equipos, [f["ms"] for f in puntos])
+            k_nodos = pendiente_loglog(equipos, [f["nodos"] for f in puntos])
+            print(f"  {variante:9s} ms: k = {k_ms:.2f}   nodos: k = {k_nodos:.2f}")
+
+    if args.csv:
+        import csv
+
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            escritor = csv.DictWriter(f, fieldnames=list(filas[0]) if filas else ["formato"])
+            escritor.writeheader()
+            escritor.writerows(filas)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,40 @@
+"""
+Partidos de la fase liga a partir de un sorteo resuelto.
+
+Todo el proceso trabaja con índices de equipo (posiciones en estado.teams):
+un partido es un par (i, j) y, una vez orientado, (local, visitante). Los
+nombres solo se resuelven al imprimir o con nombres_partidos.
+"""
+
 import random
-from state import teams, adj
 
 
-def generar_partidos_unicos():
-    partidos = set()
-    for i, rivales in enumerate(adj):
-        for j in rivales:
-            if i < j:
-                A = teams[i].name
-                B = teams[j].name
-                partidos.add((A, B))
-    return list(partidos)
+def generar_partidos_unicos(estado):
+    """Emparejamientos del sorteo como pares (i, j) con i < j, en orden creciente."""
+    return [(i, j) for i, rivales in enumerate(estado.adj) for j in sorted(rivales) if i < j]
+
+
+def nombres_partidos(estado, partidos):
+    """Convierte pares de índices en pares de nombres (para imprimir o verificar)."""
+    teams = estado.teams
+    return [(teams[a].name, teams[b].name) for a, b in partidos]
+
+
+def partidos_del_calendario(estado, calendario):
+    """
+    Partidos (local, visitante) en índices de un calendario {jornada:
+    [(local, visitante)]} con nombres, por orden de jornada: la orientación
+    final después de rupturas.optimizar_rupturas.
+    """
+    indice = {t.name: k for k, t in enumerate(estado.teams)}
+    return [(indice[a], indice[b]) for j in sorted(calendario) for a, b in calendario[j]]
 
 
 # ============================
 # HEURÍSTICAS IMPORTANTES
 # ============================
 
-def dificultad_equipo(eq):
+def dificultad_equipo(estado, i):
     """
     Cuanto más difícil es su distribución esperada,
     más pronto deben colocarse sus partidos.
@@ -26,51 +43,141 @@ def dificultad_equipo(eq):
     # Equipos con rivales muy variados son más fáciles.
     # Equipos con rivales muy homogéneos son más difíciles.
     # Vamos a medirlo por dispersión de países.
-    paises = {}
-    for idx, team in enumerate(teams):
-        if team.name == eq:
-            for r in adj[idx]:
-                paises[teams[r].country] = paises.get(teams[r].country, 0) + 1
-
+    teams = estado.teams
+    paises = {teams[r].country for r in estado.adj[i]}
     return -len(paises)   # menos países → más difícil (valor mayor)
 
 
-def ordenar_partidos(partidos):
+def dificultades(estado):
+    """dificultad_equipo de todos los equipos, calculada una sola vez."""
+    return [dificultad_equipo(estado, i) for i in range(estado.n)]
+
+
+def ordenar_partidos(estado, partidos, dificultad=None):
     """
     Ordenación MRV: los partidos más difíciles primero.
+    dificultad es la lista de dificultades() si ya se tiene calculada.
     """
-    score = {}
-
-    for A, B in partidos:
-        sA = dificultad_equipo(A)
-        sB = dificultad_equipo(B)
-        score[(A, B)] = sA + sB
+    if dificultad is None:
+        dificultad = dificultades(estado)
 
     # Orden descendente: más difíciles primero
-    return sorted(partidos, key=lambda x: score[x], reverse=True)
+    return sorted(partidos, key=lambda p: dificultad[p[0]] + dificultad[p[1]], reverse=True)
 
 
 # ============================
-# BACKTRACKING 4/4 PERFECTO
+# ORIENTACIÓN EULERIANA 4/4
 # ============================
 
-def asignar_local_visitante(partidos_raw):
+def orientar_euler(n, aristas, rng=random):
     """
-    Backtracking inteligente para asignar local/visitante sin romper 4/4.
+    Orienta las aristas (a, b) de un grafo con todos los grados pares de
+    forma que cada vértice tenga tantas salidas como entradas.
+
+    Algoritmo de Hierholzer: se recorre el grafo por caminos cerrados y cada
+    arista se orienta en el sentido en que se recorre. Todo camino cerrado
+    entra y sale de cada vértice el mismo número de veces, así que el
+    resultado queda equilibrado. Tiempo lineal en el número de aristas.
+
+    rng baraja el orden de las aristas de cada vértice y de los vértices de
+    partida, y da una orientación distinta (pero reproducible) para cada
+    semilla. Devuelve la lista de pares (origen, destino).
+    """
+    incidentes = [[] for _ in range(n)]
+    for k, (a, b) in enumerate(aristas):
+        incidentes[a].append(k)
+        incidentes[b].append(k)
+    for inc in incidentes:
+        rng.shuffle(inc)
+
+    usada = [False] * len(aristas)
+    siguiente = [0] * n
+    orientadas = []
+
+    inicios = list(range(n))
+    rng.shuffle(inicios)
+    for s in inicios:
+        pila = [s]
+        while pila:
+            v = pila[-1]
+            inc = siguiente[v]
+            while inc < len(incidentes[v]) and usada[incidentes[v][inc]]:
+                inc += 1
+            siguiente[v] = inc
+            if inc == len(incidentes[v]):
+                pila.pop()
+                continue
+            k = incidentes[v][inc]
+            usada[k] = True
+            a, b = aristas[k]
+            w = b if a == v else a
+            orientadas.append((v, w))
+            pila.append(w)
+
+    return orientadas
+
+
+def asignar_local_visitante(estado, partidos_raw, rng=random, estricto=False):
+    """
+    Asigna local/visitante con la orientación euleriana: como todos los
+    equipos tienen formato.partidos (par) rivales, cada uno juega exactamente la
+    mitad en casa y la mitad fuera, sin reintentos. Devuelve pares de
+    índices (local, visitante).
+
+    Con estricto=True se orienta por separado el subgrafo de cada par de
+    bombos (cada equipo tiene ahí formato.por_bombo rivales), de modo que
+    contra los rivales de cada bombo juega la mitad en casa y la mitad
+    fuera: en la Champions, un partido en casa y otro fuera por bombo, como
+    en la UEFA. Solo es posible si por_bombo es par (no en la Conference).
+    """
+    teams = estado.teams
+    aristas = list(partidos_raw)
+
+    if estricto:
+        if estado.formato.por_bombo % 2:
+            raise ValueError(
+                f"Formato {estado.formato.nombre}: con {estado.formato.por_bombo} rival(es) "
+                "por bombo no hay reparto casa / fuera por bombo"
+            )
+        grupos = {}
+        for a, b in aristas:
+            clave = tuple(sorted((teams[a].pot, teams[b].pot)))
+            grupos.setdefault(clave, []).append((a, b))
+        orientadas = []
+        for clave in sorted(grupos):
+            orientadas += orientar_euler(len(teams), grupos[clave], rng)
+    else:
+        orientadas = orientar_euler(len(teams), aristas, rng)
+
+    return orientadas
+
+
+# ============================
+# BACKTRACKING 4/4 (ANTERIOR)
+# ============================
+
+def asignar_local_visitante_backtracking(estado, partidos_raw):
+    """
+    Backtracking inteligente para asignar local/visitante sin romper el
+    reparto casa / fuera (4/4 en la Champions).
     Se reinicia automáticamente si un orden no es bueno.
+    (Versión anterior a la orientación euleriana; su tiempo no está acotado.)
     """
 
+    dificultad = dificultades(estado)
+    equipos = range(estado.n)
+    casa = estado.formato.casa
+
     intentos = 0
     while True:
         intentos += 1
 
         # Copia y ordenación inteligente
-        partidos = ordenar_partidos(partidos_raw.copy())
+        partidos = ordenar_partidos(estado, partidos_raw.copy(), dificultad)
         random.shuffle(partidos[:12])   # Pequeña aleatoriedad controlada
 
-        equipos = [t.name for t in teams]
-        home = {t: 0 for t in equipos}
-        away = {t: 0 for t in equipos}
+        home = [0] * estado.n
+        away = [0] * estado.n
         resultado = []
 
         LIMITE_RECURSION = 6000
@@ -79,11 +186,11 @@ def asignar_local_visitante(partidos_raw):
         def es_posible(home, away, pending):
             for eq in equipos:
                 h, a = home[eq], away[eq]
-                if h > 4 or a > 4:
+                if h > casa or a > casa:
                     return False
-                if h + pending < 4:
+                if h + pending < casa:
                     return False
-                if a + pending < 4:
+                if a + pending < casa:
                     return False
             return True
 
@@ -102,7 +209,7 @@ def asignar_local_visitante(partidos_raw):
             random.shuffle(opciones)
 
             for local, visitante in opciones:
-                if home[local] >= 4 or away[visitante] >= 4:
+                if home[local] >= casa or away[visitante] >= casa:
                     continue
 
                 # asignar
@@ -132,47 +239,48 @@ def asignar_local_visitante(partidos_raw):
 # PRINT
 # ============================
 
-def print_partidos_bonitos(partidos):
-    print("\n==============================")
-    print("     LISTA FINAL DE PARTIDOS")
-    print("==============================\n")
+def print_partidos_bonitos(estado, partidos, file=None):
+    print("\n==============================", file=file)
+    print("     LISTA FINAL DE PARTIDOS", file=file)
+    print("==============================\n", file=file)
 
-    for local, visitante in partidos:
-        print(f"{local:22s} (LOCAL)  vs  {visitante}")
+    for local, visitante in nombres_partidos(estado, partidos):
+        print(f"{local:22s} (LOCAL)  vs  {visitante}", file=file)
 
-    print("\nTOTAL PARTIDOS:", len(partidos))
+    print("\nTOTAL PARTIDOS:", len(partidos), file=file)
 
 
-def print_partidos_por_equipo_ordenados(partidos_finales):
+def print_partidos_por_equipo_ordenados(estado, partidos_finales, file=None):
     """
-    Para cada equipo imprime sus 8 partidos en formato:
+    Para cada equipo imprime sus partidos (8 en la Champions) en formato:
     EquipoA - EquipoB   (LOCAL EquipoA)
     EquipoA - EquipoB   (LOCAL EquipoB)
 
     Mucho más claro para el profesor.
     """
+    teams = estado.teams
 
-    # Diccionario: equipo -> lista de partidos [(local, visitante)]
-    mapa = {t.name: [] for t in teams}
+    # Lista por equipo: mapa[i] = partidos [(local, visitante)] de i
+    mapa = [[] for _ in teams]
 
     for local, visitante in partidos_finales:
         # Añadir partido a ambos equipos
         mapa[local].append((local, visitante))
         mapa[visitante].append((local, visitante))
 
-    print("\n====================================")
-    print("    PARTIDOS POR EQUIPO (FORMATO LIMPIO)")
-    print("====================================\n")
+    print("\n====================================", file=file)
+    print("    PARTIDOS POR EQUIPO (FORMATO LIMPIO)", file=file)
+    print("====================================\n", file=file)
 
     # Orden alfabético de equipos
-    for equipo in sorted(mapa.keys()):
-        print(f"────────── {equipo} ──────────")
+    for i in sorted(range(len(teams)), key=lambda k: teams[k].name):
+        print(f"────────── {teams[i].name} ──────────", file=file)
 
         # Ordenar sus 8 rivales alfabéticamente
-        partidos = sorted(mapa[equipo], key=lambda x: (x[0], x[1]))
+        partidos = sorted(nombres_partidos(estado, mapa[i]))
 
         for local, visitante in partidos:
             # Formato: A - B (LOCAL A o LOCAL B)
-            print(f"{local}  -  {visitante}   (LOCAL {local})")
+            print(f"{local}  -  {visitante}   (LOCAL {local})", file=file)
 
-        print()
+        print(file=file)
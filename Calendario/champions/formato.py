@@ -0,0 +1,138 @@
+"""
+Formato de la fase liga: cuántos bombos, de qué tamaño, cuántos rivales
+de cada bombo y las reglas de países. Todo lo demás se deduce de aquí:
+
+    partidos      rivales de cada equipo (n_bombos * por_bombo)
+    n_equipos     n_bombos * tam_bombo
+    n_aristas     emparejamientos del sorteo (n_equipos * partidos / 2)
+    n_jornadas    una jornada por partido
+    casa          partidos en casa (y fuera) de cada equipo
+
+La Champions se define con las constantes de config.py; Europa League y
+Conference League son los formatos de 2024-25 en adelante. Cada temporada
+(temporada.py) dice su formato y cada DrawState lleva el suyo, así que en
+un mismo proceso se pueden resolver sorteos de formatos distintos.
+
+Las ligas sintéticas (formato_sintetico, temporada.temporada_sintetica)
+sirven para medir cómo escala el solver con el número de equipos
+(escalado.py).
+"""
+
+from config import N_BOMBOS, N_MATCHES, PER_POT, MAX_SAME_COUNTRY, MAX_RIVALS_PER_COUNTRY
+
+# Días en que se reparte cada jornada (league_calendar.asignar_dias)
+DIAS_POR_JORNADA = 3
+
+
+class Formato:
+    """Descripción de un formato de liga (no se modifica una vez creado)."""
+
+    __slots__ = (
+        "nombre", "n_bombos", "tam_bombo", "por_bombo",
+        "max_mismo_pais", "max_por_pais", "dias_por_jornada",
+    )
+
+    def __init__(
+        self,
+        nombre: str,
+        n_bombos: int,
+        tam_bombo: int,
+        por_bombo: int,
+        max_mismo_pais=None,
+        max_por_pais: int = MAX_RIVALS_PER_COUNTRY,
+        dias_por_jornada: int = DIAS_POR_JORNADA,
+    ):
+        self.nombre = nombre
+        self.n_bombos = n_bombos
+        self.tam_bombo = tam_bombo
+        self.por_bombo = por_bombo
+        self.max_mismo_pais = dict(max_mismo_pais or {"default": 0})
+        self.max_por_pais = max_por_pais
+        self.dias_por_jornada = dias_por_jornada
+
+        if por_bombo >= tam_bombo:
+            raise ValueError(f"Formato {nombre}: {por_bombo} rivales por bombo con bombos de {tam_bombo}")
+        if (tam_bombo * por_bombo) % 2:
+            # Dentro de un bombo los rivales forman un grafo por_bombo-regular
+            raise ValueError(f"Formato {nombre}: bombos de {tam_bombo} con {por_bombo} rivales internos")
+        if self.partidos % 2:
+            raise ValueError(f"Formato {nombre}: {self.partidos} partidos no se reparten en casa / fuera")
+
+    @property
+    def partidos(self) -> int:
+        return self.n_bombos * self.por_bombo
+
+    @property
+    def n_equipos(self) -> int:
+        return self.n_bombos * self.tam_bombo
+
+    @property
+    def n_aristas(self) -> int:
+        return self.n_equipos * self.partidos // 2
+
+    @property
+    def n_jornadas(self) -> int:
+        return self.partidos
+
+    @property
+    def casa(self) -> int:
+        return self.partidos // 2
+
+    def limite_mismo_pais(self, pais: str) -> int:
+        return self.max_mismo_pais.get(pais, self.max_mismo_pais.get("default", 0))
+
+    def a_dict(self):
+        return {
+            "nombre": self.nombre,
+            "n_bombos": self.n_bombos,
+            "tam_bombo": self.tam_bombo,
+            "por_bombo": self.por_bombo,
+            "max_mismo_pais": dict(self.max_mismo_pais),
+            "max_por_pais": self.max_por_pais,
+            "dias_por_jornada": self.dias_por_jornada,
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, Formato) and self.a_dict() == other.a_dict()
+
+    def __hash__(self):
+        return hash((self.nombre, self.n_bombos, self.tam_bombo, self.por_bombo))
+
+    def __repr__(self) -> str:
+        return (
+            f"Formato({self.nombre!r}, {self.n_bombos} bombos de {self.tam_bombo}, "
+            f"{self.por_bombo} por bombo, {self.partidos} partidos)"
+        )
+
+
+CHAMPIONS = Formato("champions", N_BOMBOS, 9, PER_POT, MAX_SAME_COUNTRY, MAX_RIVALS_PER_COUNTRY)
+if CHAMPIONS.partidos != N_MATCHES:
+    raise ValueError(f"config: N_MATCHES = {N_MATCHES} no es N_BOMBOS * PER_POT")
+
+EUROPA = Formato("europa", 4, 9, 2)
+CONFERENCE = Formato("conference", 6, 6, 1)
+
+FORMATOS = {f.nombre: f for f in (CHAMPIONS, EUROPA, CONFERENCE)}
+
+
+def formato_sintetico(n_equipos: int, n_bombos: int = 4, por_bombo: int = 2) -> Formato:
+    """Liga de n_equipos en n_bombos bombos iguales (por defecto, 8 partidos como la Champions)."""
+    if n_equipos % n_bombos:
+        raise ValueError(f"{n_equipos} equipos no se reparten en {n_bombos} bombos iguales")
+    return Formato(f"sintetico-{n_equipos}", n_bombos, n_equipos // n_bombos, por_bombo)
+
+
+def obtener_formato(formato) -> Formato:
+    """
+    Formato a partir de un Formato, su nombre en FORMATOS, "sintetico-N"
+    (formato_sintetico(N)) o un diccionario (a_dict).
+    """
+    if isinstance(formato, Formato):
+        return formato
+    if isinstance(formato, str):
+        if formato.startswith("sintetico-") and formato[len("sintetico-"):].isdigit():
+            return formato_sintetico(int(formato[len("sintetico-"):]))
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconocido: {formato} (opciones: {', '.join(FORMATOS)})")
+        return FORMATOS[formato]
+    return Formato(**formato)
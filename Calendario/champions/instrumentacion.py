@@ -0,0 +1,194 @@
+"""
+Instrumentación del solver: dónde se va el tiempo y qué regla poda más.
+
+Apagada por defecto: search y compute_candidates solo comprueban
+`estado.instr is not None`. Para activarla basta con
+
+    estado.instr = Instrumentacion()
+
+y al terminar se puede exportar a JSON (guardar_json) o al formato
+"folded" de los flamegraphs (guardar_folded, una línea `pila valor` con
+microsegundos; se abre con flamegraph.pl o speedscope).
+
+Se recoge:
+    nodos[d] / backtracks[d]   por profundidad (nº de emparejamientos ya colocados)
+    rechazos[regla]            primera regla de compute_candidates que descarta
+                               a cada equipo (ver REGLAS)
+    ramificacion[k]            nº de nodos en que la MRV eligió un equipo con k candidatos
+    t_candidatos / t_ordenar   tiempo generando candidatos (MRV) y ordenándolos
+
+La clasificación de rechazos se hace con las máscaras de estado.bits, así
+que vale para los dos backends; su propio coste se descuenta del tiempo de
+candidatos.
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import Counter
+
+# Reglas en el mismo orden en que las aplica compute_candidates_sets
+REGLAS = ("rival", "completo", "mismo_pais", "tope_bombo", "tope_pais", "forward")
+
+# Tamaño de los tramos de profundidad en el flamegraph
+TRAMO = 16
+
+
+class Instrumentacion:
+    """Contadores de una búsqueda instrumentada."""
+
+    def __init__(self):
+        self.nodos = Counter()
+        self.backtracks = Counter()
+        self.rechazos = Counter()
+        self.ramificacion = Counter()
+        self.t_candidatos = 0.0
+        self.t_ordenar = 0.0
+        self.t_clasificar = 0.0
+        # Tiempo por tramo de profundidad: {(tramo, fase): segundos}
+        self.t_tramo = Counter()
+        self.t0 = time.perf_counter()
+
+    # ------------------------------------------------------------
+    # Ganchos (llamados desde solver.search y constraints.compute_candidates)
+    # ------------------------------------------------------------
+
+    def nodo(self, d: int) -> None:
+        self.nodos[d] += 1
+
+    def backtrack(self, d: int) -> None:
+        self.backtracks[d] += 1
+
+    def candidatos(self, d: int, t_inicio: float, t_fin: float, k: int) -> None:
+        """Fin de la MRV de un nodo: k candidatos del equipo elegido."""
+        self.ramificacion[k] += 1
+        dt = t_fin - t_inicio
+        self.t_candidatos += dt
+        self.t_tramo[(d // TRAMO, "candidatos")] += dt
+
+    def ordenar(self, d: int, t_inicio: float, t_fin: float) -> None:
+        dt = t_fin - t_inicio
+        self.t_ordenar += dt
+        self.t_tramo[(d // TRAMO, "ordenar")] += dt
+
+    def clasificar(self, estado, i: int) -> None:
+        """Cuenta, para cada equipo que no es candidato de i, la primera regla que lo descarta."""
+        t0 = time.perf_counter()
+        bits = estado.bits
+        resto = bits.all_mask & ~(1 << i)
+
+        # Si el propio i no pasa el forward checking, esa regla descarta a
+        # todos los que no haya descartado antes una de las anteriores
+        forward = ~bits.viable_mask if (bits.viable_mask >> i) & 1 else bits.all_mask
+        pot_i, country_i = bits.pot[i], bits.country[i]
+        filtros = (
+            ("rival", bits.rival_mask[i]),
+            ("completo", ~bits.open_mask),
+            ("mismo_pais", bits.same_country[i]),
+            ("tope_bombo", bits.pot_full[i] | bits.pot_sat[pot_i]),
+            ("tope_pais", bits.country_full[i] | bits.country_sat[country_i]),
+            ("forward", forward),
+        )
+        for regla, mask in filtros:
+            fuera = resto & mask
+            if fuera:
+                self.rechazos[regla] += fuera.bit_count()
+                resto &= ~fuera
+
+        self.t_clasificar += time.perf_counter() - t0
+
+    # ------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------
+
+    def a_dict(self) -> dict:
+        total = time.perf_counter() - self.t0
+        t_candidatos = max(self.t_candidatos - self.t_clasificar, 0.0)
+        return {
+            "nodos_total": sum(self.nodos.values()),
+            "backtracks_total": sum(self.backtracks.values()),
+            "nodos_por_profundidad": {str(d): n for d, n in sorted(self.nodos.items())},
+            "backtracks_por_profundidad": {str(d): n for d, n in sorted(self.backtracks.items())},
+            "rechazos": {r: self.rechazos[r] for r in REGLAS},
+            "ramificacion": {str(k): n for k, n in sorted(self.ramificacion.items())},
+            "segundos": {
+                "total": total,
+                "candidatos": t_candidatos,
+                "ordenar": self.t_ordenar,
+                "instrumentacion": self.t_clasificar,
+                "resto": max(total - t_candidatos - self.t_ordenar - self.t_clasificar, 0.0),
+            },
+        }
+
+    def guardar_json(self, ruta: str) -> None:
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(self.a_dict(), f, indent=2)
+
+    def folded(self):
+        """Líneas `search;tramo;fase microsegundos` para un flamegraph."""
+        lineas = []
+        escala = 1.0
+        if self.t_candidatos > 0:
+            # El tiempo de clasificar se reparte fuera de "candidatos"
+            escala = max(self.t_candidatos - self.t_clasificar, 0.0) / self.t_candidatos
+        for (tramo, fase), dt in sorted(self.t_tramo.items()):
+            if fase == "candidatos":
+                dt *= escala
+            desde = tramo * TRAMO
+            lineas.append(f"search;profundidad_{desde:03d}-{desde + TRAMO - 1:03d};{fase} {round(dt * 1e6)}")
+        seg = self.a_dict()["segundos"]
+        lineas.append(f"search;instrumentacion {round(seg['instrumentacion'] * 1e6)}")
+        lineas.append(f"search;resto {round(seg['resto'] * 1e6)}")
+        return lineas
+
+    def guardar_folded(self, ruta: str) -> None:
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.folded()) + "\n")
+
+    def resumen(self) -> str:
+        d = self.a_dict()
+        total_rech = sum(d["rechazos"].values()) or 1
+        reglas = ", ".join(f"{r} {100 * n / total_rech:.0f}%" for r, n in d["rechazos"].items())
+        seg = d["segundos"]
+        ramas = sum(k * n for k, n in self.ramificacion.items()) / max(sum(self.ramificacion.values()), 1)
+        return (
+            f"{d['nodos_total']} nodos, {d['backtracks_total']} backtracks | "
+            f"candidatos {seg['candidatos']:.3f} s, ordenar {seg['ordenar']:.3f} s, "
+            f"resto {seg['resto']:.3f} s | ramificación media {ramas:.1f}\n"
+            f"rechazos: {reglas}"
+        )
+
+
+def main():
+    import solver
+    from data import load_teams
+    from state import DrawState
+
+    parser = argparse.ArgumentParser(description="search instrumentado sobre unos bombos fijos")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--backend", default="bitset", choices=["sets", "bitset"])
+    parser.add_argument("--max-nodos", type=int, default=20_000)
+    parser.add_argument("--json", help="fichero JSON de salida")
+    parser.add_argument("--folded", help="fichero .folded para flamegraph")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    estado = DrawState(load_teams(), backend=args.backend)
+    estado.instr = Instrumentacion()
+    estado.max_calls = args.max_nodos
+    try:
+        found = solver.search(estado)
+    except solver.LimiteNodos:
+        found = None
+
+    print(f"Semilla {args.seed}: {found} | podas por simetría: {estado.podas_simetria}")
+    print(estado.instr.resumen())
+    if args.json:
+        estado.instr.guardar_json(args.json)
+    if args.folded:
+        estado.instr.guardar_folded(args.folded)
+
+
+if __name__ == "__main__":
+    main()
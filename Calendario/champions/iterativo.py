@@ -0,0 +1,235 @@
+"""
+Búsqueda iterativa y reanudable, con límite de nodos y de tiempo.
+
+search y search_dominios son recursivas (una llamada por emparejamiento:
+144 niveles con 36 equipos) y solo se pueden parar con una excepción que
+tira todo el trabajo hecho. Aquí el mismo backtracking se hace con una
+pila explícita de decisiones sobre el DomainStore, cuyo trail permite
+deshacer cada emparejamiento:
+
+    pila[d] = [equipo, iterador de candidatos (DomainStore.candidatos),
+               rival actual, firmas de los rivales que ya han fallado
+               (ruptura de simetrías)]
+
+Con los mismos parámetros explora exactamente el mismo árbol que
+search_dominios. Cuando se agota el presupuesto de nodos o llega la hora
+límite, ejecutar() devuelve None y la búsqueda queda suspendida: el estado
+conserva el sorteo parcial y una nueva llamada a ejecutar() sigue donde se
+quedó. Si se prefiere abandonar, abandonar() deja el estado como estaba.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+
+from constraints import bombos_viables
+from dominios import DomainStore
+
+# Cada cuántos nodos se mira el reloj y se avisa del progreso
+CADA_NODOS = 256
+
+
+@dataclass
+class Progreso:
+    """Foto de una búsqueda en curso."""
+
+    profundidad: int
+    nodos: int
+    backtracks: int
+    segundos: float
+
+
+class BusquedaIterativa:
+    """
+    Backtracking con pila explícita sobre un DomainStore. rng, por_bombo y
+    tabla (TablaTransposicion) significan lo mismo que en search_dominios.
+    progreso, si se da, se llama con un Progreso cada CADA_NODOS nodos.
+    """
+
+    def __init__(self, estado, rng=None, por_bombo: bool = False, tabla=None, progreso=None):
+        self.estado = estado
+        self.store = DomainStore(estado)
+        self.rng = rng
+        self.por_bombo = por_bombo
+        self.tabla = tabla
+        self.progreso = progreso
+
+        # Emparejamientos ya presentes al empezar (no se deshacen)
+        self.base = sum(estado.deg) // 2
+        self.pila = []
+
+        # Hay un nodo nuevo pendiente de expandir (la raíz al empezar)
+        self.expandir = True
+        # None mientras la búsqueda no termina; luego True / False
+        self.resultado = None
+
+        self.nodos = 0
+        self.backtracks = 0
+        self.segundos = 0.0
+
+    @property
+    def profundidad(self) -> int:
+        return len(self.pila)
+
+    def foto(self) -> Progreso:
+        return Progreso(len(self.pila), self.nodos, self.backtracks, self.segundos)
+
+    # ------------------------------------------------------------
+    # Nodos
+    # ------------------------------------------------------------
+
+    def _candidatos(self):
+        """Elige el equipo (o par equipo-bombo) por MRV y sus candidatos en orden; None si es rama muerta."""
+        store, rng = self.store, self.rng
+
+        if self.por_bombo:
+            slot = store.mrv_bombo(rng)
+            if slot is None:
+                return None
+            i, q = slot
+        else:
+            i, q = store.mrv(rng), None
+            if i is None:
+                return None
+        return i, iter(store.candidatos(i, q, rng))
+
+    def _expandir(self):
+        """Entra en el nodo actual. True = sorteo completo, False = rama muerta, None = se apila."""
+        estado = self.estado
+        estado.calls += 1
+        self.nodos += 1
+
+        if self.base + len(self.pila) == estado.E:
+            return all(d == estado.formato.partidos for d in estado.deg)
+
+        if self.tabla is not None and self.tabla.es_fallo(estado.hash):
+            return False
+
+        elegido = self._candidatos()
+        if elegido is None:
+            return False
+
+        i, candidatos = elegido
+        self.pila.append([i, candidatos, None, set() if self.estado.simetria else None])
+        return None
+
+    # ------------------------------------------------------------
+    # Bucle principal
+    # ------------------------------------------------------------
+
+    def ejecutar(self, max_nodos=None, limite_s=None) -> bool:
+        """
+        Avanza la búsqueda como mucho max_nodos nodos más y hasta limite_s
+        segundos más. Devuelve True / False si termina, o None si se
+        suspende (se puede volver a llamar para continuar).
+        """
+        if self.resultado is not None:
+            return self.resultado
+
+        store, pila = self.store, self.pila
+        tabla, progreso = self.tabla, self.progreso
+        estado = self.estado
+        clase, rivales = estado.clase, estado.bits.rival_mask
+        t0 = time.perf_counter()
+        fin = None if limite_s is None else t0 + limite_s
+        tope = None if max_nodos is None else self.nodos + max_nodos
+
+        try:
+            while True:
+                if self.expandir:
+                    if self.nodos % CADA_NODOS == 0 and self.nodos:
+                        ahora = time.perf_counter()
+                        if progreso is not None:
+                            self.segundos += ahora - t0
+                            t0 = ahora
+                            progreso(self.foto())
+                        if fin is not None and ahora >= fin:
+                            return None
+                    if tope is not None and self.nodos >= tope:
+                        return None
+
+                    self.expandir = False
+                    r = self._expandir()
+                    if r is True:
+                        self.resultado = True
+                        return True
+                    if r is False and not pila:
+                        self.resultado = False
+                        return False
+
+                # Siguiente candidato de la decisión en la cima de la pila
+                marco = pila[-1]
+                i, candidatos, actual, fallidos = marco
+                if actual is not None:
+                    store.remove_edge(i, actual)
+                    self.backtracks += 1
+                    if fallidos is not None:
+                        fallidos.add((clase[actual], rivales[actual]))
+
+                # Se saltan los rivales equivalentes a uno que ya ha fallado
+                # (el iterador se avanza ya con el estado de este nodo)
+                j = next(candidatos, None)
+                while fallidos and j is not None and (clase[j], rivales[j]) in fallidos:
+                    estado.podas_simetria += 1
+                    j = next(candidatos, None)
+
+                if j is not None:
+                    marco[2] = j
+                    store.add_edge(i, j)
+                    self.expandir = True
+                    continue
+
+                # Sin más candidatos: el estado vuelve a ser el de este nodo
+                pila.pop()
+                if tabla is not None:
+                    tabla.registrar_fallo(self.estado.hash)
+                if not pila:
+                    self.resultado = False
+                    return False
+        finally:
+            self.segundos += time.perf_counter() - t0
+
+    def abandonar(self) -> None:
+        """Deshace todos los emparejamientos de esta búsqueda."""
+        self.store.deshacer_todo()
+        self.pila.clear()
+        self.expandir = True
+        self.resultado = None
+
+
+# Estrategias que se prueban por orden en resolver_con_limites:
+# primero la determinista por bombos y luego órdenes aleatorios
+ESTRATEGIAS = [
+    {"por_bombo": True, "semilla": None},
+    {"por_bombo": True, "semilla": 1},
+    {"por_bombo": True, "semilla": 2},
+    {"por_bombo": False, "semilla": 3},
+]
+
+
+def resolver_con_limites(estado, max_nodos=2000, limite_s=None, estrategias=ESTRATEGIAS, progreso=None):
+    """
+    Resuelve el sorteo con límite de latencia: prueba cada estrategia con
+    max_nodos nodos y, si no termina, la abandona y pasa a la siguiente.
+    limite_s es el tiempo total para todas ellas.
+
+    Devuelve True / False, o None si ninguna termina a tiempo (el estado
+    queda entonces como estaba al empezar).
+    """
+    if not bombos_viables(estado.teams):
+        return False
+
+    fin = None if limite_s is None else time.perf_counter() + limite_s
+    for e in estrategias:
+        rng = None if e["semilla"] is None else random.Random(e["semilla"])
+        busqueda = BusquedaIterativa(estado, rng=rng, por_bombo=e["por_bombo"], progreso=progreso)
+
+        restante = None if fin is None else fin - time.perf_counter()
+        if restante is not None and restante <= 0:
+            break
+        r = busqueda.ejecutar(max_nodos, restante)
+        if r is not None:
+            return r
+        busqueda.abandonar()
+
+    return None
@@ -1,96 +1,271 @@
 import random
-from collections import defaultdict
+from functools import lru_cache
 
-N_JORNADAS = 8     # 8 bloques UEFA
-DIAS_POR_JORNADA = 3   # Cada jornada dura 3 días
-PARTIDOS_POR_DIA = 6   # 6 partidos por día → 18 por jornada (144 total)
+from formato import DIAS_POR_JORNADA  # Cada jornada dura 3 días
+from temporada import cargar_temporada
 
+INTENTOS_COLORACION = 200  # reinicios de colorear_jornadas antes de rendirse
 
-def generate_league_calendar(partidos, seed=None):
-    """
-    Versión INFALIBLE basada en el modelo UEFA real:
-    - 8 jornadas (bloques)
-    - cada jornada tiene 3 días diferentes
-    - un equipo no puede jugar dos veces el mismo día
-    - sí puede jugar dos días distintos dentro del mismo bloque UEFA (como en formato real)
+
+def colorear_jornadas(n, aristas, n_colores, rng=random, max_pasos=5000):
     """
-    if seed is not None:
-        random.seed(seed)
+    Reparte las aristas (a, b) de un grafo n_colores-regular en n_colores
+    emparejamientos perfectos (coloración de aristas). Devuelve la lista con
+    el color (0..n_colores-1) de cada arista, o None si no lo consigue en
+    max_pasos pasos.
 
-    # Equipos
-    equipos = set()
-    for a, b in partidos:
-        equipos.add(a)
-        equipos.add(b)
-    equipos = sorted(equipos)
+    Se colorea arista a arista. Si u y v tienen un color libre común se usa;
+    si no, con a libre en u y b libre en v se intercambian a y b en la
+    cadena de Kempe (camino alternado a/b) que sale de v, y entonces a queda
+    libre en los dos. Si todas las cadenas acaban en u, se hace al azar una
+    de estas dos cosas:
 
-    # Crear estructura: jornada → día → lista de partidos
-    calendario = {
-        j: {d: [] for d in range(1, DIAS_POR_JORNADA + 1)}
-        for j in range(1, N_JORNADAS + 1)
-    }
+        - intercambiar otra cadena de Kempe (a, c) que sale de u (o de v),
+          con lo que cambia su color libre, y devolver (u, v) a la cola;
+        - quitarle a v (o a u) la arista de un color a libre en el otro
+          extremo, colorear (u, v) con a y devolver a la cola la arista
+          desplazada.
+    """
+    LIBRE = -1
+    en = [[LIBRE] * n_colores for _ in range(n)]  # en[v][c] = arista de color c en v
+    color = [LIBRE] * len(aristas)
 
-    equipos_dia = {
-        j: {d: set() for d in range(1, DIAS_POR_JORNADA + 1)}
-        for j in range(1, N_JORNADAS + 1)
-    }
+    def otro(k, v):
+        a, b = aristas[k]
+        return b if a == v else a
 
-    partidos = list(partidos)
-    random.shuffle(partidos)
+    def poner(k, c):
+        a, b = aristas[k]
+        color[k] = c
+        en[a][c] = k
+        en[b][c] = k
 
-    j = 1
-    d = 1
+    def quitar(k):
+        a, b = aristas[k]
+        c = color[k]
+        en[a][c] = LIBRE
+        en[b][c] = LIBRE
+        color[k] = LIBRE
 
-    for a, b in partidos:
-        colocado = False
+    def cadena(v, a, b):
+        """Aristas del camino alternado a, b, a, ... que sale de v."""
+        camino = []
+        c = a
+        while en[v][c] != LIBRE:
+            k = en[v][c]
+            camino.append(k)
+            v = otro(k, v)
+            c = b if c == a else a
+        return camino, v
 
-        # Intentar colocar en algún día de alguna jornada
-        for jj in range(1, N_JORNADAS + 1):
-            for dd in range(1, DIAS_POR_JORNADA + 1):
+    cola = list(range(len(aristas)))
+    rng.shuffle(cola)
+    pasos = 0
 
-                if len(calendario[jj][dd]) >= PARTIDOS_POR_DIA:
-                    continue
-                if a in equipos_dia[jj][dd] or b in equipos_dia[jj][dd]:
-                    continue
+    while cola:
+        pasos += 1
+        if pasos > max_pasos:
+            return None
 
-                # Colocar
-                calendario[jj][dd].append((a, b))
-                equipos_dia[jj][dd].add(a)
-                equipos_dia[jj][dd].add(b)
+        k = cola.pop()
+        u, v = aristas[k]
+        libres_u = [c for c in range(n_colores) if en[u][c] == LIBRE]
+        libres_v = [c for c in range(n_colores) if en[v][c] == LIBRE]
 
-                colocado = True
+        comunes = [c for c in libres_u if en[v][c] == LIBRE]
+        if comunes:
+            poner(k, rng.choice(comunes))
+            continue
+
+        rng.shuffle(libres_u)
+        rng.shuffle(libres_v)
+        hecho = False
+        for a in libres_u:
+            for b in libres_v:
+                camino, fin = cadena(v, a, b)
+                if fin == u:
+                    continue
+                # Intercambio a <-> b en la cadena: a queda libre en v
+                cambios = [(e, b if color[e] == a else a) for e in camino]
+                for e, _ in cambios:
+                    quitar(e)
+                for e, c in cambios:
+                    poner(e, c)
+                poner(k, a)
+                hecho = True
                 break
-            if colocado:
+            if hecho:
                 break
 
-        if not colocado:
-            raise RuntimeError("Algo muy extraño ocurrió — esta versión no debería fallar nunca.")
+        if not hecho:
+            x, y = (u, v) if rng.random() < 0.5 else (v, u)
+            libres_x = libres_u if x == u else libres_v
+            a = rng.choice(libres_x)
+            if rng.random() < 0.5:
+                # Cadena de Kempe (a, c) desde x: cambia el color libre de x
+                c = rng.choice([c for c in range(n_colores) if c != a and en[x][c] != LIBRE])
+                camino, _ = cadena(x, c, a)
+                cambios = [(e, a if color[e] == c else c) for e in camino]
+                for e, _ in cambios:
+                    quitar(e)
+                for e, nuevo in cambios:
+                    poner(e, nuevo)
+                cola.append(k)
+            else:
+                # Se le quita a y la arista del color a y se coloca (u, v) con él
+                desplazada = en[y][a]
+                quitar(desplazada)
+                poner(k, a)
+                cola.append(desplazada)
+            # Se baraja un poco para no repetir siempre el mismo ciclo
+            j = rng.randrange(len(cola))
+            cola[j], cola[-1] = cola[-1], cola[j]
+
+    return color
 
-    # Simplificar salida: convertir días en lista lineal por jornada
-    salida = {}
-    for jj in calendario:
-        salida[jj] = []
-        for dd in calendario[jj]:
-            for a, b in calendario[jj][dd]:
-                # random home/away
-                if random.random() < 0.5:
-                    salida[jj].append((a, b))
-                else:
-                    salida[jj].append((b, a))
 
+def generate_league_calendar(partidos, seed=None, n_jornadas=None):
+    """
+    Calendario de n_jornadas jornadas en las que cada equipo juega
+    exactamente un partido: una 1-factorización del grafo de partidos
+    (colorear_jornadas). Respeta la orientación (local, visitante) de los
+    partidos recibidos. Los equipos pueden ser nombres o índices.
+    n_jornadas es por defecto el número de partidos de cada equipo (8 en
+    la Champions).
+
+    Devuelve {jornada: [(local, visitante), ...]} con jornadas 1..n_jornadas.
+    """
+    rng = random.Random(seed)
+
+    equipos = sorted({e for p in partidos for e in p})
+    indice = {e: k for k, e in enumerate(equipos)}
+    aristas = [(indice[a], indice[b]) for a, b in partidos]
+    if n_jornadas is None:
+        n_jornadas = 2 * len(aristas) // max(len(equipos), 1)
+
+    for _ in range(INTENTOS_COLORACION):
+        color = colorear_jornadas(len(equipos), aristas, n_jornadas, rng)
+        if color is not None:
+            break
+    else:
+        raise RuntimeError("No se ha podido repartir los partidos en jornadas.")
+
+    calendario = {j: [] for j in range(1, n_jornadas + 1)}
+    for (local, visitante), c in zip(partidos, color):
+        calendario[c + 1].append((local, visitante))
+    return calendario
+
+
+@lru_cache(maxsize=64)
+def indice_choques(equipos, temporada):
+    """
+    choques[k] = máscara de los equipos de la tupla equipos (nombres) que
+    comparten ciudad con equipos[k] (sin incluirlo), según las ciudades de
+    temporada. Se calcula una vez por lista y temporada. ValueError si algún
+    equipo no está en la temporada.
+    """
+    desconocidos = [e for e in equipos if e not in temporada.indice]
+    if desconocidos:
+        raise ValueError(f"Equipos que no están en la temporada {temporada.nombre}: {desconocidos}")
+    team_city = temporada.ciudad
+    por_ciudad = {}
+    for k, e in enumerate(equipos):
+        ciudad = team_city.get(e)
+        if ciudad is not None:
+            por_ciudad[ciudad] = por_ciudad.get(ciudad, 0) | (1 << k)
+    return [
+        por_ciudad.get(team_city.get(e), 0) & ~(1 << k)
+        for k, e in enumerate(equipos)
+    ]
+
+
+def _repartir_jornada(partidos, choques, rng, n_dias=DIAS_POR_JORNADA):
+    """
+    Reparte los partidos (índices de local, visitante) de una jornada en
+    n_dias días con la misma carga (repartidos a partes iguales: 6 por día
+    en la Champions) sin dos locales de la misma ciudad en un mismo día.
+    Devuelve el día (0..) de cada partido o None.
+    """
+    cupo = -(-len(partidos) // n_dias)
+
+    # Primero los partidos con choque posible, luego el resto
+    orden = list(range(len(partidos)))
+    rng.shuffle(orden)
+    orden.sort(key=lambda m: choques[partidos[m][0]] == 0)
+
+    locales = [0] * n_dias
+    carga = [0] * n_dias
+    dia = [None] * len(partidos)
+
+    def rec(k):
+        if k == len(orden):
+            return True
+        m = orden[k]
+        local = partidos[m][0]
+        if not choques[local]:
+            # Sin choques posibles: el día menos cargado
+            d = min(range(n_dias), key=lambda x: carga[x])
+            if carga[d] >= cupo:
+                return False
+            dia[m] = d
+            carga[d] += 1
+            if rec(k + 1):
+                return True
+            carga[d] -= 1
+            return False
+
+        for d in sorted(range(n_dias), key=lambda x: carga[x]):
+            if carga[d] >= cupo or locales[d] & choques[local]:
+                continue
+            dia[m] = d
+            carga[d] += 1
+            locales[d] |= 1 << local
+            if rec(k + 1):
+                return True
+            carga[d] -= 1
+            locales[d] &= ~(1 << local)
+        return False
+
+    return dia if rec(0) else None
+
+
+def asignar_dias(calendario, seed=None, dias_por_jornada=DIAS_POR_JORNADA, temporada=None):
+    """
+    Reparte cada jornada del calendario (con nombres de equipo) en
+    dias_por_jornada días (el formato.dias_por_jornada de la temporada), con
+    la misma cantidad de partidos cada día y sin dos equipos de la misma
+    ciudad de temporada (por defecto la activa, ver temporada.py) jugando
+    en casa el mismo día.
+
+    Devuelve {jornada: {dia: [(local, visitante), ...]}} con días 1..dias_por_jornada.
+    """
+    rng = random.Random(seed)
+    equipos = tuple(sorted({e for ps in calendario.values() for p in ps for e in p}))
+    indice = {e: k for k, e in enumerate(equipos)}
+    choques = indice_choques(equipos, temporada or cargar_temporada())
+
+    salida = {}
+    for j, ps in calendario.items():
+        partidos = [(indice[a], indice[b]) for a, b in ps]
+        dia = _repartir_jornada(partidos, choques, rng, dias_por_jornada)
+        if dia is None:
+            raise RuntimeError(f"No se pueden repartir los partidos de la jornada {j} sin choques de ciudad.")
+        salida[j] = {d: [] for d in range(1, dias_por_jornada + 1)}
+        for p, d in zip(ps, dia):
+            salida[j][d + 1].append(p)
     return salida
 
 
-def print_calendar(calendario):
-    print("\n==============================")
-    print("   CALENDARIO UEFA — BLOQUES")
-    print("==============================\n")
+def print_calendar(calendario, file=None):
+    print("\n==============================", file=file)
+    print("   CALENDARIO UEFA — BLOQUES", file=file)
+    print("==============================\n", file=file)
 
     total = 0
     for j in sorted(calendario.keys()):
-        print(f"\n----- Jornada {j} -----")
+        print(f"\n----- Jornada {j} -----", file=file)
         for (local, visitante) in calendario[j]:
-            print(f"{local:22s} vs {visitante:22s}")
+            print(f"{local:22s} vs {visitante:22s}", file=file)
             total += 1
 
-    print("\nTOTAL PARTIDOS:", total)
+    print("\nTOTAL PARTIDOS:", total, file=file)
@@ -1,158 +1,227 @@
 """Punto de entrada: ejecuta el sorteo y muestra el resultado por pantalla."""
 
-from solver import search, calls
-from state import teams, adj, deg, pot_count
-from config import N_MATCHES, PER_POT, MAX_SAME_COUNTRY, MAX_RIVALS_PER_COUNTRY
-from data import generar_bombos_aleatorios  # (no se usa directamente, pero lo dejamos)
-from fixtures import (
-    generar_partidos_unicos,
-    asignar_local_visitante,
-    print_partidos_bonitos,
-    print_partidos_por_equipo_ordenados,
-)
-from league_calendar import generate_league_calendar, print_calendar
-from verificador_partidos import verificar_partidos
-from verificar_calendario import verificar_calendario as verificar_calendario_bloques
-
-
-def mostrar_bombos():
-    print("\n==============================")
-    print("       BOMBOS GENERADOS")
-    print("==============================")
+import sys
+
+from solver import resolver
+from state import nuevo_sorteo
+from salida import FORMATOS, Salida, diagnostico
+
+
+def mostrar_bombos(estado, file=None):
+    print("\n==============================", file=file)
+    print("       BOMBOS GENERADOS", file=file)
+    print("==============================", file=file)
 
     # reconstruir los bombos a partir del atributo pot
-    bombos = {1: [], 2: [], 3: [], 4: []}
-    for t in teams:
+    n_bombos = estado.formato.n_bombos
+    bombos = {p: [] for p in range(1, n_bombos + 1)}
+    for t in estado.teams:
         bombos[t.pot].append(t.name)
 
-    for p in range(1, 5):
-        print(f"\nBOMBO {p}:")
+    for p in range(1, n_bombos + 1):
+        print(f"\nBOMBO {p}:", file=file)
         for eq in bombos[p]:
-            print(" -", eq)
+            print(" -", eq, file=file)
 
 
-def check_constraints() -> bool:
-    """Verifica que todos los equipos cumplen las restricciones básicas (8 rivales, 2 por bombo)."""
+def check_constraints(estado, file=None) -> bool:
+    """Verifica que todos los equipos cumplen las restricciones básicas (8 rivales, 2 por bombo en la Champions)."""
+    teams, deg, pot_count = estado.teams, estado.deg, estado.pot_count
+    formato = estado.formato
     ok = True
     for i, t in enumerate(teams):
-        if deg[i] != N_MATCHES:
-            print("❌ Grado incorrecto en", t.name, "->", deg[i])
+        if deg[i] != formato.partidos:
+            print("❌ Grado incorrecto en", t.name, "->", deg[i], file=file)
             ok = False
 
-        # Comprobar que tiene exactamente PER_POT rivales de cada bombo
-        for p in range(1, 5):
-            if pot_count[i][p] != PER_POT:
-                print(f"❌ Error bombo {p} en {t.name}: {pot_count[i][p]}")
+        # Comprobar que tiene exactamente por_bombo rivales de cada bombo
+        for p in range(1, formato.n_bombos + 1):
+            if pot_count[i][p] != formato.por_bombo:
+                print(f"❌ Error bombo {p} en {t.name}: {pot_count[i][p]}", file=file)
                 ok = False
 
     return ok
 
 
-def print_diagnostics():
-    print("\n==============================")
-    print("     DIAGNÓSTICO DETALLADO")
-    print("==============================\n")
+def print_diagnostics(estado, file=None):
+    print("\n==============================", file=file)
+    print("     DIAGNÓSTICO DETALLADO", file=file)
+    print("==============================\n", file=file)
 
-    for i, t in enumerate(teams):
-        name = t.name
-        pot = t.pot
-        country = t.country
+    teams, adj, formato = estado.teams, estado.adj, estado.formato
 
-        rivals_idx = adj[i]
-        rivals = sorted([teams[j].name for j in rivals_idx])
-        rival_countries = [teams[j].country for j in rivals_idx]
-        rival_pots = [teams[j].pot for j in rivals_idx]
+    # Contadores del estado (rivales por bombo y por país) en una pasada
+    for i, d in enumerate(diagnostico(estado)):
+        country = d["pais"]
+        rivals = sorted(teams[j].name for j in adj[i])
 
         # Límite del mismo país (si no hay caso especial, usa default)
-        country_limit = MAX_SAME_COUNTRY.get(country, MAX_SAME_COUNTRY["default"])
-
-        # Número de rivales del mismo país
-        same_country_count = sum(1 for c in rival_countries if c == country)
-
-        # Conteo por país
-        country_count_map = {}
-        for c in rival_countries:
-            country_count_map[c] = country_count_map.get(c, 0) + 1
-
-        # Máx. rivales de un mismo país extranjero
-        worst_country = None
-        max_foreign = 0
-        for c, cnt in country_count_map.items():
-            if c != country and cnt > max_foreign:
-                max_foreign = cnt
-                worst_country = c
-        ok_foreign = (max_foreign <= MAX_RIVALS_PER_COUNTRY) if worst_country else True
-
-        # Conteo por bombo
-        pot_count_map = {}
-        for p in rival_pots:
-            pot_count_map[p] = pot_count_map.get(p, 0) + 1
-
-        # Comprobaciones
+        country_limit = formato.limite_mismo_pais(country)
+        same_country_count = d["mismo_pais"]
+        max_foreign, worst_country = d["max_extranjero"], d["pais_max"]
+        pot_count_map = {p: k for p, k in enumerate(d["por_bombo"], start=1) if k}
+
         ok_same_country = same_country_count <= country_limit
-        ok_by_pot = all(pot_count_map.get(p, 0) == PER_POT for p in range(1, 5))
-        ok_deg = len(rivals) == N_MATCHES
+        ok_foreign = max_foreign <= formato.max_por_pais
+        ok_by_pot = all(k == formato.por_bombo for k in d["por_bombo"])
+        ok_deg = d["rivales"] == formato.partidos
 
-        print(f"🔵 {name} ({country}, B{pot})")
-        print(f"   Rivales ({len(rivals)}): {rivals}")
+        print(f"🔵 {d['equipo']} ({country}, B{d['bombo']})", file=file)
+        print(f"   Rivales ({len(rivals)}): {rivals}", file=file)
 
         print(
             f"   ➤ Rivales del mismo país: {same_country_count}/{country_limit} "
-            f"{'✔' if ok_same_country else '❌'}"
+            f"{'✔' if ok_same_country else '❌'}",
+            file=file,
         )
-        print(f"   ➤ Rivales por país: {country_count_map}")
+        print(f"   ➤ Rivales por país: {d['por_pais']}", file=file)
 
         if worst_country:
             print(
                 f"   ➤ Máx. rivales de un país extranjero: "
                 f"{max_foreign} de {worst_country} "
-                f"(límite {MAX_RIVALS_PER_COUNTRY}) "
-                f"{'✔' if ok_foreign else '❌'}"
+                f"(límite {formato.max_por_pais}) "
+                f"{'✔' if ok_foreign else '❌'}",
+                file=file,
             )
         else:
             print(
                 f"   ➤ Máx. rivales de un país extranjero: 0 "
-                f"(límite {MAX_RIVALS_PER_COUNTRY}) ✔"
+                f"(límite {formato.max_por_pais}) ✔",
+                file=file,
             )
 
-        print(f"   ➤ Rivales por bombo: {pot_count_map}")
-
-        print(f"   ➤ {N_MATCHES} rivales obligatorios: {'✔' if ok_deg else '❌'}")
-        print(f"   ➤ {PER_POT} por bombo: {'✔' if ok_by_pot else '❌'}")
-
-        print("----------------------------------------------------")
-
-
-def main():
-    print("Generando sorteo determinista con bombos aleatorios...")
-    mostrar_bombos()
-    found = search()
-    print("¿Solución encontrada?:", found, "| Llamadas recursivas:", calls)
+        print(f"   ➤ Rivales por bombo: {pot_count_map}", file=file)
+
+        print(f"   ➤ {formato.partidos} rivales obligatorios: {'✔' if ok_deg else '❌'}", file=file)
+        print(f"   ➤ {formato.por_bombo} por bombo: {'✔' if ok_by_pot else '❌'}", file=file)
+
+        print("----------------------------------------------------", file=file)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sorteo de la fase liga y su calendario")
+    parser.add_argument("--formato", choices=FORMATOS, default="texto")
+    parser.add_argument("--salida", help="fichero de salida (por defecto, la pantalla)")
+    parser.add_argument(
+        "--liga",
+        help="sorteo de una liga sintética de ese formato (europa, conference, sintetico-128...) "
+             "en lugar de la temporada activa",
+    )
+    args = parser.parse_args(argv)
+
+    temporada = None
+    if args.liga:
+        from temporada import temporada_sintetica
+
+        temporada = temporada_sintetica(args.liga)
+
+    destino = open(args.salida, "w", encoding="utf-8") if args.salida else None
+    try:
+        with Salida(args.formato, destino) as salida:
+            return ejecutar(salida, temporada)
+    finally:
+        if destino is not None:
+            destino.close()
+
+
+def ejecutar(salida, temporada=None) -> bool:
+    """El sorteo completo; el informe de texto solo se imprime en formato texto."""
+    texto = salida.texto
+    if temporada is None:
+        if texto:
+            print("Generando sorteo determinista con bombos aleatorios...", file=salida.out)
+        estado = nuevo_sorteo()
+        if texto:
+            mostrar_bombos(estado, file=salida.out)
+        found = resolver(estado)
+    else:
+        # Ligas sintéticas (hasta cientos de equipos): máscaras de bits y
+        # reinicios aleatorios con el límite de nodos de escalado.py
+        import random
+
+        from escalado import NODOS_POR_ARISTA, REINICIOS
+
+        if texto:
+            print(f"Generando sorteo de {temporada.nombre} con bombos aleatorios...", file=salida.out)
+        estado = nuevo_sorteo("bitset", temporada)
+        if texto:
+            mostrar_bombos(estado, file=salida.out)
+        found = resolver(
+            estado, max_nodos=NODOS_POR_ARISTA * estado.E, rng=random.Random(), reinicios=REINICIOS, por_bombo=True
+        )
+    if texto:
+        print("¿Solución encontrada?:", found, "| Llamadas recursivas:", estado.calls, file=salida.out)
 
     if not found:
-        print("❌ No se encontró solución.")
-        return
-
-    ok = check_constraints()
-    print("¿Restricciones básicas correctas?:", ok)
-    print_diagnostics()
+        if texto:
+            print("❌ No se encontró solución.", file=salida.out)
+        salida.resumen(ok=False, llamadas=estado.calls)
+        return False
+
+    # Partidos, calendario y verificadores solo se importan si hay sorteo
+    from fixtures import (
+        generar_partidos_unicos,
+        nombres_partidos,
+        partidos_del_calendario,
+        asignar_local_visitante,
+        print_partidos_bonitos,
+        print_partidos_por_equipo_ordenados,
+    )
+    from league_calendar import generate_league_calendar, asignar_dias, print_calendar
+    from rupturas import MAX_ITER, optimizar_rupturas, contar_rupturas
+    from verificador_partidos import verificar_partidos
+    from verificar_calendario import verificar_calendario as verificar_calendario_bloques
+    from verificar_calendario import verificar_choques_ciudad
+
+    if texto:
+        ok = check_constraints(estado, file=salida.out)
+        print("¿Restricciones básicas correctas?:", ok, file=salida.out)
+        print_diagnostics(estado, file=salida.out)
+    else:
+        ok = all(d["ok"] for d in diagnostico(estado))
+        salida.sorteo(estado)
 
     # Generar emparejamientos únicos
-    partidos_sin_orientar = generar_partidos_unicos()
+    partidos_sin_orientar = generar_partidos_unicos(estado)
 
-    # Asignar local/visitante (4 casa / 4 fuera)
-    partidos_finales = asignar_local_visitante(partidos_sin_orientar)
+    # Asignar local/visitante (mitad en casa / mitad fuera: 4/4 en la Champions)
+    partidos_orientados = asignar_local_visitante(estado, partidos_sin_orientar)
 
-    # Imprimir lista global + verificación de 4/4 e ida/vuelta
-    print_partidos_bonitos(partidos_finales)
-    verificar_partidos(partidos_finales)
-    print_partidos_por_equipo_ordenados(partidos_finales)
+    # Calendario: una jornada por partido, cada equipo juega una vez por jornada
+    calendario = generate_league_calendar(
+        nombres_partidos(estado, partidos_orientados), n_jornadas=estado.formato.n_jornadas
+    )
 
-    # OPCIONAL: generar calendario por jornadas/bloques UEFA
-    # calendario = generate_league_calendar(partidos_finales)
-    # print_calendar(calendario)
-    # verificar_calendario_bloques(calendario)
+    # Orden de jornadas y casa/fuera con las mínimas rupturas (invierte
+    # ciclos de partidos: la orientación final es la del calendario)
+    antes = contar_rupturas(calendario)
+    calendario = optimizar_rupturas(calendario, limite_s=None, max_iter=MAX_ITER)
+    despues = contar_rupturas(calendario)
+    partidos_finales = partidos_del_calendario(estado, calendario)
+
+    # Imprimir lista global + verificación de 4/4 e ida/vuelta
+    if texto:
+        print_partidos_bonitos(estado, partidos_finales, file=salida.out)
+        verificar_partidos(nombres_partidos(estado, partidos_finales), estado.formato.casa, file=salida.out)
+        print_partidos_por_equipo_ordenados(estado, partidos_finales, file=salida.out)
+        print(f"\nRupturas (total, tres seguidas, en los extremos): {antes} → {despues}", file=salida.out)
+        print_calendar(calendario, file=salida.out)
+        verificar_calendario_bloques(calendario, estado.formato, file=salida.out)
+
+        # Reparto de cada jornada en días sin choques de ciudad
+        verificar_choques_ciudad(
+            asignar_dias(calendario, dias_por_jornada=estado.formato.dias_por_jornada, temporada=temporada),
+            temporada,
+            file=salida.out,
+        )
+    else:
+        salida.partidos(estado, calendario)
+        salida.resumen(ok=ok, llamadas=estado.calls, rupturas=despues[0], tres_seguidas=despues[1])
+    return ok
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,230 @@
+"""
+Monte Carlo en paralelo: estadísticas de emparejamientos sobre N sorteos.
+
+Cada sorteo k usa la semilla `semilla + k` tanto para generar los bombos
+como para la búsqueda aleatoria del solver, así que el resultado no
+depende del número de procesos. Cada proceso acumula sus resultados en
+arrays de NumPy y solo devuelve al padre los arrays ya reducidos.
+
+Uso:
+    python montecarlo.py -n 100000 --procesos 8 --salida mc.npz
+    python montecarlo.py -n 2000 --pareja "Real Madrid" "Liverpool"
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from data import load_teams
+from solver import resolver
+from state import DrawState
+from temporada import cargar_temporada
+from validador_lotes import validar_lote
+
+# Histogramas de esfuerzo: cubetas en potencias de 2 (nodos) y en ms
+CUBETAS_NODOS = 2 ** np.arange(0, 25)
+CUBETAS_MS = 2.0 ** np.arange(-4, 15)
+
+# Límite de nodos por intento y reinicios del solver aleatorio
+MAX_NODOS = 1000
+REINICIOS = 50
+
+
+@dataclass
+class ResultadoMC:
+    """Arrays acumulados sobre todos los sorteos resueltos."""
+
+    # emparejamientos[a, b] = nº de sorteos en que a y b se enfrentan
+    emparejamientos: np.ndarray
+    # emparejamientos_bombo[p, a, b] = ídem, contando solo cuando a estaba en el bombo p + 1
+    emparejamientos_bombo: np.ndarray
+    # bombo_equipo[a, p] = nº de sorteos en que a cayó en el bombo p + 1
+    bombo_equipo: np.ndarray
+    # rivales_pais[a, c] = nº total de rivales del país lista_paises[c] de la temporada que tuvo a
+    rivales_pais: np.ndarray
+    # hist_nodos / hist_ms: esfuerzo del solver (ver CUBETAS_NODOS / CUBETAS_MS)
+    hist_nodos: np.ndarray
+    hist_ms: np.ndarray
+    resueltos: int
+    imposibles: int
+    agotados: int
+    # Sorteos resueltos que no pasan validador_lotes.validar_lote (debería ser 0)
+    invalidos: int
+
+    @classmethod
+    def vacio(cls):
+        # Índice canónico de cada equipo (orden del fichero de temporada) y de cada país
+        tabla = cargar_temporada()
+        n, n_bombos, n_paises = len(tabla), tabla.n_bombos, len(tabla.lista_paises)
+        return cls(
+            emparejamientos=np.zeros((n, n), dtype=np.int64),
+            emparejamientos_bombo=np.zeros((n_bombos, n, n), dtype=np.int64),
+            bombo_equipo=np.zeros((n, n_bombos), dtype=np.int64),
+            rivales_pais=np.zeros((n, n_paises), dtype=np.int64),
+            hist_nodos=np.zeros(len(CUBETAS_NODOS) + 1, dtype=np.int64),
+            hist_ms=np.zeros(len(CUBETAS_MS) + 1, dtype=np.int64),
+            resueltos=0,
+            imposibles=0,
+            agotados=0,
+            invalidos=0,
+        )
+
+    def sumar(self, otro) -> None:
+        """Acumula en self los arrays y contadores de otro resultado."""
+        self.emparejamientos += otro.emparejamientos
+        self.emparejamientos_bombo += otro.emparejamientos_bombo
+        self.bombo_equipo += otro.bombo_equipo
+        self.rivales_pais += otro.rivales_pais
+        self.hist_nodos += otro.hist_nodos
+        self.hist_ms += otro.hist_ms
+        self.resueltos += otro.resueltos
+        self.imposibles += otro.imposibles
+        self.agotados += otro.agotados
+        self.invalidos += otro.invalidos
+
+    def probabilidad(self, a: str, b: str) -> float:
+        """Frecuencia del emparejamiento a-b entre los sorteos resueltos."""
+        if not self.resueltos:
+            return 0.0
+        indice = cargar_temporada().indice
+        return self.emparejamientos[indice[a], indice[b]] / self.resueltos
+
+    def guardar(self, ruta: str) -> None:
+        tabla = cargar_temporada()
+        np.savez_compressed(
+            ruta,
+            equipos=np.array(tabla.nombres),
+            paises=np.array(tabla.lista_paises),
+            emparejamientos=self.emparejamientos,
+            emparejamientos_bombo=self.emparejamientos_bombo,
+            bombo_equipo=self.bombo_equipo,
+            rivales_pais=self.rivales_pais,
+            hist_nodos=self.hist_nodos,
+            hist_ms=self.hist_ms,
+            contadores=np.array([self.resueltos, self.imposibles, self.agotados, self.invalidos]),
+        )
+
+
+def acumular_sorteo(res: ResultadoMC, estado, lote=None) -> None:
+    """
+    Suma a res los emparejamientos de un estado ya resuelto. Si se pasa
+    lote = (adyacencia, bombo), fila ya elegida, copia ahí el sorteo en el
+    orden canónico para validarlo después con validar_lote.
+    """
+    teams = estado.teams
+    tabla = cargar_temporada()
+    canon = np.fromiter((tabla.indice[t.name] for t in teams), dtype=np.intp, count=len(teams))
+    pais = np.fromiter((tabla.indice_pais[t.country] for t in teams), dtype=np.intp, count=len(teams))
+    bombo = np.fromiter((t.pot - 1 for t in teams), dtype=np.intp, count=len(teams))
+
+    # Lista de aristas dirigidas (cada partido aparece en ambos sentidos)
+    a = np.fromiter((i for i, rivales in enumerate(estado.adj) for _ in rivales), dtype=np.intp)
+    b = np.fromiter((j for rivales in estado.adj for j in rivales), dtype=np.intp)
+
+    np.add.at(res.emparejamientos, (canon[a], canon[b]), 1)
+    np.add.at(res.emparejamientos_bombo, (bombo[a], canon[a], canon[b]), 1)
+    np.add.at(res.rivales_pais, (canon[a], pais[b]), 1)
+    res.bombo_equipo[canon, bombo] += 1
+
+    if lote is not None:
+        adyacencia, bombo_lote = lote
+        adyacencia[canon[a], canon[b]] = True
+        bombo_lote[canon] = bombo + 1
+
+
+def _simular_bloque(semillas, max_nodos=MAX_NODOS, reinicios=REINICIOS) -> ResultadoMC:
+    """Trabajo de un proceso: resuelve un bloque de semillas y acumula."""
+    res = ResultadoMC.vacio()
+    tabla = cargar_temporada()
+    n = len(tabla)
+    adyacencia = np.zeros((len(semillas), n, n), dtype=bool)
+    bombo = np.zeros((len(semillas), n), dtype=np.int32)
+
+    for seed in semillas:
+        rng = random.Random(seed)
+        estado = DrawState(load_teams(rng), backend="bitset")
+
+        t0 = time.perf_counter()
+        found = resolver(estado, max_nodos=max_nodos, rng=rng, reinicios=reinicios)
+        ms = (time.perf_counter() - t0) * 1000
+
+        res.hist_nodos[np.searchsorted(CUBETAS_NODOS, estado.calls)] += 1
+        res.hist_ms[np.searchsorted(CUBETAS_MS, ms)] += 1
+
+        if found is None:
+            res.agotados += 1
+            continue
+        if not found:
+            res.imposibles += 1
+            continue
+        fila = res.resueltos
+        res.resueltos += 1
+        acumular_sorteo(res, estado, (adyacencia[fila], bombo[fila]))
+
+    # Todo el bloque de una vez, sin un bucle de Python por sorteo
+    pais = np.fromiter((tabla.indice_pais[c] for c in tabla.paises), dtype=np.int32, count=n)
+    valido, _ = validar_lote(bombo[:res.resueltos], pais, adyacencia=adyacencia[:res.resueltos])
+    res.invalidos = int((~valido).sum())
+    return res
+
+
+def simular(n_sorteos: int, semilla: int = 0, procesos=None, bloque: int = 500) -> ResultadoMC:
+    """Lanza n_sorteos sorteos repartidos en bloques sobre un pool de procesos."""
+    semillas = range(semilla, semilla + n_sorteos)
+    bloques = [semillas[k:k + bloque] for k in range(0, n_sorteos, bloque)]
+
+    total = ResultadoMC.vacio()
+    if procesos == 1:
+        for b in bloques:
+            total.sumar(_simular_bloque(b))
+        return total
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for parcial in pool.map(_simular_bloque, bloques):
+            total.sumar(parcial)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo de emparejamientos de la fase liga")
+    parser.add_argument("-n", "--sorteos", type=int, default=1000)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--bloque", type=int, default=500)
+    parser.add_argument("--salida", help="fichero .npz donde guardar los arrays")
+    parser.add_argument("--pareja", nargs=2, metavar=("EQUIPO_A", "EQUIPO_B"))
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    res = simular(args.sorteos, args.semilla, args.procesos, args.bloque)
+    dt = time.perf_counter() - t0
+
+    print(f"Sorteos: {args.sorteos} en {dt:.1f} s ({args.sorteos / dt:.0f} sorteos/s)")
+    print(
+        f"  resueltos: {res.resueltos} | imposibles: {res.imposibles} | agotados: {res.agotados}"
+        f" | inválidos: {res.invalidos}"
+    )
+
+    if args.pareja:
+        a, b = args.pareja
+        print(f"P({a} vs {b}) = {res.probabilidad(a, b):.4f}")
+
+    # Emparejamientos más frecuentes
+    tri = np.triu(res.emparejamientos, k=1)
+    top = np.argsort(tri, axis=None)[::-1][:10]
+    print("\nEmparejamientos más frecuentes:")
+    nombres = cargar_temporada().nombres
+    for a, b in zip(*np.unravel_index(top, tri.shape)):
+        print(f"  {nombres[a]:22s} vs {nombres[b]:22s} {tri[a, b] / max(res.resueltos, 1):.4f}")
+
+    if args.salida:
+        res.guardar(args.salida)
+        print(f"\nResultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Suite de rendimiento reproducible con líneas base en JSON.
+
+Sobre un corpus fijo de bombos (semillas de benchmark.py, incluidas las
+difíciles) mide tres etapas:
+
+    search       solver.search (backend "bitset", mismo árbol que "sets")
+    orientacion  fixtures.asignar_local_visitante
+    calendario   league_calendar.generate_league_calendar
+
+y para cada caso guarda tiempo (la mediana del tiempo de CPU de varias
+repeticiones), nodos, backtracks y pico de memoria (tracemalloc, en una
+pasada aparte para no inflar los tiempos). Los backtracks se deducen de
+los nodos: cada llamada salvo la raíz entra tras un add_edge y los
+add_edge que no siguen en el estado final se deshicieron. Las semillas
+cuyos bombos no tienen sorteo válido quedan en orientacion y calendario
+como {"ok": false}, sin medidas.
+
+Uso:
+    python rendimiento.py --guardar base.json
+    python rendimiento.py --comparar base.json --umbral 0.2
+
+Con --comparar el proceso termina con código 1 si cambia ok o si nodos o
+backtracks, que son deterministas, empeoran más que el umbral. Tiempo y
+memoria dependen de la máquina y de su carga: se muestran como avisos
+(con su propio umbral, --umbral-tiempo, y solo si el tiempo empeora más
+de MARGEN_MS) pero no hacen fallar la comparación.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import solver
+from benchmark import SEMILLAS, SEMILLAS_DIFICILES
+from data import load_teams
+from fixtures import asignar_local_visitante, generar_partidos_unicos
+from league_calendar import generate_league_calendar
+from state import DrawState
+
+# Límite de nodos de search por caso (las semillas difíciles lo alcanzan)
+MAX_NODOS = 5_000
+
+# Repeticiones de cada medida de tiempo (se guarda la mediana)
+REPETICIONES = 5
+
+# Diferencia mínima de tiempo que se considera regresión
+MARGEN_MS = 2.0
+
+
+def _sorteo(seed: int):
+    """Estado resuelto con el solver aleatorio (para las etapas posteriores), o None."""
+    rng = random.Random(seed)
+    estado = DrawState(load_teams(rng), backend="bitset")
+    if not solver.resolver(estado, max_nodos=1000, rng=rng, reinicios=50, por_bombo=True):
+        return None
+    return estado
+
+
+def _caso_search(seed: int):
+    random.seed(seed)
+    estado = DrawState(load_teams(), backend="bitset")
+    estado.max_calls = MAX_NODOS
+    try:
+        found = solver.search(estado)
+    except solver.LimiteNodos:
+        found = None
+    nodos = estado.calls
+    return {
+        "ok": found,
+        "nodos": nodos,
+        "backtracks": nodos - 1 - sum(estado.deg) // 2,
+        "podas_simetria": estado.podas_simetria,
+    }
+
+
+def _caso_orientacion(seed: int):
+    estado = _sorteo(seed)
+    if estado is None:
+        return None
+    partidos = generar_partidos_unicos(estado)
+
+    def ejecutar():
+        asignar_local_visitante(estado, partidos, random.Random(seed))
+        return {"ok": True, "partidos": len(partidos)}
+
+    return ejecutar
+
+
+def _caso_calendario(seed: int):
+    estado = _sorteo(seed)
+    if estado is None:
+        return None
+    partidos = asignar_local_visitante(estado, generar_partidos_unicos(estado), random.Random(seed))
+
+    def ejecutar():
+        generate_league_calendar(partidos, seed)
+        return {"ok": True, "partidos": len(partidos)}
+
+    return ejecutar
+
+
+def _medir(funcion):
+    """(métricas de la última ejecución, mediana del tiempo de CPU en ms, pico de memoria en KiB)."""
+    tiempos = []
+    for _ in range(REPETICIONES):
+        t0 = time.process_time()
+        metricas = funcion()
+        tiempos.append((time.process_time() - t0) * 1000)
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return metricas, statistics.median(tiempos), pico / 1024
+
+
+def ejecutar_suite(semillas=None, semillas_dificiles=None):
+    """Ejecuta todos los casos y devuelve {caso: {métrica: valor}}."""
+    semillas = SEMILLAS if semillas is None else semillas
+    dificiles = SEMILLAS_DIFICILES if semillas_dificiles is None else semillas_dificiles
+
+    resultados = {}
+    for seed in semillas + dificiles:
+        metricas, ms, kib = _medir(lambda: _caso_search(seed))
+        resultados[f"search/{seed}"] = {**metricas, "ms": ms, "pico_kib": kib}
+
+    for seed in semillas:
+        for nombre, preparar in (("orientacion", _caso_orientacion), ("calendario", _caso_calendario)):
+            funcion = preparar(seed)
+            if funcion is None:
+                resultados[f"{nombre}/{seed}"] = {"ok": False}
+                continue
+            metricas, ms, kib = _medir(funcion)
+            resultados[f"{nombre}/{seed}"] = {**metricas, "ms": ms, "pico_kib": kib}
+
+    return resultados
+
+
+def comparar(base, actual, umbral: float, umbral_tiempo: float = 0.5):
+    """
+    (regresiones, avisos): listas de (caso, métrica, antes, ahora) con
+    umbrales relativos. Las regresiones son de las métricas deterministas
+    (ok, nodos, backtracks); los avisos, de tiempo y memoria.
+    """
+    regresiones, avisos = [], []
+    for caso, antes in base.items():
+        ahora = actual.get(caso)
+        if ahora is None:
+            continue
+        if antes.get("ok") is not None and ahora.get("ok") != antes["ok"]:
+            regresiones.append((caso, "ok", antes["ok"], ahora.get("ok")))
+        for metrica in ("nodos", "backtracks", "ms", "pico_kib"):
+            if metrica not in antes or metrica not in ahora:
+                continue
+            a, b = antes[metrica], ahora[metrica]
+            determinista = metrica in ("nodos", "backtracks")
+            if b <= a * (1 + (umbral if determinista else umbral_tiempo)):
+                continue
+            if metrica == "ms" and b - a < MARGEN_MS:
+                continue
+            (regresiones if determinista else avisos).append((caso, metrica, a, b))
+    return regresiones, avisos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de rendimiento con líneas base JSON")
+    parser.add_argument("--guardar", help="escribe los resultados como línea base en este fichero")
+    parser.add_argument("--comparar", help="línea base JSON con la que comparar")
+    parser.add_argument("--umbral", type=float, default=0.2, help="empeoramiento relativo tolerado")
+    parser.add_argument("--umbral-tiempo", type=float, default=0.5, help="ídem para los tiempos")
+    parser.add_argument("--seeds", type=int, nargs="*", default=None)
+    args = parser.parse_args()
+
+    resultados = ejecutar_suite(args.seeds, [] if args.seeds is not None else None)
+
+    print(f"{'caso':18s} {'ok':>5s} {'nodos':>7s} {'backtr.':>7s} {'ms':>9s} {'pico KiB':>9s}")
+    for caso, m in resultados.items():
+        # Los casos sin sorteo válido no tienen medidas
+        ms = f"{m['ms']:9.2f}" if "ms" in m else " " * 9
+        kib = f"{m['pico_kib']:9.1f}" if "pico_kib" in m else " " * 9
+        print(
+            f"{caso:18s} {str(m.get('ok', '')):>5s} {m.get('nodos', ''):>7} "
+            f"{m.get('backtracks', ''):>7} {ms} {kib}"
+        )
+
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as f:
+            json.dump(
+                {"python": platform.python_version(), "max_nodos": MAX_NODOS, "casos": resultados},
+                f, indent=2, ensure_ascii=False,
+            )
+        print(f"\nLínea base guardada en {args.guardar}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)["casos"]
+        regresiones, avisos = comparar(base, resultados, args.umbral, args.umbral_tiempo)
+        if avisos:
+            print(
+                f"\n⚠ {len(avisos)} empeoramientos de tiempo o memoria "
+                f"(umbral {args.umbral_tiempo:.0%}, no hacen fallar):"
+            )
+            for caso, metrica, a, b in avisos:
+                print(f"  {caso:18s} {metrica:10s} {a:.2f} → {b:.2f}")
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} regresiones (umbral {args.umbral:.0%}):")
+            for caso, metrica, a, b in regresiones:
+                print(f"  {caso:18s} {metrica:10s} {a} → {b}")
+            sys.exit(1)
+        print(f"\n✔ Sin regresiones respecto a {args.comparar} (umbral {args.umbral:.0%})")
+
+
+if __name__ == "__main__":
+    main()
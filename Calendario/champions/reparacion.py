@@ -0,0 +1,348 @@
+"""
+Reparación incremental de un sorteo ya resuelto.
+
+Casos habituales: "el mismo sorteo, pero X no puede jugar contra Y"
+(prohibidos), "X tiene que jugar contra Y" (fijados) o "Z sustituido por
+el ganador de la previa" (sustitucion). En vez de volver a resolver desde
+el grafo vacío, se conserva todo el sorteo salvo una vecindad pequeña:
+
+    0. Cada conflicto se intenta arreglar primero con un intercambio doble
+       dentro de un par de bombos (el movimiento de cadena_intercambios.py),
+       que solo cambia dos emparejamientos:
+       prohibido (a, b) presente:  (a, b), (c, d) → (a, d), (c, b)
+       fijado (a, b) ausente:      (a, d), (c, b) → (a, b), (c, d)
+       El sustituto conserva los rivales del sustituido que sigan siendo
+       válidos con su país; los demás se tratan como prohibidos.
+    1. Equipos en conflicto: los extremos de cada emparejamiento prohibido
+       presente, de cada fijado ausente y el equipo sustituido.
+    2. Se quitan todos los emparejamientos de esos equipos (salvo los
+       fijados que ya estaban) y se resuelve el resto con search_dominios
+       sobre el sorteo parcial, con los prohibidos vetados en las máscaras
+       de candidatos (BitsetState.prohibir).
+    3. Si no hay solución (o se agota MAX_NODOS), la vecindad crece con los
+       equipos más ligados a ella y se vuelve a intentar; en el peor caso
+       acaba siendo un sorteo completo con esas restricciones, que se
+       intenta con REINICIOS reinicios aleatorios. Solo se concluye que no
+       hay solución si una búsqueda termina sin agotar el límite; si todos
+       lo agotan, reparar lanza LimiteNodos.
+
+Como el resto del sorteo no se toca, el resultado cambia muy pocos
+emparejamientos respecto del original.
+
+Uso:
+    python reparacion.py --semilla 0 --prohibir "Real Madrid" "Liverpool"
+    python reparacion.py --semilla 0 --sustituir "Club Brugge" "Fenerbahçe" --pais-nuevo TUR
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass
+
+from bitset_state import iter_bits
+from data import Team
+from dominios import DomainStore
+from solver import LimiteNodos, search_dominios
+from state import DrawState
+
+# Límite de nodos de cada intento antes de ampliar la vecindad
+MAX_NODOS = 2000
+
+# Reinicios aleatorios del último intento, con todo el sorteo liberado
+REINICIOS = 50
+
+
+@dataclass
+class Reparacion:
+    """Sorteo reparado y cuánto se ha tenido que tocar."""
+
+    estado: DrawState
+    # Equipos cuyos emparejamientos se liberaron en el intento que funcionó
+    # (vacío si bastaron los intercambios directos)
+    libres: list
+    # Emparejamientos (nombres) que desaparecen y que aparecen respecto del
+    # original, por posición: el sustituto hereda los que conserva el sustituido
+    quitados: list
+    anadidos: list
+    intentos: int
+    nodos: int
+    ms: float
+
+
+def _pares(indice, pares, que: str):
+    salida = set()
+    for a, b in pares:
+        if a not in indice or b not in indice:
+            raise ValueError(f"Emparejamiento {que} con equipos desconocidos: {a} - {b}")
+        i, j = indice[a], indice[b]
+        if i == j:
+            raise ValueError(f"Emparejamiento {que} de un equipo consigo mismo: {a}")
+        salida.add((min(i, j), max(i, j)))
+    return salida
+
+
+def _comprobar_fijados(teams, fijados, formato) -> None:
+    """Errores evidentes: mismo país o más fijados de los que caben por bombo."""
+    por_bombo = {}
+    for i, j in fijados:
+        if teams[i].country == teams[j].country:
+            raise ValueError(f"Fijado imposible (mismo país): {teams[i].name} - {teams[j].name}")
+        for a, b in ((i, j), (j, i)):
+            clave = (a, teams[b].pot)
+            por_bombo[clave] = por_bombo.get(clave, 0) + 1
+            if por_bombo[clave] > formato.por_bombo:
+                raise ValueError(f"{teams[a].name}: más de {formato.por_bombo} fijados del bombo {teams[b].pot}")
+
+
+def _ampliar(libres, aristas, n: int):
+    """
+    Añade a libres tantos equipos como ya tiene (al menos 2): los que más
+    emparejamientos comparten con la vecindad actual.
+    """
+    ligados = [0] * n
+    for i, j in aristas:
+        if (i in libres) != (j in libres):
+            ligados[j if i in libres else i] += 1
+    fuera = sorted((k for k in range(n) if k not in libres), key=lambda k: (-ligados[k], k))
+    return libres | set(fuera[:max(2, len(libres))])
+
+
+def reparar(estado, fijados=(), prohibidos=(), sustitucion=None, pais_nuevo=None, rng=None, max_nodos=MAX_NODOS):
+    """
+    Repara el sorteo resuelto de estado (no se modifica) para que contenga
+    los emparejamientos fijados, ninguno de los prohibidos (pares de
+    nombres) y, con sustitucion=(viejo, nuevo), el equipo nuevo en el
+    lugar y el bombo del viejo. pais_nuevo es el país del equipo nuevo si
+    no está en la temporada.
+
+    Devuelve una Reparacion, o None si las restricciones no tienen
+    solución ni liberando todo el sorteo (una búsqueda completa terminó sin
+    encontrarla). Si con todo liberado cada reinicio agota max_nodos, lanza
+    LimiteNodos: no se sabe si hay solución.
+    """
+    t0 = time.perf_counter()
+    teams = list(estado.teams)
+    n = len(teams)
+    formato = estado.formato
+
+    conflicto = set()
+    if sustitucion is not None:
+        viejo, nuevo = sustitucion
+        posicion = {t.name: k for k, t in enumerate(teams)}
+        if viejo not in posicion:
+            raise ValueError(f"Equipo a sustituir desconocido: {viejo}")
+        if nuevo in posicion:
+            raise ValueError(f"{nuevo} ya está en el sorteo")
+        if pais_nuevo is None:
+            from temporada import cargar_temporada
+
+            pais_nuevo = cargar_temporada().pais.get(nuevo)
+            if pais_nuevo is None:
+                raise ValueError(f"{nuevo} no está en la temporada: hace falta pais_nuevo")
+        k = posicion[viejo]
+        teams[k] = Team(name=nuevo, country=pais_nuevo, pot=teams[k].pot, idx=teams[k].idx)
+        conflicto.add(k)
+
+    indice = {t.name: k for k, t in enumerate(teams)}
+    fijados = _pares(indice, fijados, "fijado")
+    prohibidos = _pares(indice, prohibidos, "prohibido")
+    if fijados & prohibidos:
+        raise ValueError("Un mismo emparejamiento está fijado y prohibido")
+    _comprobar_fijados(teams, fijados, formato)
+
+    aristas = {(i, j) for i, rivales in enumerate(estado.adj) for j in rivales if i < j}
+    for i, j in (aristas & prohibidos) | (fijados - aristas):
+        conflicto.update((i, j))
+
+    invalidos = set()
+    if sustitucion is not None:
+        invalidos = _invalidos_sustituto(teams, estado.adj, k, formato)
+
+    libres = set(conflicto)
+    intentos = 1
+    nodos = 0
+    nuevo_estado = _intercambios(teams, aristas, fijados, prohibidos, invalidos, formato)
+    if nuevo_estado is not None:
+        libres = set()
+    while nuevo_estado is None:
+        intentos += 1
+        todo = len(libres) == n
+        rng_intento = random.Random(0) if todo and rng is None else rng
+        for _ in range(REINICIOS + 1 if todo else 1):
+            nuevo_estado, agotado = _intentar(
+                teams, aristas, libres, fijados, prohibidos, formato, rng_intento, max_nodos
+            )
+            nodos += nuevo_estado.calls
+            if not agotado:
+                break
+        if nuevo_estado.deg == [formato.partidos] * n:
+            break
+        if todo:
+            if agotado:
+                raise LimiteNodos(f"{REINICIOS + 1} intentos de {max_nodos} nodos sin resolver el sorteo completo")
+            return None
+        nuevo_estado = None
+        libres = _ampliar(libres, aristas, n)
+
+    finales = {(i, j) for i, rivales in enumerate(nuevo_estado.adj) for j in rivales if i < j}
+    return Reparacion(
+        estado=nuevo_estado,
+        libres=sorted(teams[k].name for k in libres),
+        quitados=[(estado.teams[i].name, estado.teams[j].name) for i, j in sorted(aristas - finales)],
+        anadidos=[(teams[i].name, teams[j].name) for i, j in sorted(finales - aristas)],
+        intentos=intentos,
+        nodos=nodos,
+        ms=(time.perf_counter() - t0) * 1000,
+    )
+
+
+def _invalidos_sustituto(teams, adj, k: int, formato):
+    """
+    Emparejamientos del equipo k (ya sustituido) que incumplen las reglas con
+    su nuevo país: rivales del mismo país y rivales que pasan a tener más de
+    formato.max_por_pais de ese país.
+    """
+    pais = teams[k].country
+    invalidos = set()
+    for j in adj[k]:
+        del_pais = sum(1 for r in adj[j] if teams[r].country == pais)
+        if teams[j].country == pais or del_pais > formato.max_por_pais:
+            invalidos.add((min(k, j), max(k, j)))
+    return invalidos
+
+
+def _estado_con_vetos(teams, prohibidos, formato) -> DrawState:
+    estado = DrawState(teams, backend="bitset", formato=formato)
+    for i, j in prohibidos:
+        estado.bits.prohibir(i, j)
+    # Un equipo con vetos ya no es intercambiable con los de su clase
+    for k in {e for par in prohibidos for e in par}:
+        estado.clase[k] = len(teams) + k
+    return estado
+
+
+def _cambiar(estado, quitar, poner) -> bool:
+    """
+    Quita los emparejamientos de quitar y pone los de poner si todos son
+    candidatos válidos; si no, deja el estado como estaba.
+    """
+    for i, j in quitar:
+        estado.remove_edge(i, j)
+    puestos = []
+    for i, j in poner:
+        if not (estado.bits.candidates_mask(i) >> j) & 1:
+            break
+        estado.add_edge(i, j)
+        puestos.append((i, j))
+    else:
+        return True
+    for i, j in puestos:
+        estado.remove_edge(i, j)
+    for i, j in quitar:
+        estado.add_edge(i, j)
+    return False
+
+
+def _intercambios(teams, aristas, fijados, prohibidos, invalidos, formato):
+    """
+    Arregla cada conflicto (prohibidos presentes, invalidos y fijados
+    ausentes) con un intercambio doble, en orden determinista. Devuelve el
+    DrawState resultante o None si alguno no tiene intercambio.
+    """
+    estado = _estado_con_vetos(teams, prohibidos, formato)
+    for i, j in aristas:
+        estado.add_edge(i, j)
+    adj = estado.adj
+    pot = [t.pot for t in teams]
+
+    def libre(i, j):
+        return (min(i, j), max(i, j)) not in fijados
+
+    for a, b in sorted((aristas & prohibidos) | set(invalidos)):
+        # (a, b), (c, d) → (a, d), (c, b), con c del bombo de a y d del de b
+        if not any(
+            _cambiar(estado, [(a, b), (c, d)], [(a, d), (c, b)])
+            for c in iter_bits(estado.bits.pot_mask[pot[a]] & ~(1 << a) & ~(1 << b))
+            for d in sorted(adj[c])
+            if pot[d] == pot[b] and d not in (a, b) and libre(c, d)
+        ):
+            return None
+
+    for a, b in sorted(fijados):
+        if b in adj[a]:
+            continue
+        # (a, d), (c, b) → (a, b), (c, d)
+        if not any(
+            _cambiar(estado, [(a, d), (c, b)], [(a, b), (c, d)])
+            for d in sorted(adj[a])
+            if pot[d] == pot[b] and libre(a, d)
+            for c in sorted(adj[b])
+            if pot[c] == pot[a] and c not in (a, d) and libre(c, b) and d not in adj[c]
+        ):
+            return None
+    return estado
+
+
+def _intentar(teams, aristas, libres, fijados, prohibidos, formato, rng, max_nodos):
+    """
+    Un intento con la vecindad libres: (DrawState con lo conservado, los
+    fijados y, si se encuentra, el resto resuelto (si no, incompleto);
+    True si la búsqueda agotó max_nodos antes de terminar).
+    """
+    estado = _estado_con_vetos(teams, prohibidos, formato)
+    for i, j in fijados:
+        estado.add_edge(i, j)
+    for i, j in aristas:
+        if i not in libres and j not in libres and (i, j) not in fijados and (i, j) not in prohibidos:
+            estado.add_edge(i, j)
+
+    colocados = sum(estado.deg) // 2
+    estado.max_calls = max_nodos
+    try:
+        search_dominios(DomainStore(estado), colocados, rng, por_bombo=True)
+    except LimiteNodos:
+        return estado, True
+    finally:
+        estado.max_calls = None
+    return estado, False
+
+
+def main():
+    from data import load_teams
+    from solver import resolver
+
+    parser = argparse.ArgumentParser(description="Reparación incremental de un sorteo")
+    parser.add_argument("--semilla", type=int, default=0, help="sorteo de partida (como en montecarlo.py)")
+    parser.add_argument("--fijar", nargs=2, action="append", default=[], metavar=("EQUIPO_A", "EQUIPO_B"))
+    parser.add_argument("--prohibir", nargs=2, action="append", default=[], metavar=("EQUIPO_A", "EQUIPO_B"))
+    parser.add_argument("--sustituir", nargs=2, metavar=("VIEJO", "NUEVO"))
+    parser.add_argument("--pais-nuevo")
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    estado = DrawState(load_teams(rng), backend="bitset")
+    t0 = time.perf_counter()
+    if not resolver(estado, max_nodos=1000, rng=rng, reinicios=50):
+        print("❌ Los bombos de esta semilla no tienen sorteo válido")
+        return
+    ms_completo = (time.perf_counter() - t0) * 1000
+
+    try:
+        rep = reparar(estado, args.fijar, args.prohibir, args.sustituir, args.pais_nuevo)
+    except LimiteNodos as e:
+        print(f"❌ No se sabe si las restricciones tienen solución: {e}")
+        return
+    if rep is None:
+        print("❌ Las restricciones no tienen solución")
+        return
+    print(f"Sorteo original: {ms_completo:.1f} ms | reparación: {rep.ms:.1f} ms, "
+          f"{rep.intentos} intento(s), {rep.nodos} nodos, {len(rep.libres)} equipos liberados")
+    print(f"Cambian {len(rep.quitados)} de {estado.E} emparejamientos")
+    for a, b in rep.quitados:
+        print(f"  - {a} vs {b}")
+    for a, b in rep.anadidos:
+        print(f"  + {a} vs {b}")
+
+
+if __name__ == "__main__":
+    main()
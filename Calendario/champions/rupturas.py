@@ -0,0 +1,264 @@
+"""
+Optimización de "rupturas" (dos partidos seguidos en casa o fuera) de un
+calendario ya repartido en jornadas.
+
+Se busca, por recocido simulado, el orden de las jornadas y la orientación
+de los partidos que minimizan:
+
+    - las rupturas de cada equipo;
+    - las tres seguidas en casa o fuera (prohibidas: peso PESO_TRES);
+    - las rupturas entre las dos primeras y las dos últimas jornadas, que
+      deben ser una en casa y otra fuera para cada equipo (peso PESO_BORDE).
+
+La secuencia casa/fuera de cada equipo se guarda como máscara de bits
+(bit k = juega en casa en la k-ésima jornada del orden) y el coste de
+cada máscara está precalculado en una tabla, así que evaluar un
+movimiento solo cuesta una consulta por equipo afectado:
+
+    - intercambiar dos jornadas del orden: todos los equipos, O(equipos);
+    - invertir un ciclo dirigido de partidos (a→b→c→…→a): cada equipo del
+      ciclo sigue con el mismo número de partidos en casa y fuera. Si se
+      pasan los bombos, el ciclo se toma dentro de un mismo par de bombos
+      y se conserva también el reparto por bombo (orientación estricta de
+      fixtures.asignar_local_visitante).
+"""
+
+import math
+import random
+import time
+from functools import lru_cache
+
+# Pesos del coste de cada equipo
+PESO_RUPTURA = 1
+PESO_TRES = 50
+PESO_BORDE = 10
+
+# Temperaturas inicial y final del recocido
+T_INICIAL = 2.0
+T_FINAL = 0.05
+
+# Cada cuántas iteraciones se mira el reloj
+CADA_ITER = 256
+
+# Iteraciones con las que el resultado no depende del reloj (unos 50 ms)
+MAX_ITER = 2000
+
+
+@lru_cache(maxsize=None)
+def tabla_costes(n_jornadas: int):
+    """coste[mascara] de una secuencia casa/fuera de n_jornadas partidos."""
+    coste = [0] * (1 << n_jornadas)
+    for m in range(1 << n_jornadas):
+        s = [(m >> k) & 1 for k in range(n_jornadas)]
+        c = 0
+        for k in range(1, n_jornadas):
+            if s[k] == s[k - 1]:
+                c += PESO_RUPTURA
+                if k in (1, n_jornadas - 1):
+                    c += PESO_BORDE
+                if k >= 2 and s[k] == s[k - 2]:
+                    c += PESO_TRES
+        coste[m] = c
+    return coste
+
+
+def contar_rupturas(calendario):
+    """(rupturas, tres seguidas, rupturas en las jornadas 1-2 o en las dos últimas) del calendario."""
+    jornadas = sorted(calendario)
+    secuencias = {}
+    for k, j in enumerate(jornadas):
+        for local, visitante in calendario[j]:
+            secuencias.setdefault(local, {})[k] = 1
+            secuencias.setdefault(visitante, {})[k] = 0
+
+    rupturas = tres = borde = 0
+    n = len(jornadas)
+    for s in secuencias.values():
+        for k in range(1, n):
+            if k in s and k - 1 in s and s[k] == s[k - 1]:
+                rupturas += 1
+                if k in (1, n - 1):
+                    borde += 1
+                if k - 2 in s and s[k] == s[k - 2]:
+                    tres += 1
+    return rupturas, tres, borde
+
+
+class OptimizadorRupturas:
+    """Estado del recocido: orden de jornadas, orientación y máscaras por equipo."""
+
+    def __init__(self, calendario, bombo=None, rng=random):
+        self.rng = rng
+        self.jornadas = sorted(calendario)
+        n_j = len(self.jornadas)
+        self.coste = tabla_costes(n_j)
+
+        equipos = sorted({e for ps in calendario.values() for p in ps for e in p})
+        self.equipos = equipos
+        indice = {e: k for k, e in enumerate(equipos)}
+
+        # Partido m: jornada ronda[m] (índice en self.jornadas), local[m] → visitante[m]
+        self.ronda, self.local, self.visitante = [], [], []
+        for r, j in enumerate(self.jornadas):
+            for a, b in calendario[j]:
+                self.ronda.append(r)
+                self.local.append(indice[a])
+                self.visitante.append(indice[b])
+
+        self.incidentes = [[] for _ in equipos]
+        for m in range(len(self.ronda)):
+            self.incidentes[self.local[m]].append(m)
+            self.incidentes[self.visitante[m]].append(m)
+
+        # Con bombos, cada partido pertenece al subgrafo de su par de bombos
+        self.grupo = None
+        if bombo is not None:
+            pot = [bombo[e] for e in equipos]
+            self.grupo = [
+                (min(pot[a], pot[b]), max(pot[a], pot[b]))
+                for a, b in zip(self.local, self.visitante)
+            ]
+
+        # posicion[r] = lugar de la jornada r en el orden actual
+        self.posicion = list(range(n_j))
+        self.mascara = [0] * len(equipos)
+        for m, r in enumerate(self.ronda):
+            self.mascara[self.local[m]] |= 1 << r
+        self.total = sum(self.coste[x] for x in self.mascara)
+
+    # ------------------------------------------------------------
+    # Movimientos: cada uno devuelve (delta, aplicar)
+    # ------------------------------------------------------------
+
+    def _intercambio(self):
+        n_j = len(self.jornadas)
+        i, k = self.rng.sample(range(n_j), 2)
+        coste, mascara = self.coste, self.mascara
+        bi, bk = 1 << i, 1 << k
+
+        nuevas = []
+        delta = 0
+        for t, x in enumerate(mascara):
+            if bool(x & bi) != bool(x & bk):
+                y = x ^ bi ^ bk
+                nuevas.append((t, y))
+                delta += coste[y] - coste[x]
+
+        def aplicar():
+            for t, y in nuevas:
+                mascara[t] = y
+            for r, p in enumerate(self.posicion):
+                if p == i:
+                    self.posicion[r] = k
+                elif p == k:
+                    self.posicion[r] = i
+
+        return delta, aplicar
+
+    def _ciclo(self):
+        """Ciclo dirigido por un paseo aleatorio siguiendo partidos en casa."""
+        rng = self.rng
+        local, visitante, grupo = self.local, self.visitante, self.grupo
+
+        m0 = rng.randrange(len(local))
+        g = None if grupo is None else grupo[m0]
+        inicio = local[m0]
+        visto = {inicio: 0}
+        camino = [m0]
+        v = visitante[m0]
+        while v not in visto:
+            visto[v] = len(camino)
+            salidas = [
+                m for m in self.incidentes[v]
+                if local[m] == v and (g is None or grupo[m] == g)
+            ]
+            if not salidas:
+                # Orientación no equilibrada dentro del grupo: no hay ciclo
+                return math.inf, lambda: None
+            m = rng.choice(salidas)
+            camino.append(m)
+            v = visitante[m]
+        ciclo = camino[visto[v]:]
+
+        posicion, coste, mascara = self.posicion, self.coste, self.mascara
+        nuevas = {}
+        for m in ciclo:
+            bit = 1 << posicion[self.ronda[m]]
+            a, b = local[m], visitante[m]
+            nuevas[a] = nuevas.get(a, mascara[a]) & ~bit
+            nuevas[b] = nuevas.get(b, mascara[b]) | bit
+        delta = sum(coste[y] - coste[mascara[t]] for t, y in nuevas.items())
+
+        def aplicar():
+            for t, y in nuevas.items():
+                mascara[t] = y
+            for m in ciclo:
+                local[m], visitante[m] = visitante[m], local[m]
+
+        return delta, aplicar
+
+    # ------------------------------------------------------------
+    # Recocido
+    # ------------------------------------------------------------
+
+    def optimizar(self, limite_s: float = 0.05, max_iter=None) -> None:
+        """Recocido simulado durante limite_s segundos y/o max_iter iteraciones."""
+        if limite_s is None and max_iter is None:
+            raise ValueError("optimizar necesita limite_s o max_iter")
+        rng = self.rng
+        mejor = self._foto()
+        t0 = time.perf_counter()
+        temperatura = T_INICIAL
+        it = 0
+
+        while max_iter is None or it < max_iter:
+            if it % CADA_ITER == 0:
+                avance = 0.0 if limite_s is None else (time.perf_counter() - t0) / limite_s
+                if max_iter is not None:
+                    avance = max(avance, it / max_iter)
+                if avance >= 1.0 or mejor[0] == 0:
+                    break
+                temperatura = T_INICIAL * (T_FINAL / T_INICIAL) ** avance
+            it += 1
+
+            delta, aplicar = self._intercambio() if rng.random() < 0.2 else self._ciclo()
+            if delta <= 0 or rng.random() < math.exp(-delta / temperatura):
+                aplicar()
+                self.total += delta
+                if self.total < mejor[0]:
+                    mejor = self._foto()
+
+        self._restaurar(mejor)
+        self.iteraciones = it
+
+    def _foto(self):
+        return (self.total, list(self.posicion), list(self.local), list(self.visitante), list(self.mascara))
+
+    def _restaurar(self, foto) -> None:
+        self.total, self.posicion, self.local, self.visitante, self.mascara = foto
+
+    def calendario(self):
+        """El calendario actual, con las jornadas renumeradas según el orden."""
+        orden = [0] * len(self.posicion)
+        for r, p in enumerate(self.posicion):
+            orden[p] = r
+
+        equipos = self.equipos
+        por_ronda = [[] for _ in self.jornadas]
+        for m, r in enumerate(self.ronda):
+            por_ronda[r].append((equipos[self.local[m]], equipos[self.visitante[m]]))
+        return {self.jornadas[p]: por_ronda[r] for p, r in enumerate(orden)}
+
+
+def optimizar_rupturas(calendario, limite_s: float = 0.05, bombo=None, seed=None, max_iter=None):
+    """
+    Devuelve una copia de calendario con las jornadas reordenadas y los
+    partidos reorientados para minimizar las rupturas. limite_s es el
+    presupuesto de tiempo: más tiempo, mejor calendario. bombo (equipo →
+    bombo) conserva además el reparto casa/fuera por bombo. Con
+    limite_s=None y max_iter (por ejemplo MAX_ITER) el resultado es
+    reproducible con la misma seed.
+    """
+    opt = OptimizadorRupturas(calendario, bombo, random.Random(seed))
+    opt.optimizar(limite_s, max_iter)
+    return opt.calendario()
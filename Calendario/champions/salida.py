@@ -0,0 +1,146 @@
+"""
+Capa de salida de main: un formato elegible y un flujo de escritura acotado.
+
+Formatos:
+    texto       el informe de siempre (bombos, diagnóstico, partidos,
+                calendario y verificaciones), escrito en salida.out a
+                medida que se genera (las funciones de impresión reciben
+                file=)
+    jsonl       un objeto JSON por línea: "equipo" (diagnóstico), "partido"
+                y un "resumen" final
+    csv         una fila por partido (jornada, local, visitante, bombos, países)
+    silencioso  nada; solo el código de salida
+
+El diagnóstico de cada equipo sale de los contadores que ya lleva el
+DrawState (deg, pot_count, country_count) en una pasada, sin rehacer
+diccionarios a partir de adj. Los formatos distintos de texto no llaman a
+ninguna función de impresión, así que no pagan por formatear lo que no
+emiten.
+
+Nada se acumula en memoria: todo pasa por el buffer acotado del propio
+flujo destino (sys.stdout o el fichero abierto por main), cuya
+configuración no se toca, y cerrar solo lo vacía con flush. Lo que ya
+llenó el buffer se ve mientras el solver sigue.
+
+Uso (ver main.py):
+    with Salida("jsonl") as salida:
+        salida.sorteo(estado)
+        salida.partidos(estado, calendario)
+        salida.resumen(ok=True, llamadas=estado.calls)
+"""
+
+import sys
+
+FORMATOS = ("texto", "jsonl", "csv", "silencioso")
+
+COLUMNAS_CSV = (
+    "jornada", "local", "visitante",
+    "bombo_local", "bombo_visitante", "pais_local", "pais_visitante",
+)
+
+
+def diagnostico(estado):
+    """
+    Un diccionario por equipo con sus rivales por bombo y por país, leído de
+    los contadores del estado. ok indica si cumple todas las reglas.
+    """
+    teams, deg, formato = estado.teams, estado.deg, estado.formato
+    pot_count, country_count = estado.pot_count, estado.country_count
+    bombos = range(1, len(pot_count[0]))
+    filas = []
+    for i, t in enumerate(teams):
+        por_pais = {c: k for c, k in country_count[i].items() if k}
+        propios = por_pais.get(t.country, 0)
+        extranjeros = [(k, c) for c, k in por_pais.items() if c != t.country]
+        max_ext, pais_max = max(extranjeros, default=(0, None))
+        por_bombo = [pot_count[i][p] for p in bombos]
+        limite = formato.limite_mismo_pais(t.country)
+        filas.append({
+            "equipo": t.name,
+            "pais": t.country,
+            "bombo": t.pot,
+            "rivales": deg[i],
+            "por_bombo": por_bombo,
+            "por_pais": por_pais,
+            "mismo_pais": propios,
+            "max_extranjero": max_ext,
+            "pais_max": pais_max,
+            "ok": (
+                deg[i] == formato.partidos
+                and all(k == formato.por_bombo for k in por_bombo)
+                and propios <= limite
+                and max_ext <= formato.max_por_pais
+            ),
+        })
+    return filas
+
+
+class Salida:
+    """Escribe en destino (por defecto sys.stdout) a medida que llegan los datos."""
+
+    def __init__(self, formato: str = "texto", destino=None):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconocido: {formato} (opciones: {', '.join(FORMATOS)})")
+        self.formato = formato
+        self.destino = destino
+        self.out = None
+        self._csv = None
+
+    @property
+    def texto(self) -> bool:
+        return self.formato == "texto"
+
+    def __enter__(self):
+        self.out = self.destino or sys.stdout
+        if self.formato == "csv":
+            import csv
+
+            self._csv = csv.writer(self.out, lineterminator="\n")
+            self._csv.writerow(COLUMNAS_CSV)
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def cerrar(self) -> None:
+        if self.out is not None:
+            self.out.flush()
+
+    # ------------------------------------------------------------
+    # Registros (solo jsonl / csv; en texto imprime main)
+    # ------------------------------------------------------------
+
+    def _json(self, tipo: str, campos: dict) -> None:
+        import json
+
+        self.out.write(json.dumps({"tipo": tipo, **campos}, ensure_ascii=False))
+        self.out.write("\n")
+
+    def sorteo(self, estado) -> None:
+        """Diagnóstico por equipo (jsonl)."""
+        if self.formato == "jsonl":
+            for fila in diagnostico(estado):
+                self._json("equipo", fila)
+
+    def partidos(self, estado, calendario) -> None:
+        """Partidos del calendario final {jornada: [(local, visitante)]} con nombres."""
+        if self.formato not in ("jsonl", "csv"):
+            return
+        por_nombre = {t.name: t for t in estado.teams}
+        for j in sorted(calendario):
+            for local, visitante in calendario[j]:
+                ta, tb = por_nombre[local], por_nombre[visitante]
+                if self._csv is not None:
+                    self._csv.writerow((j, ta.name, tb.name, ta.pot, tb.pot, ta.country, tb.country))
+                else:
+                    self._json("partido", {
+                        "jornada": j, "local": ta.name, "visitante": tb.name,
+                        "bombo_local": ta.pot, "bombo_visitante": tb.pot,
+                        "pais_local": ta.country, "pais_visitante": tb.country,
+                    })
+
+    def resumen(self, **campos) -> None:
+        """Línea final con el resultado global (jsonl)."""
+        if self.formato == "jsonl":
+            self._json("resumen", campos)
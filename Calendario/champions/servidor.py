@@ -0,0 +1,476 @@
+"""
+Servicio local de sorteos: un proceso asyncio de larga duración que
+contesta peticiones de sorteo / calendario sin arrancar Python ni
+resolver en frío cada vez.
+
+    - Procesos trabajadores calientes (ProcessPoolExecutor con un
+      inicializador que importa todo y resuelve un sorteo de prueba).
+    - Reserva de sorteos ya resueltos con bombos aleatorios, que una tarea
+      de fondo mantiene llena. Cada sorteo de la reserva lleva su semilla,
+      así que se puede reproducir con resolver_sorteo(semilla).
+    - Caché de los últimos resultados servidos por (semilla, bombos).
+    - Un trabajo del pool por petición que no sale de la reserva ni de la
+      caché, contestado en cuanto ese sorteo termina (agrupar varios en un
+      envío solo ahorra el viaje entre procesos y hace esperar a todos al
+      más lento). Las repetidas mientras una está en curso se resuelven
+      una vez.
+    - Si un trabajador muere, las peticiones afectadas reciben un error,
+      el pool se vuelve a crear y la reserva se sigue rellenando.
+    - Resolución acotada: límite de nodos y reinicios en el solver y
+      TIEMPO_MAX_S de espera por petición.
+
+Protocolo: JSON por líneas sobre un socket Unix (o TCP en localhost con
+--puerto); una petición por línea y una respuesta por línea, sobre la
+misma conexión tantas veces como se quiera.
+
+    {"op": "sorteo"}                                  cualquiera (de la reserva)
+    {"op": "sorteo", "semilla": 7}                    bombos y solver de la semilla 7
+    {"op": "sorteo", "semilla": 7, "oficiales": true} bombos reales de la temporada
+    {"op": "sorteo", "semilla": 7, "bombos": [[...], [...], ...], "calendario": false}
+    {"op": "salud"}
+    {"op": "metricas"}
+
+Uso:
+    python servidor.py --procesos 2 --reserva 64
+    python servidor.py --cliente '{"op": "sorteo", "semilla": 7}'
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+SOCKET = "/tmp/champions_sorteos.sock"
+
+# Sorteos resueltos que se intentan tener siempre preparados
+RESERVA = 32
+
+# Sorteos por envío al rellenar la reserva: pocos, para que una petición
+# que llega mientras tanto no espere detrás de un relleno largo
+LOTE_RELLENO = 2
+
+# Espera tras un fallo del pool antes de volver a rellenar
+ESPERA_FALLO_S = 0.5
+
+# Resultados recientes guardados por (semilla, bombos, calendario)
+CACHE = 256
+
+# Límites del solver (como en montecarlo.py) y espera máxima por petición
+MAX_NODOS = 1000
+REINICIOS = 50
+TIEMPO_MAX_S = 2.0
+
+# Iteraciones del optimizador de rupturas (sin límite de tiempo: reproducible)
+ITER_RUPTURAS = 2000
+
+# Latencias guardadas por origen para los percentiles
+VENTANA_LATENCIAS = 1000
+
+
+class SinSorteo(Exception):
+    """La petición no tiene solución (bombos inviables) o se agotó el solver."""
+
+
+# ------------------------------------------------------------
+# Lado del trabajador
+# ------------------------------------------------------------
+
+def resolver_sorteo(semilla: int, bombos=None, calendario: bool = True):
+    """
+    Sorteo completo de una semilla como diccionario serializable: bombos,
+    partidos (local, visitante) y, si se pide, el calendario por jornadas.
+    Sin bombos, los bombos también salen de la semilla (como en
+    montecarlo.py). Lanza SinSorteo si no hay solución dentro de los límites.
+    """
+    from data import load_teams
+    from fixtures import asignar_local_visitante, generar_partidos_unicos, nombres_partidos
+    from solver import resolver
+    from state import DrawState
+
+    rng = random.Random(semilla)
+    estado = DrawState(load_teams(rng, bombos=bombos), backend="bitset")
+    t0 = time.perf_counter()
+    found = resolver(estado, max_nodos=MAX_NODOS, rng=rng, reinicios=REINICIOS)
+    ms = (time.perf_counter() - t0) * 1000
+    if not found:
+        motivo = "bombos sin sorteo válido" if found is False else "límite del solver agotado"
+        raise SinSorteo(f"semilla {semilla}: {motivo}")
+
+    partidos = nombres_partidos(estado, asignar_local_visitante(estado, generar_partidos_unicos(estado), rng))
+    n_bombos = max(t.pot for t in estado.teams)
+    resultado = {
+        "semilla": semilla,
+        "bombos": [[t.name for t in estado.teams if t.pot == p] for p in range(1, n_bombos + 1)],
+        "partidos": partidos,
+        "nodos": estado.calls,
+        "ms_solver": round(ms, 3),
+    }
+    if calendario:
+        from league_calendar import generate_league_calendar
+        from rupturas import optimizar_rupturas
+
+        cal = generate_league_calendar(partidos, semilla)
+        cal = optimizar_rupturas(cal, limite_s=None, seed=semilla, max_iter=ITER_RUPTURAS)
+        resultado["calendario"] = [cal[j] for j in sorted(cal)]
+    return resultado
+
+
+def _calentar() -> None:
+    """Inicializador de cada trabajador: imports, cachés y un sorteo de prueba."""
+    for semilla in range(4):
+        try:
+            resolver_sorteo(semilla)
+            return
+        except SinSorteo:
+            continue
+
+
+def _resolver_trabajo(semilla, bombos, calendario):
+    """Un trabajo del pool: (ok, resultado o mensaje de error)."""
+    try:
+        return True, resolver_sorteo(semilla, bombos, calendario)
+    except (SinSorteo, ValueError) as e:
+        return False, str(e)
+
+
+def _resolver_lote(trabajos):
+    """Varios trabajos en un envío (relleno de la reserva): [(ok, resultado o error)]."""
+    return [_resolver_trabajo(*t) for t in trabajos]
+
+
+# ------------------------------------------------------------
+# Métricas
+# ------------------------------------------------------------
+
+class Metricas:
+    """Contadores y latencias recientes por origen de la respuesta."""
+
+    def __init__(self):
+        self.inicio = time.monotonic()
+        self.peticiones = 0
+        self.errores = 0
+        self.tiempo_agotado = 0
+        self.por_origen = {}
+        self.latencias = {}
+        self.trabajos = 0
+        self.rellenos = 0
+        self.fallos_pool = 0
+
+    def anotar(self, origen: str, segundos: float) -> None:
+        self.por_origen[origen] = self.por_origen.get(origen, 0) + 1
+        self.latencias.setdefault(origen, deque(maxlen=VENTANA_LATENCIAS)).append(segundos * 1000)
+
+    def a_dict(self):
+        latencias = {}
+        for origen, valores in self.latencias.items():
+            v = sorted(valores)
+            latencias[origen] = {
+                "p50_ms": round(v[len(v) // 2], 3),
+                "p90_ms": round(v[int(len(v) * 0.9)], 3),
+                "p99_ms": round(v[int(len(v) * 0.99)], 3),
+                "max_ms": round(v[-1], 3),
+            }
+        return {
+            "activo_s": round(time.monotonic() - self.inicio, 1),
+            "peticiones": self.peticiones,
+            "errores": self.errores,
+            "tiempo_agotado": self.tiempo_agotado,
+            "por_origen": dict(self.por_origen),
+            "latencias": latencias,
+            "trabajos": self.trabajos,
+            "sorteos_de_relleno": self.rellenos,
+            "fallos_pool": self.fallos_pool,
+        }
+
+
+# ------------------------------------------------------------
+# Servidor
+# ------------------------------------------------------------
+
+class Servidor:
+    """Reserva, caché y cola de trabajos alrededor de un pool de procesos calientes."""
+
+    def __init__(self, procesos: int = 1, reserva: int = RESERVA, semilla: int = 0):
+        self.procesos = procesos
+        self.objetivo = reserva
+        self.siguiente = semilla  # próxima semilla con la que rellenar la reserva
+        self.reserva = OrderedDict()  # semilla → sorteo (con calendario)
+        self.cache = OrderedDict()
+        self.en_curso = {}  # clave → future, para no resolver dos veces lo mismo
+        self.cola = None
+        self.pool = None
+        self.metricas = Metricas()
+        self._tareas = []
+
+    async def arrancar(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.pool = ProcessPoolExecutor(max_workers=self.procesos, initializer=_calentar)
+        # Arranca (y calienta) todos los trabajadores antes de aceptar peticiones
+        await asyncio.gather(*(loop.run_in_executor(self.pool, os.getpid) for _ in range(self.procesos)))
+        self.cola = asyncio.Queue()
+        self._tareas = [asyncio.create_task(self._despachar()), asyncio.create_task(self._rellenar())]
+
+    async def parar(self) -> None:
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+
+    # ---- peticiones ----
+
+    async def atender(self, peticion):
+        """Respuesta (diccionario) a una petición ya decodificada."""
+        op = peticion.get("op")
+        if op == "salud":
+            return {
+                "ok": True,
+                "reserva": len(self.reserva),
+                "objetivo": self.objetivo,
+                "procesos": self.procesos,
+                "pendientes": self.cola.qsize(),
+                "en_curso": len(self.en_curso),
+            }
+        if op == "metricas":
+            return {"ok": True, **self.metricas.a_dict()}
+        if op != "sorteo":
+            return {"ok": False, "error": f"operación desconocida: {op!r}"}
+
+        t0 = time.perf_counter()
+        self.metricas.peticiones += 1
+        try:
+            origen, sorteo = await self._sorteo(peticion)
+        except asyncio.TimeoutError:
+            self.metricas.tiempo_agotado += 1
+            return {"ok": False, "error": f"sin respuesta en {TIEMPO_MAX_S} s"}
+        except (SinSorteo, ValueError, TypeError) as e:
+            self.metricas.errores += 1
+            return {"ok": False, "error": str(e)}
+        dt = time.perf_counter() - t0
+        self.metricas.anotar(origen, dt)
+        return {"ok": True, "origen": origen, "ms": round(dt * 1000, 3), "sorteo": sorteo}
+
+    async def _sorteo(self, peticion):
+        semilla = peticion.get("semilla")
+        calendario = bool(peticion.get("calendario", True))
+        bombos = peticion.get("bombos")
+        if peticion.get("oficiales"):
+            from data import bombos_oficiales
+
+            bombos = bombos_oficiales()
+        if bombos is not None:
+            bombos = tuple(tuple(b) for b in bombos)
+            if semilla is None:
+                semilla = random.getrandbits(32)
+
+        # Reserva: cualquier sorteo, o el de una semilla que ya esté preparada
+        if bombos is None:
+            if semilla is None and self.reserva:
+                semilla, sorteo = self.reserva.popitem(last=False)
+                return "reserva", self._guardar((semilla, None, True), sorteo, calendario)
+            if semilla in self.reserva:
+                sorteo = self.reserva.pop(semilla)
+                return "reserva", self._guardar((semilla, None, True), sorteo, calendario)
+            if semilla is None:
+                semilla = self.siguiente
+                self.siguiente += 1
+
+        clave = (int(semilla), bombos, calendario)
+        if clave in self.cache:
+            self.cache.move_to_end(clave)
+            return "cache", self.cache[clave]
+        if (clave[0], bombos, True) in self.cache:
+            return "cache", _sin_calendario(self.cache[(clave[0], bombos, True)], calendario)
+
+        futuro = self.en_curso.get(clave)
+        if futuro is None:
+            futuro = asyncio.get_running_loop().create_future()
+            self.en_curso[clave] = futuro
+            await self.cola.put(clave)
+        sorteo = await asyncio.wait_for(asyncio.shield(futuro), TIEMPO_MAX_S)
+        return "solver", sorteo
+
+    def _guardar(self, clave, sorteo, calendario):
+        """Mete un sorteo en la caché y lo devuelve con o sin calendario."""
+        self.cache[clave] = sorteo
+        self.cache.move_to_end(clave)
+        while len(self.cache) > CACHE:
+            self.cache.popitem(last=False)
+        return _sin_calendario(sorteo, calendario)
+
+    # ---- tareas de fondo ----
+
+    async def _despachar(self) -> None:
+        """Manda cada petición pendiente al pool como un trabajo propio."""
+        while True:
+            clave = await self.cola.get()
+            self.metricas.trabajos += 1
+            asyncio.create_task(self._enviar(clave))
+
+    async def _ejecutar(self, funcion, *args):
+        """run_in_executor sobre el pool; si el pool se ha roto, lo vuelve a crear."""
+        pool = self.pool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, funcion, *args)
+        except BrokenProcessPool:
+            self.metricas.fallos_pool += 1
+            if self.pool is pool:
+                self.pool = ProcessPoolExecutor(max_workers=self.procesos, initializer=_calentar)
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def _enviar(self, clave) -> None:
+        try:
+            ok, resultado = await self._ejecutar(_resolver_trabajo, *clave)
+        except Exception as e:  # trabajador caído
+            ok, resultado = False, f"error del trabajador: {e!r}"
+        futuro = self.en_curso.pop(clave)
+        if ok:
+            self._guardar(clave, resultado, True)
+            futuro.set_result(resultado)
+        else:
+            futuro.set_exception(SinSorteo(resultado))
+        # Nadie esperaba ya (tiempo agotado): que no quede la excepción sin recoger
+        if futuro.done() and not futuro.cancelled():
+            futuro.exception()
+
+    async def _rellenar(self) -> None:
+        """Mantiene la reserva cerca del objetivo con semillas consecutivas."""
+        while True:
+            falta = self.objetivo - len(self.reserva)
+            if falta <= 0:
+                await asyncio.sleep(0.01)
+                continue
+            semillas = range(self.siguiente, self.siguiente + min(falta, LOTE_RELLENO))
+            self.siguiente = semillas.stop
+            trabajos = [(s, None, True) for s in semillas]
+            try:
+                resultados = await self._ejecutar(_resolver_lote, trabajos)
+            except Exception:  # trabajador caído: esas semillas se saltan
+                await asyncio.sleep(ESPERA_FALLO_S)
+                continue
+            for s, (ok, sorteo) in zip(semillas, resultados):
+                if ok:
+                    self.reserva[s] = sorteo
+                    self.metricas.rellenos += 1
+
+    # ---- conexiones ----
+
+    async def conexion(self, reader, writer) -> None:
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                try:
+                    peticion = json.loads(linea)
+                    if not isinstance(peticion, dict):
+                        raise ValueError("la petición debe ser un objeto JSON")
+                except ValueError as e:
+                    respuesta = {"ok": False, "error": f"petición inválida: {e}"}
+                else:
+                    respuesta = await self.atender(peticion)
+                writer.write(json.dumps(respuesta, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _sin_calendario(sorteo, calendario: bool):
+    if calendario or "calendario" not in sorteo:
+        return sorteo
+    return {k: v for k, v in sorteo.items() if k != "calendario"}
+
+
+async def servir(ruta=SOCKET, puerto=None, procesos: int = 1, reserva: int = RESERVA, semilla: int = 0) -> None:
+    """Arranca el servidor y atiende hasta que se cancela (Ctrl+C / SIGTERM)."""
+    import signal
+
+    servidor = Servidor(procesos, reserva, semilla)
+    await servidor.arrancar()
+    if puerto is not None:
+        srv = await asyncio.start_server(servidor.conexion, "127.0.0.1", puerto)
+        donde = f"127.0.0.1:{puerto}"
+    else:
+        if os.path.exists(ruta):
+            os.unlink(ruta)
+        srv = await asyncio.start_unix_server(servidor.conexion, ruta)
+        donde = ruta
+    print(f"Servidor de sorteos en {donde} ({procesos} procesos, reserva {reserva})", flush=True)
+
+    parada = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, parada.set)
+    async with srv:
+        await parada.wait()
+    await servidor.parar()
+    if puerto is None and os.path.exists(ruta):
+        os.unlink(ruta)
+
+
+# ------------------------------------------------------------
+# Cliente (síncrono, para las herramientas de planificación)
+# ------------------------------------------------------------
+
+class Cliente:
+    """Conexión persistente al servidor; pedir() envía una petición y espera su respuesta."""
+
+    def __init__(self, ruta=SOCKET, puerto=None, timeout: float = 10.0):
+        if puerto is not None:
+            self.sock = socket.create_connection(("127.0.0.1", puerto), timeout)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(ruta)
+        self.archivo = self.sock.makefile("rb")
+
+    def pedir(self, peticion):
+        self.sock.sendall(json.dumps(peticion).encode("utf-8") + b"\n")
+        linea = self.archivo.readline()
+        if not linea:
+            raise ConnectionError("el servidor ha cerrado la conexión")
+        return json.loads(linea)
+
+    def cerrar(self) -> None:
+        self.archivo.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de sorteos con reserva y procesos calientes")
+    parser.add_argument("--socket", default=SOCKET, help="ruta del socket Unix")
+    parser.add_argument("--puerto", type=int, help="TCP en 127.0.0.1 en lugar del socket Unix")
+    parser.add_argument("--procesos", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)))
+    parser.add_argument("--reserva", type=int, default=RESERVA)
+    parser.add_argument("--semilla", type=int, default=0, help="primera semilla de la reserva")
+    parser.add_argument("--cliente", metavar="JSON", help="envía una petición a un servidor ya arrancado")
+    args = parser.parse_args()
+
+    if args.cliente:
+        with Cliente(args.socket, args.puerto) as cliente:
+            print(json.dumps(cliente.pedir(json.loads(args.cliente)), ensure_ascii=False))
+        return
+
+    try:
+        asyncio.run(servir(args.socket, args.puerto, args.procesos, args.reserva, args.semilla))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,56 @@
 """Algoritmo de backtracking determinista para construir el sorteo."""
 
-from constraints import compute_candidates
-from state import teams, adj, deg, add_edge, remove_edge, E
-from config import N_MATCHES
+import random
+import sys
+import time
 
-calls = 0  # número de llamadas recursivas al solver
+from constraints import compute_candidates, bombos_viables
+from dominios import DomainStore
+from backjumping import BusquedaCBJ
+from descomposicion import buscar_por_bombos
 
 
-def search(edge_no: int = 0) -> bool:
-    """Intenta construir un sorteo válido mediante backtracking determinista."""
-    global calls
-    calls += 1
+# Marcos de pila de más sobre uno por emparejamiento (search, search_dominios, cbj)
+MARGEN_RECURSION = 200
+
+
+class LimiteNodos(Exception):
+    """Se ha superado estado.max_calls sin terminar la búsqueda."""
+
+
+def search(estado, edge_no: int = 0, tabla=None) -> bool:
+    """
+    Intenta construir un sorteo válido mediante backtracking determinista.
+    Con una TablaTransposicion no se vuelven a explorar estados ya fallidos.
+    """
+    estado.calls += 1
+    if estado.max_calls is not None and estado.calls > estado.max_calls:
+        raise LimiteNodos()
+    teams, deg = estado.teams, estado.deg
+    partidos = estado.formato.partidos
+    instr = estado.instr
+    if instr is not None:
+        instr.nodo(edge_no)
 
     # Caso base: hemos colocado todos los emparejamientos
-    if edge_no == E:
-        # Comprobamos que todos tienen N_MATCHES rivales
-        return all(d == N_MATCHES for d in deg)
+    if edge_no == estado.E:
+        # Comprobamos que todos tienen todos sus rivales
+        return all(d == partidos for d in deg)
+
+    if tabla is not None and tabla.es_fallo(estado.hash):
+        return False
 
     # Heurística MRV: elegir el equipo con menos opciones posibles
     best_i = None
     best_candidates = None
+    if instr is not None:
+        t0 = time.perf_counter()
 
     for i in range(len(teams)):
-        if deg[i] >= N_MATCHES:
+        if deg[i] >= partidos:
             continue
 
-        cand = compute_candidates(i)
+        cand = compute_candidates(estado, i)
         if not cand:
             # Este equipo no puede completar sus rivales -> rama muerta
             return False
@@ -34,6 +59,10 @@ def search(edge_no: int = 0) -> bool:
             best_i = i
             best_candidates = cand
 
+    if instr is not None:
+        t1 = time.perf_counter()
+        instr.candidatos(edge_no, t0, t1, len(best_candidates))
+
     # Orden determinista de candidatos:
     # primero menor grado, luego por bombo, país y nombre
     best_candidates.sort(
@@ -44,11 +73,138 @@ def search(edge_no: int = 0) -> bool:
             teams[j].name,
         )
     )
+    if instr is not None:
+        instr.ordenar(edge_no, t1, time.perf_counter())
+
+    # Ruptura de simetrías: un rival equivalente a otro que ya ha fallado
+    # (misma clase y mismos rivales) llevaría a un subárbol isomorfo
+    clase, rivales = estado.clase, estado.bits.rival_mask
+    fallidos = set() if estado.simetria else None
 
     for j in best_candidates:
-        add_edge(best_i, j)
-        if search(edge_no + 1):
+        if fallidos and (clase[j], rivales[j]) in fallidos:
+            estado.podas_simetria += 1
+            continue
+        estado.add_edge(best_i, j)
+        if search(estado, edge_no + 1, tabla):
             return True
-        remove_edge(best_i, j)
+        estado.remove_edge(best_i, j)
+        if instr is not None:
+            instr.backtrack(edge_no)
+        if fallidos is not None:
+            fallidos.add((clase[j], rivales[j]))
 
+    if tabla is not None:
+        tabla.registrar_fallo(estado.hash)
     return False
+
+
+def search_dominios(store, edge_no: int = 0, rng=None, por_bombo: bool = False, tabla=None) -> bool:
+    """
+    Mismo backtracking que search, pero leyendo los candidatos del
+    DomainStore (dominios.py) en vez de recalcularlos para cada equipo.
+    Sin rng explora exactamente el mismo árbol que search; con rng los
+    empates (MRV y candidatos con el mismo grado) se rompen al azar.
+
+    Con por_bombo=True la MRV se hace sobre pares (equipo, bombo) y solo se
+    ramifica sobre los candidatos de ese bombo: poda mucho antes las ramas
+    en las que a un equipo no le quedan rivales posibles en algún bombo.
+    tabla es una TablaTransposicion opcional, como en search.
+    """
+    estado = store.estado
+    estado.calls += 1
+    if estado.max_calls is not None and estado.calls > estado.max_calls:
+        raise LimiteNodos()
+
+    if edge_no == estado.E:
+        return all(d == estado.formato.partidos for d in estado.deg)
+
+    if tabla is not None and tabla.es_fallo(estado.hash):
+        return False
+
+    if por_bombo:
+        slot = store.mrv_bombo(rng)
+        if slot is None:
+            return False
+        best_i, q = slot
+    else:
+        best_i, q = store.mrv(rng), None
+        if best_i is None:
+            return False
+    best_candidates = store.candidatos(best_i, q, rng)
+
+    clase, rivales = estado.clase, estado.bits.rival_mask
+    fallidos = set() if estado.simetria else None
+
+    for j in best_candidates:
+        if fallidos and (clase[j], rivales[j]) in fallidos:
+            estado.podas_simetria += 1
+            continue
+        store.add_edge(best_i, j)
+        if search_dominios(store, edge_no + 1, rng, por_bombo, tabla):
+            return True
+        store.remove_edge(best_i, j)
+        if fallidos is not None:
+            fallidos.add((clase[j], rivales[j]))
+
+    if tabla is not None:
+        tabla.registrar_fallo(estado.hash)
+    return False
+
+
+def resolver(estado, max_nodos=None, rng=None, reinicios=0, por_bombo=False, tabla=None, modo="clasico", nogoods=None):
+    """
+    Resuelve el sorteo de estado con la variante más rápida para su backend:
+    con "bitset" usa el DomainStore incremental, con "sets" el search original.
+
+    max_nodos limita las llamadas de cada intento. Con rng (solo "bitset")
+    la búsqueda es aleatoria y, si un intento agota su límite, se vacía el
+    estado y se reintenta hasta `reinicios` veces más: el coste del
+    backtracking tiene colas muy pesadas y reiniciar suele ser mucho más
+    rápido que insistir en la misma rama. por_bombo y tabla (una
+    TablaTransposicion, que sigue siendo válida entre reinicios) se pasan
+    a la búsqueda.
+
+    modo="cbj" usa backjumping dirigido por conflictos con aprendizaje de
+    nogoods (backjumping.py) en lugar del backtracking cronológico; el
+    almacén de nogoods se puede pasar para conservarlo entre llamadas.
+    Compensa sobre todo con por_bombo=True: con la MRV por equipos las
+    explicaciones abarcan casi todas las decisiones y apenas se salta.
+
+    modo="bombos" resuelve por separado los subproblemas de cada par de
+    bombos (descomposicion.py). Un intento fallido no demuestra nada, así
+    que en ese modo solo se devuelve False si los bombos son inviables.
+
+    Devuelve True / False, o None si se agotan todos los intentos
+    (en ese caso el estado queda a medio construir y hay que descartarlo).
+    """
+    if not bombos_viables(estado.teams):
+        return False
+
+    # Una llamada recursiva por emparejamiento: con ligas grandes (256
+    # equipos, 1024 emparejamientos) no basta el límite por defecto
+    if sys.getrecursionlimit() < estado.E + MARGEN_RECURSION:
+        sys.setrecursionlimit(estado.E + MARGEN_RECURSION)
+
+    for intento in range(reinicios + 1):
+        if intento:
+            estado.vaciar()
+        estado.max_calls = None if max_nodos is None else estado.calls + max_nodos
+        try:
+            if modo == "cbj":
+                busqueda = BusquedaCBJ(DomainStore(estado), nogoods, rng, por_bombo)
+                nogoods = busqueda.nogoods
+                return busqueda.buscar()
+            if modo == "bombos":
+                if buscar_por_bombos(DomainStore(estado), rng or random.Random(intento)):
+                    return True
+                continue
+            if estado.backend == "bitset":
+                return search_dominios(DomainStore(estado), rng=rng, por_bombo=por_bombo, tabla=tabla)
+            return search(estado, tabla=tabla)
+        except LimiteNodos:
+            continue
+        finally:
+            estado.max_calls = None
+
+    return None
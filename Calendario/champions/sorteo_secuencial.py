@@ -0,0 +1,288 @@
+"""
+Simulador del sorteo real de la UEFA: bola a bola, con oráculo de factibilidad.
+
+En la ceremonia se saca un equipo y el software le asigna sus rivales uno
+a uno, eligiendo al azar entre los que todavía permiten completar el
+sorteo. Aquí cada paso es la asignación de un rival:
+
+    para cada bombo (1..4), equipos en orden aleatorio:
+        para cada bombo rival q (1..4), mientras le falten rivales de q:
+            elegir al azar un candidato c de q tal que el sorteo parcial
+            + (equipo, c) siga siendo completable
+
+Elegir al azar y descartar los no factibles equivale a elegir de forma
+uniforme entre los factibles, que es lo que hace el software oficial.
+(El reparto casa/fuera de cada par de rivales no se sortea aquí: lo
+decide después fixtures.)
+
+El oráculo memoriza sus respuestas por una clave canónica del estado
+parcial (equipos + máscaras de rivales) en una caché LRU acotada. Cada
+respuesta positiva guarda además una solución completa que la demuestra
+("testigo"): si el sorteo parcial con el emparejamiento elegido está
+contenido en el último testigo, es factible sin buscar.
+
+Solo se descarta un candidato con una infactibilidad demostrada: si la
+búsqueda acotada agota sus reinicios, se repite con límites cada vez
+mayores (ESCALADOS) y, en último caso, sin límite de nodos, que es una
+búsqueda completa. Tratar "no lo sé" como "no" sesgaría las
+probabilidades del sorteo.
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from bitset_state import iter_bits
+from constraints import bombos_viables
+from data import load_teams
+from dominios import DomainStore
+from solver import LimiteNodos, search_dominios
+from state import DrawState
+
+# Reintentos con el límite de nodos multiplicado por FACTOR_ESCALADO antes
+# de la búsqueda completa sin límite
+ESCALADOS = 3
+FACTOR_ESCALADO = 8
+
+
+class OraculoFactibilidad:
+    """¿Se puede completar este sorteo parcial? Respuestas cacheadas con LRU."""
+
+    def __init__(self, max_entradas=20_000, max_nodos=2000, reinicios=10, seed=0):
+        self.cache = OrderedDict()
+        self.max_entradas = max_entradas
+        self.max_nodos = max_nodos
+        self.reinicios = reinicios
+        self.rng = random.Random(seed)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.desconocidos = 0  # búsquedas que agotaron el límite y hubo que escalar
+
+        # Último testigo: máscaras de rivales de una solución completa
+        self.testigo = None
+
+    @staticmethod
+    def clave(estado):
+        """Clave canónica: qué equipo está en cada posición y qué rivales tiene."""
+        return (tuple(t.name for t in estado.teams), tuple(estado.bits.rival_mask))
+
+    def cubre(self, estado) -> bool:
+        """True si el último testigo contiene todos los emparejamientos de estado."""
+        testigo = self.testigo
+        if testigo is None:
+            return False
+        return all(not (m & ~t) for m, t in zip(estado.bits.rival_mask, testigo))
+
+    def factible(self, estado) -> bool:
+        """True si el sorteo parcial de estado puede completarse."""
+        k = self.clave(estado)
+        cached = self.cache.get(k)
+        if cached is not None:
+            self.cache.move_to_end(k)
+            self.hits += 1
+            if cached is False:
+                return False
+            self.testigo = cached
+            return True
+
+        self.misses += 1
+        resultado = self._buscar(estado, self.max_nodos, self.reinicios)
+        if resultado is None:
+            # No sabemos: más nodos y, si tampoco basta, búsqueda completa
+            self.desconocidos += 1
+            max_nodos = self.max_nodos
+            for _ in range(ESCALADOS):
+                max_nodos *= FACTOR_ESCALADO
+                resultado = self._buscar(estado, max_nodos, self.reinicios)
+                if resultado is not None:
+                    break
+            else:
+                resultado = self._buscar(estado, None, 0)
+
+        # En caché: False, o el testigo si es factible
+        self.cache[k] = self.testigo if resultado else False
+        if len(self.cache) > self.max_entradas:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+        return resultado
+
+    def _buscar(self, estado, max_nodos, reinicios):
+        """
+        Completa el sorteo desde el estado parcial y lo deja como estaba.
+        True/False, o None si todos los intentos agotan max_nodos (con
+        max_nodos=None la búsqueda es completa y nunca devuelve None).
+        """
+        store = DomainStore(estado)
+        edge_no = sum(estado.deg) // 2
+
+        for _ in range(reinicios + 1):
+            if max_nodos is not None:
+                estado.max_calls = estado.calls + max_nodos
+            try:
+                found = search_dominios(store, edge_no, rng=self.rng, por_bombo=True)
+                if found:
+                    self.testigo = tuple(estado.bits.rival_mask)
+                return found
+            except LimiteNodos:
+                continue
+            finally:
+                estado.max_calls = None
+                store.deshacer_todo()
+
+        return None
+
+
+@dataclass
+class Ceremonia:
+    """Resultado de una ceremonia simulada."""
+
+    estado: DrawState
+    # pasos[k] = (equipo, rival, ms) en el orden en que se sortearon
+    pasos: list = field(default_factory=list)
+
+    @property
+    def max_ms(self) -> float:
+        return max((ms for _, _, ms in self.pasos), default=0.0)
+
+
+def simular_ceremonia(teams, rng, oraculo: OraculoFactibilidad) -> Ceremonia:
+    """Simula la ceremonia completa sobre unos bombos ya fijados."""
+    estado = DrawState(teams, backend="bitset")
+    cer = Ceremonia(estado)
+    bits = estado.bits
+
+    if not bombos_viables(teams) or not oraculo.factible(estado):
+        raise RuntimeError("Estos bombos no admiten ningún sorteo válido.")
+
+    bombos = sorted({t.pot for t in teams})
+    por_bombo, partidos = estado.formato.por_bombo, estado.formato.partidos
+    for p in bombos:
+        orden = list(iter_bits(bits.pot_mask[p]))
+        rng.shuffle(orden)
+
+        for i in orden:
+            for q in bombos:
+                while estado.pot_count[i][q] < por_bombo and estado.deg[i] < partidos:
+                    t0 = time.perf_counter()
+                    candidatos = list(iter_bits(bits.candidates_mask(i) & bits.pot_mask[q]))
+                    rng.shuffle(candidatos)
+
+                    for j in candidatos:
+                        estado.add_edge(i, j)
+                        if oraculo.cubre(estado) or oraculo.factible(estado):
+                            break
+                        estado.remove_edge(i, j)
+                    else:
+                        raise RuntimeError(
+                            f"Sin rival factible para {teams[i].name} en el bombo {q}"
+                        )
+
+                    cer.pasos.append((i, j, (time.perf_counter() - t0) * 1000))
+
+    return cer
+
+
+def _lote_bloque(semilla_bombos: int, semillas):
+    """Trabajo de un proceso: ceremonias de un bloque con un oráculo propio."""
+    from montecarlo import ResultadoMC, acumular_sorteo
+
+    teams = load_teams(random.Random(semilla_bombos))
+    oraculo = OraculoFactibilidad(seed=semillas[0] if semillas else 0)
+    res = ResultadoMC.vacio()
+
+    for seed in semillas:
+        cer = simular_ceremonia(teams, random.Random(seed), oraculo)
+        res.resueltos += 1
+        acumular_sorteo(res, cer.estado)
+
+    stats = (oraculo.hits, oraculo.misses, oraculo.evictions, oraculo.desconocidos)
+    return res, stats
+
+
+def simular_lote(n: int, semilla_bombos: int = 0, semilla: int = 0, procesos=None, bloque: int = 250):
+    """
+    n ceremonias sobre los mismos bombos (los de semilla_bombos), repartidas
+    en bloques sobre un pool de procesos. Dentro de cada bloque se reutiliza
+    la caché del oráculo. Devuelve (ResultadoMC, [hits, misses, evictions, desconocidos]).
+    """
+    from montecarlo import ResultadoMC
+
+    semillas = range(semilla, semilla + n)
+    bloques = [semillas[k:k + bloque] for k in range(0, n, bloque)]
+
+    total = ResultadoMC.vacio()
+    stats = [0, 0, 0, 0]
+    if procesos == 1:
+        parciales = (_lote_bloque(semilla_bombos, b) for b in bloques)
+        for res, st in parciales:
+            total.sumar(res)
+            stats = [a + b for a, b in zip(stats, st)]
+        return total, stats
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for res, st in pool.map(_lote_bloque, [semilla_bombos] * len(bloques), bloques):
+            total.sumar(res)
+            stats = [a + b for a, b in zip(stats, st)]
+    return total, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación del sorteo UEFA bola a bola")
+    parser.add_argument("--semilla-bombos", type=int, default=0)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--lote", type=int, default=0, help="nº de ceremonias en modo lote")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--salida", help="fichero .npz para los resultados del lote")
+    args = parser.parse_args()
+
+    teams = load_teams(random.Random(args.semilla_bombos))
+    if not bombos_viables(teams):
+        print(f"Los bombos de la semilla {args.semilla_bombos} no admiten ningún sorteo válido.")
+        return 1
+
+    if args.lote:
+        t0 = time.perf_counter()
+        try:
+            res, (hits, misses, evictions, desconocidos) = simular_lote(
+                args.lote, args.semilla_bombos, args.semilla, args.procesos
+            )
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            return 1
+        dt = time.perf_counter() - t0
+        print(f"{args.lote} ceremonias en {dt:.1f} s ({dt / args.lote * 1000:.1f} ms/ceremonia)")
+        print(
+            f"Oráculo: {hits} hits, {misses} misses, "
+            f"{evictions} evictions, {desconocidos} desconocidos"
+        )
+        if args.salida:
+            res.guardar(args.salida)
+        return 0
+
+    oraculo = OraculoFactibilidad(seed=args.semilla)
+    try:
+        cer = simular_ceremonia(teams, random.Random(args.semilla), oraculo)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+
+    for i, j, ms in cer.pasos:
+        ti, tj = teams[i], teams[j]
+        print(f"B{ti.pot} {ti.name:22s} → B{tj.pot} {tj.name:22s} ({ms:5.1f} ms)")
+
+    print(f"\nPasos: {len(cer.pasos)} | paso más lento: {cer.max_ms:.1f} ms")
+    print(
+        f"Oráculo: {oraculo.hits} hits, {oraculo.misses} misses, "
+        f"{oraculo.evictions} evictions, {oraculo.desconocidos} desconocidos"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,61 +1,140 @@
-"""Estado global del sorteo: adyacencias, grados y contadores auxiliares."""
+"""Estado de un sorteo: adyacencias, grados y contadores auxiliares."""
 
+import random
 from collections import defaultdict
+from functools import lru_cache
 from data import load_teams
-from config import N_MATCHES, PER_POT
+from config import BACKEND_ESTADO, ROMPER_SIMETRIA
+from constraints import clases_equivalencia
+from bitset_state import BitsetState
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(n: int):
+    """Clave aleatoria de 64 bits para cada par (i, j), simétrica y fija para cada n."""
+    rng = random.Random(0x5EED + n)
+    keys = [[0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            keys[i][j] = keys[j][i] = rng.getrandbits(64)
+    return keys
+
+
+class DrawState:
+    """
+    Todo lo que cambia durante un sorteo, para poder resolver varios en el
+    mismo proceso (o en hilos distintos) sin estado global compartido.
+    """
+
+    def __init__(self, teams, backend: str = BACKEND_ESTADO, formato=None):
+        self.teams = teams
+        self.n = len(teams)
+        n = self.n
 
-# Cargar equipos (con bombos ya aleatorios)
-teams = load_teams()
-n = len(teams)
+        # Formato de la liga (formato.py); por defecto, el de la temporada activa
+        if formato is None:
+            from temporada import cargar_temporada
 
-# Lista de rivales de cada equipo
-adj = [set() for _ in range(n)]
+            formato = cargar_temporada().formato
+        self.formato = formato
+        if n != formato.n_equipos:
+            raise ValueError(f"{n} equipos no encajan en el formato {formato.nombre} ({formato.n_equipos}): pasa formato")
 
-# Grado (número de rivales)
-deg = [0] * n
+        # Lista de rivales de cada equipo
+        self.adj = [set() for _ in range(n)]
 
-# pot_count[i][p] = rivales del bombo p
-pot_count = [[0] * 5 for _ in range(n)]  # índice 0 no usado
+        # Grado (número de rivales)
+        self.deg = [0] * n
 
-# country_count[i][country] = nº de rivales de ese país (sea propio o extranjero)
-country_count = [defaultdict(int) for _ in range(n)]
+        # pot_count[i][p] = rivales del bombo p
+        self.pot_count = [[0] * (formato.n_bombos + 1) for _ in range(n)]  # índice 0 no usado
 
-# Número total de emparejamientos
-E = n * N_MATCHES // 2
+        # country_count[i][country] = nº de rivales de ese país (sea propio o extranjero)
+        self.country_count = [defaultdict(int) for _ in range(n)]
 
+        # Misma información en forma de máscaras de bits (backend "bitset")
+        self.bits = BitsetState(teams, formato)
 
-def add_edge(i: int, j: int) -> None:
-    """Añade un emparejamiento (i, j)."""
-    adj[i].add(j)
-    adj[j].add(i)
+        # Representación usada por compute_candidates ("sets" o "bitset")
+        self.backend = backend
 
-    deg[i] += 1
-    deg[j] += 1
+        # Número total de emparejamientos
+        self.E = formato.n_aristas
 
-    pi, pj = teams[i].pot, teams[j].pot
-    pot_count[i][pj] += 1
-    pot_count[j][pi] += 1
+        # Número de llamadas recursivas del solver sobre este estado
+        self.calls = 0
 
-    # Contamos SIEMPRE el país del rival
-    ci, cj = teams[i].country, teams[j].country
-    country_count[i][cj] += 1
-    country_count[j][ci] += 1
+        # Límite opcional de llamadas (lo fija solver.resolver)
+        self.max_calls = None
 
+        # Clases de equipos intercambiables (bombo, país) para romper simetrías:
+        # podas_simetria cuenta los candidatos que el solver se salta por ellas
+        self.clase = clases_equivalencia(teams)
+        self.simetria = ROMPER_SIMETRIA
+        self.podas_simetria = 0
 
-def remove_edge(i: int, j: int) -> None:
-    """Elimina el emparejamiento (i, j)."""
-    if j in adj[i]:
-        adj[i].remove(j)
-    if i in adj[j]:
-        adj[j].remove(i)
+        # Instrumentación opcional de search (instrumentacion.py); None = apagada
+        self.instr = None
 
-    deg[i] -= 1
-    deg[j] -= 1
+        # Hash Zobrist del conjunto de emparejamientos actual
+        self.zobrist = zobrist_keys(n)
+        self.hash = 0
 
-    pi, pj = teams[i].pot, teams[j].pot
-    pot_count[i][pj] -= 1
-    pot_count[j][pi] -= 1
+    def vaciar(self) -> None:
+        """Elimina todos los emparejamientos (conserva equipos y contador de llamadas)."""
+        for i in range(self.n):
+            self.adj[i].clear()
+            self.deg[i] = 0
+            self.pot_count[i][:] = [0] * (self.formato.n_bombos + 1)
+            self.country_count[i].clear()
+        self.bits.reset(self.teams)
+        self.hash = 0
 
-    ci, cj = teams[i].country, teams[j].country
-    country_count[i][cj] -= 1
-    country_count[j][ci] -= 1
+    def add_edge(self, i: int, j: int) -> None:
+        """Añade un emparejamiento (i, j)."""
+        teams = self.teams
+        self.adj[i].add(j)
+        self.adj[j].add(i)
+
+        self.deg[i] += 1
+        self.deg[j] += 1
+
+        pi, pj = teams[i].pot, teams[j].pot
+        self.pot_count[i][pj] += 1
+        self.pot_count[j][pi] += 1
+
+        # Contamos SIEMPRE el país del rival
+        ci, cj = teams[i].country, teams[j].country
+        self.country_count[i][cj] += 1
+        self.country_count[j][ci] += 1
+
+        self.bits.add_edge(i, j, self.deg, self.pot_count, self.country_count)
+        self.hash ^= self.zobrist[i][j]
+
+    def remove_edge(self, i: int, j: int) -> None:
+        """Elimina el emparejamiento (i, j)."""
+        teams = self.teams
+        self.adj[i].discard(j)
+        self.adj[j].discard(i)
+
+        self.deg[i] -= 1
+        self.deg[j] -= 1
+
+        pi, pj = teams[i].pot, teams[j].pot
+        self.pot_count[i][pj] -= 1
+        self.pot_count[j][pi] -= 1
+
+        ci, cj = teams[i].country, teams[j].country
+        self.country_count[i][cj] -= 1
+        self.country_count[j][ci] -= 1
+
+        self.bits.remove_edge(i, j, self.deg, self.pot_count, self.country_count)
+        self.hash ^= self.zobrist[i][j]
+
+
+def nuevo_sorteo(backend: str = BACKEND_ESTADO, temporada=None) -> DrawState:
+    """Crea un DrawState vacío con bombos aleatorios (de la temporada activa o de temporada)."""
+    from temporada import cargar_temporada
+
+    tabla = cargar_temporada(temporada)
+    return DrawState(load_teams(temporada=tabla), backend=backend, formato=tabla.formato)
@@ -0,0 +1,128 @@
+"""
+Datos de una temporada (equipos, países, bombos y ciudades)
+leídos de un fichero JSON de temporadas/ y compilados en una tabla.
+
+El fichero solo se lee la primera vez que alguien pide la tabla
+(cargar_temporada); importar este módulo, data o config no toca el disco.
+La temporada por defecto es config.TEMPORADA y se puede cambiar sin tocar
+código con la variable de entorno CHAMPIONS_TEMPORADA, que admite un
+nombre de temporadas/ ("2025-26") o la ruta de un .json.
+
+Formato del fichero:
+
+    {"temporada": "2025-26",
+     "formato": "champions",
+     "equipos": [{"nombre": ..., "pais": ..., "bombo": 1,
+                  "ciudad": "Madrid"}, ...]}
+
+formato es el nombre de un formato de formato.FORMATOS o un objeto con
+sus campos (Formato.a_dict); si falta, "champions". Los equipos y bombos
+tienen que cuadrar con él. ciudad es opcional (null o ausente) y solo
+hace falta para los equipos que comparten ciudad con otro. Los
+coeficientes UEFA no se guardan: los bombos vienen dados y el sorteo no
+los usa. El orden de los equipos es el índice canónico de la temporada
+(el que barajan los bombos aleatorios), así que no conviene reordenarlos.
+"""
+
+import os
+import random
+from functools import lru_cache
+
+from config import TEMPORADA
+from formato import obtener_formato
+
+CARPETA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "temporadas")
+
+
+class Temporada:
+    """Tabla compilada de una temporada: tuplas paralelas indexadas por equipo."""
+
+    __slots__ = (
+        "nombre", "nombres", "paises", "bombos", "ciudades",
+        "indice", "pais", "ciudad", "lista_paises", "indice_pais", "n_bombos",
+        "formato",
+    )
+
+    def __init__(self, nombre, equipos, formato="champions"):
+        self.nombre = nombre
+        self.nombres = tuple(e["nombre"] for e in equipos)
+        self.paises = tuple(e["pais"] for e in equipos)
+        self.bombos = tuple(int(e["bombo"]) for e in equipos)
+        self.ciudades = tuple(e.get("ciudad") for e in equipos)
+
+        if len(set(self.nombres)) != len(self.nombres):
+            raise ValueError(f"Temporada {nombre}: equipos repetidos")
+
+        # Accesos por nombre
+        self.indice = {n: k for k, n in enumerate(self.nombres)}
+        self.pais = dict(zip(self.nombres, self.paises))
+        self.ciudad = {n: c for n, c in zip(self.nombres, self.ciudades) if c is not None}
+
+        self.lista_paises = tuple(sorted(set(self.paises)))
+        self.indice_pais = {c: k for k, c in enumerate(self.lista_paises)}
+        self.n_bombos = max(self.bombos)
+
+        self.formato = obtener_formato(formato)
+        f = self.formato
+        por_bombo = [self.bombos.count(p) for p in range(1, f.n_bombos + 1)]
+        if len(self.nombres) != f.n_equipos or self.n_bombos != f.n_bombos or set(por_bombo) != {f.tam_bombo}:
+            raise ValueError(
+                f"Temporada {nombre}: {len(self.nombres)} equipos en bombos de {por_bombo} "
+                f"no encajan en el formato {f.nombre} ({f.n_bombos} bombos de {f.tam_bombo})"
+            )
+
+    def __len__(self) -> int:
+        return len(self.nombres)
+
+    def __repr__(self) -> str:
+        return f"Temporada({self.nombre!r}, {len(self)} equipos, {self.n_bombos} bombos)"
+
+
+def ruta_temporada(nombre: str) -> str:
+    """Ruta del fichero de la temporada nombre (o nombre tal cual si ya es un .json)."""
+    if nombre.endswith(".json"):
+        return nombre
+    return os.path.join(CARPETA, f"{nombre}.json")
+
+
+@lru_cache(maxsize=None)
+def _compilar(ruta: str) -> Temporada:
+    import json
+
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    return Temporada(
+        datos.get("temporada", os.path.basename(ruta)), datos["equipos"], datos.get("formato", "champions")
+    )
+
+
+def cargar_temporada(nombre=None) -> Temporada:
+    """
+    Tabla de la temporada nombre (por defecto CHAMPIONS_TEMPORADA o
+    config.TEMPORADA). Una Temporada ya construida (temporada_sintetica) se
+    devuelve tal cual.
+    """
+    if isinstance(nombre, Temporada):
+        return nombre
+    if nombre is None:
+        nombre = os.environ.get("CHAMPIONS_TEMPORADA", TEMPORADA)
+    return _compilar(os.path.abspath(ruta_temporada(nombre)))
+
+
+def temporada_sintetica(formato, semilla: int = 0, equipos_por_pais: int = 4) -> Temporada:
+    """
+    Temporada inventada para un formato (p. ej. formato.formato_sintetico(128)):
+    equipos "Equipo 001", ... repartidos en países "P01", ... de
+    equipos_por_pais equipos (como mucho la mitad de un bombo, para que
+    cualquier reparto aleatorio de bombos sea viable).
+    """
+    f = obtener_formato(formato)
+    por_pais = max(1, min(equipos_por_pais, f.tam_bombo // 2))
+    rng = random.Random(semilla)
+    paises = [f"P{k // por_pais + 1:02d}" for k in range(f.n_equipos)]
+    rng.shuffle(paises)
+    equipos = [
+        {"nombre": f"Equipo {k + 1:03d}", "pais": paises[k], "bombo": k // f.tam_bombo + 1}
+        for k in range(f.n_equipos)
+    ]
+    return Temporada(f"{f.nombre} (sintética)", equipos, f)
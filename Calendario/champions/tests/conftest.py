@@ -0,0 +1,59 @@
+"""
+Configuración común de los tests.
+
+Los módulos del proyecto se importan planos (como al ejecutar los
+scripts desde Calendario/champions), así que se añade ese directorio al
+path. errores_sorteo comprueba las reglas del sorteo directamente sobre
+las listas de rivales, sin usar los contadores del estado.
+"""
+
+import os
+import random
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _errores_sorteo(teams, adj, formato):
+    """Lista de reglas incumplidas por el sorteo (vacía si es válido)."""
+    errores = []
+    for i, t in enumerate(teams):
+        rivales = list(adj[i])
+        if len(rivales) != formato.partidos or len(set(rivales)) != len(rivales):
+            errores.append(f"{t.name}: {len(rivales)} rivales")
+        for j in rivales:
+            if i not in adj[j]:
+                errores.append(f"{t.name} - {teams[j].name} no es simétrico")
+        por_bombo = Counter(teams[j].pot for j in rivales)
+        for p in range(1, formato.n_bombos + 1):
+            if por_bombo[p] != formato.por_bombo:
+                errores.append(f"{t.name}: {por_bombo[p]} rivales del bombo {p}")
+        for pais, k in Counter(teams[j].country for j in rivales).items():
+            limite = formato.limite_mismo_pais(pais) if pais == t.country else formato.max_por_pais
+            if k > limite:
+                errores.append(f"{t.name}: {k} rivales de {pais}")
+    return errores
+
+
+@pytest.fixture
+def errores_sorteo():
+    return _errores_sorteo
+
+
+@pytest.fixture
+def sorteo_champions():
+    """Crea un sorteo resuelto de la Champions con los bombos de una semilla."""
+    from data import load_teams
+    from solver import resolver
+    from state import DrawState
+
+    def crear(semilla: int):
+        rng = random.Random(semilla)
+        estado = DrawState(load_teams(rng), backend="bitset")
+        assert resolver(estado, max_nodos=1000, rng=rng, reinicios=50)
+        return estado
+
+    return crear
@@ -0,0 +1,107 @@
+"""Ida y vuelta de archivo_sorteos: Champions y una liga de más de 256 equipos."""
+
+import random
+
+import numpy as np
+import pytest
+
+import archivo_sorteos as archivo
+from data import load_teams
+from fixtures import asignar_local_visitante, generar_partidos_unicos
+from formato import formato_sintetico
+from league_calendar import generate_league_calendar
+from solver import resolver
+from state import DrawState
+from temporada import cargar_temporada, temporada_sintetica
+
+
+def _sorteos(tabla, semillas, por_bombo=False):
+    """Sorteos resueltos con calendario: (semilla, estado, partidos, calendario)."""
+    sorteos = []
+    for semilla in semillas:
+        rng = random.Random(semilla)
+        estado = DrawState(load_teams(rng, tabla), backend="bitset", formato=tabla.formato)
+        assert resolver(estado, max_nodos=7 * estado.E, rng=rng, reinicios=50, por_bombo=por_bombo)
+        partidos = asignar_local_visitante(estado, generar_partidos_unicos(estado), rng)
+        sorteos.append((semilla, estado, partidos, generate_league_calendar(partidos, semilla)))
+    return sorteos
+
+
+def _ida_y_vuelta(ruta, tabla, sorteos):
+    """Escribe los sorteos en dos lotes y los vuelve a leer."""
+    registros = archivo.nuevos_registros(len(sorteos), len(tabla), tabla.formato.n_aristas)
+    for registro, (semilla, estado, partidos, calendario) in zip(registros, sorteos):
+        archivo.rellenar_registro(registro, estado, partidos, tabla.indice, calendario, semilla, 1.5)
+    archivo.agregar(ruta, registros[:1], tabla.nombre)
+    archivo.agregar(ruta, registros[1:], tabla.nombre)
+    return archivo.abrir(ruta)
+
+
+def _comprobar(leidos, tabla, sorteos):
+    assert len(leidos) == len(sorteos)
+    for r, (semilla, estado, partidos, calendario) in zip(leidos, sorteos):
+        assert int(r["semilla"]) == semilla
+        assert int(r["nodos"]) == estado.calls
+        assert float(r["ms"]) == 1.5
+        assert r["bombo"].tolist() == [
+            next(t.pot for t in estado.teams if t.name == nombre) for nombre in tabla.nombres
+        ]
+        # Partidos y jornadas, traducidos de vuelta a nombres
+        nombres = tabla.nombres
+        leidos_por_jornada = {}
+        for (local, visitante), jornada in zip(r["partidos"].tolist(), r["jornada"].tolist()):
+            leidos_por_jornada.setdefault(jornada, set()).add((nombres[local], nombres[visitante]))
+        esperados = {
+            j: {(estado.teams[a].name, estado.teams[b].name) for a, b in ps}
+            for j, ps in calendario.items()
+        }
+        assert leidos_por_jornada == esperados
+        assert sum(len(ps) for ps in esperados.values()) == len(partidos)
+
+
+def test_champions(tmp_path):
+    tabla = cargar_temporada()
+    sorteos = _sorteos(tabla, [3, 4, 5])
+    ruta = str(tmp_path / "sorteos.bin")
+    leidos = _ida_y_vuelta(ruta, tabla, sorteos)
+
+    assert archivo.leer_cabecera(ruta) == (tabla.nombre, len(tabla), tabla.formato.n_aristas)
+    assert leidos.dtype["bombo"].base == np.dtype("<u1")
+    _comprobar(leidos, tabla, sorteos)
+
+    # calendarios y orientaciones leen los mismos partidos
+    cal = archivo.calendarios(leidos)
+    assert cal.shape == (3, 8, tabla.formato.n_aristas // 8, 2)
+    orientacion = archivo.orientaciones(leidos)
+    assert orientacion.sum() == 3 * tabla.formato.n_aristas
+    for s in range(3):
+        assert orientacion[s][cal[s, ..., 0], cal[s, ..., 1]].all()
+
+
+def test_mas_de_256_equipos(tmp_path):
+    tabla = temporada_sintetica(formato_sintetico(260), 0)
+    sorteos = _sorteos(tabla, [0, 1], por_bombo=True)
+    ruta = str(tmp_path / "grande.bin")
+    leidos = _ida_y_vuelta(ruta, tabla, sorteos)
+
+    assert archivo.leer_cabecera(ruta) == (tabla.nombre, 260, tabla.formato.n_aristas)
+    assert leidos.dtype["partidos"].base == np.dtype("<u2")
+    # Los índices por encima de 255 no se truncan
+    assert int(leidos["partidos"].max()) == 259
+    _comprobar(leidos, tabla, sorteos)
+
+
+def test_ancho_indice():
+    assert archivo.ancho_indice(256) == 1
+    assert archivo.ancho_indice(257) == 2
+    assert archivo.ancho_indice(65536) == 2
+    with pytest.raises(ValueError):
+        archivo.ancho_indice(65537)
+
+
+def test_agregar_con_otro_tamano(tmp_path):
+    ruta = str(tmp_path / "sorteos.bin")
+    archivo.agregar(ruta, archivo.nuevos_registros(1, 36), "2025-26")
+    with pytest.raises(ValueError):
+        archivo.agregar(ruta, archivo.nuevos_registros(1, 260, 1040), "2025-26")
+    assert len(archivo.abrir(ruta)) == 1
@@ -0,0 +1,57 @@
+"""Cada paso de la cadena de intercambios deja un sorteo válido."""
+
+import random
+
+import pytest
+
+from cadena_intercambios import CadenaIntercambios
+from data import load_teams
+from formato import obtener_formato
+from solver import resolver
+from state import DrawState
+from temporada import temporada_sintetica
+
+PASOS = 400
+
+
+def _pares(sorteo):
+    return {frozenset((i, j)) for i, rivales in enumerate(sorteo.adj) for j in rivales}
+
+
+def _comprobar_pasos(cadena, formato, errores_sorteo):
+    antes = cadena.sorteo()
+    for _ in range(PASOS):
+        aplicado = cadena.paso()
+        ahora = cadena.sorteo()
+        if aplicado:
+            assert errores_sorteo(ahora.teams, ahora.adj, formato) == []
+            # Un intercambio doble: salen dos emparejamientos y entran dos
+            assert len(_pares(antes) - _pares(ahora)) == 2
+            assert len(_pares(ahora) - _pares(antes)) == 2
+        else:
+            assert ahora.adj == antes.adj
+        antes = ahora
+
+    # Las aristas y los contadores por país siguen a las máscaras de rivales
+    assert {frozenset(e) for e in cadena.aristas} == _pares(antes)
+    for i, rivales in enumerate(antes.adj):
+        cuenta = [0] * len(cadena.cuenta_pais[i])
+        for j in rivales:
+            cuenta[cadena.pais[j]] += 1
+        assert cadena.cuenta_pais[i] == cuenta
+    assert cadena.aceptados > 0
+
+
+@pytest.mark.parametrize("semilla", [3, 4])
+def test_champions(sorteo_champions, errores_sorteo, semilla):
+    estado = sorteo_champions(semilla)
+    _comprobar_pasos(CadenaIntercambios(estado, random.Random(semilla)), estado.formato, errores_sorteo)
+
+
+@pytest.mark.parametrize("formato", ["europa", "sintetico-64"])
+def test_otros_formatos(errores_sorteo, formato):
+    tabla = temporada_sintetica(obtener_formato(formato), 0)
+    rng = random.Random(0)
+    estado = DrawState(load_teams(rng, tabla), backend="bitset", formato=tabla.formato)
+    assert resolver(estado, max_nodos=7 * estado.E, rng=rng, reinicios=50, por_bombo=True)
+    _comprobar_pasos(CadenaIntercambios(estado, rng), estado.formato, errores_sorteo)
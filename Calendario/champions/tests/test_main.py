@@ -0,0 +1,96 @@
+"""El calendario que imprime main coincide con su lista de partidos."""
+
+import json
+import random
+from collections import Counter
+
+import pytest
+
+import main
+
+# Semilla de los bombos (main usa el random global) que se resuelve rápido
+SEMILLA = 3
+
+
+@pytest.fixture
+def ejecutar_main(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def ejecutar(*argumentos):
+        ruta = tmp_path / "salida.txt"
+        random.seed(SEMILLA)
+        assert main.main(["--salida", str(ruta), *argumentos]) is True
+        return ruta.read_text(encoding="utf-8")
+
+    return ejecutar
+
+
+def _bloques(texto):
+    """Partidos (local, visitante) de la lista final, de los listados por equipo y del calendario."""
+    lista, por_equipo, calendario = [], [], {}
+    seccion = jornada = None
+    for linea in texto.splitlines():
+        if "LISTA FINAL DE PARTIDOS" in linea:
+            seccion = "lista"
+        elif "PARTIDOS POR EQUIPO" in linea:
+            seccion = "equipos"
+        elif "CALENDARIO UEFA" in linea:
+            seccion = "calendario"
+        elif linea.startswith("TOTAL PARTIDOS") or linea.startswith("Rupturas"):
+            seccion = None
+        elif linea.startswith("----- Jornada"):
+            jornada = int(linea.split()[2])
+            calendario[jornada] = []
+        elif seccion == "lista" and " (LOCAL)  vs  " in linea:
+            local, visitante = linea.split(" (LOCAL)  vs  ")
+            lista.append((local.strip(), visitante.strip()))
+        elif seccion == "equipos" and "   (LOCAL " in linea:
+            partido, local = linea.split("   (LOCAL ")
+            a, b = partido.split("  -  ")
+            assert a == local[:-1]
+            por_equipo.append((a, b))
+        elif seccion == "calendario" and " vs " in linea:
+            local, visitante = linea.split(" vs ")
+            calendario[jornada].append((local.strip(), visitante.strip()))
+    return lista, por_equipo, calendario
+
+
+def test_texto(ejecutar_main):
+    texto = ejecutar_main()
+    assert "❌" not in texto
+    lista, por_equipo, calendario = _bloques(texto)
+
+    assert len(lista) == len(set(lista)) == 144
+    assert f"TOTAL PARTIDOS: {len(lista)}" in texto
+
+    # Cada partido sale una vez en el listado de cada uno de sus dos equipos
+    assert Counter(por_equipo) == Counter({p: 2 for p in lista})
+
+    # Calendario: las mismas orientaciones, 8 jornadas y cada equipo una vez por jornada
+    assert sorted(calendario) == list(range(1, 9))
+    assert sorted(p for ps in calendario.values() for p in ps) == sorted(lista)
+    for partidos in calendario.values():
+        equipos = [t for p in partidos for t in p]
+        assert len(equipos) == len(set(equipos)) == 36
+
+    # Ocho partidos por equipo, cuatro en casa
+    assert Counter(t for p in lista for t in p) == Counter({t: 8 for p in lista for t in p})
+    assert set(Counter(local for local, _ in lista).values()) == {4}
+
+
+def test_jsonl(ejecutar_main):
+    """Los partidos del jsonl son un calendario del mismo sorteo que el del texto."""
+    lista, _, _ = _bloques(ejecutar_main())
+    filas = [json.loads(linea) for linea in ejecutar_main("--formato", "jsonl").splitlines()]
+
+    # El sorteo sale de random.seed; el calendario y las rupturas no, así
+    # que solo se comparan los emparejamientos sin orientar
+    partidos = [f for f in filas if f["tipo"] == "partido"]
+    assert {frozenset((f["local"], f["visitante"])) for f in partidos} == {frozenset(p) for p in lista}
+    assert len(partidos) == 144
+    for j in range(1, 9):
+        equipos = [t for f in partidos if f["jornada"] == j for t in (f["local"], f["visitante"])]
+        assert len(equipos) == len(set(equipos)) == 36
+
+    assert all(f["ok"] for f in filas if f["tipo"] == "equipo")
+    assert filas[-1]["tipo"] == "resumen" and filas[-1]["ok"] is True
@@ -0,0 +1,73 @@
+"""reparar respeta los emparejamientos fijados y prohibidos."""
+
+import copy
+import random
+
+import pytest
+
+from reparacion import reparar
+
+
+def _pares(estado):
+    teams = estado.teams
+    return {
+        frozenset((teams[i].name, teams[j].name))
+        for i, rivales in enumerate(estado.adj) for j in rivales if i < j
+    }
+
+
+def _restricciones(estado, rng, n_prohibidos, n_fijados):
+    """Prohíbe emparejamientos del sorteo y fija otros que no están (de países distintos)."""
+    teams, adj = estado.teams, estado.adj
+    prohibidos, fijados = [], []
+    while len(prohibidos) < n_prohibidos:
+        i = rng.randrange(estado.n)
+        j = rng.choice(sorted(adj[i]))
+        par = (teams[i].name, teams[j].name)
+        if frozenset(par) not in map(frozenset, prohibidos):
+            prohibidos.append(par)
+    while len(fijados) < n_fijados:
+        i, j = rng.sample(range(estado.n), 2)
+        par = (teams[i].name, teams[j].name)
+        if (
+            teams[i].country != teams[j].country and j not in adj[i]
+            and frozenset(par) not in map(frozenset, fijados)
+        ):
+            fijados.append(par)
+    return prohibidos, fijados
+
+
+@pytest.mark.parametrize("n_prohibidos, n_fijados", [(1, 0), (0, 1), (2, 2)])
+@pytest.mark.parametrize("semilla", [3, 4, 5, 11])
+def test_fijados_y_prohibidos(sorteo_champions, errores_sorteo, semilla, n_prohibidos, n_fijados):
+    estado = sorteo_champions(semilla)
+    original = copy.deepcopy(estado.adj)
+    prohibidos, fijados = _restricciones(estado, random.Random(semilla), n_prohibidos, n_fijados)
+
+    rep = reparar(estado, fijados, prohibidos, rng=random.Random(semilla))
+    assert rep is not None
+    nuevo = rep.estado
+    assert errores_sorteo(nuevo.teams, nuevo.adj, nuevo.formato) == []
+
+    pares = _pares(nuevo)
+    assert all(frozenset(p) in pares for p in fijados)
+    assert not any(frozenset(p) in pares for p in prohibidos)
+
+    # El original no se toca y quitados / anadidos son la diferencia
+    assert estado.adj == original
+    antes = _pares(estado)
+    assert {frozenset(p) for p in rep.quitados} == antes - pares
+    assert {frozenset(p) for p in rep.anadidos} == pares - antes
+
+
+def test_fijado_y_prohibido_a_la_vez(sorteo_champions):
+    estado = sorteo_champions(3)
+    a, b = estado.teams[0].name, estado.teams[sorted(estado.adj[0])[0]].name
+    with pytest.raises(ValueError):
+        reparar(estado, fijados=[(a, b)], prohibidos=[(b, a)])
+
+
+def test_equipo_desconocido(sorteo_champions):
+    estado = sorteo_champions(3)
+    with pytest.raises(ValueError):
+        reparar(estado, prohibidos=[(estado.teams[0].name, "No existe")])
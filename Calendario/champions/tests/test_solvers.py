@@ -0,0 +1,130 @@
+"""Las variantes del solver frente a search con bombos fijos (semillas de benchmark.py)."""
+
+import random
+
+import pytest
+
+import solver
+from backjumping import BusquedaCBJ
+from constraints import bombos_viables
+from data import load_teams
+from dominios import DomainStore
+from formato import obtener_formato
+from iterativo import BusquedaIterativa
+from state import DrawState
+from temporada import temporada_sintetica
+from transposicion import TablaTransposicion
+
+# Semillas que search resuelve en poco tiempo (las primeras de benchmark.SEMILLAS)
+SEMILLAS = [3, 4, 5]
+
+# Bombos sin solución (benchmark.SEMILLAS_IMPOSIBLES)
+SEMILLAS_IMPOSIBLES = [2, 8]
+
+
+def _estado(semilla: int, backend: str = "bitset") -> DrawState:
+    return DrawState(load_teams(random.Random(semilla)), backend=backend)
+
+
+def _firma(estado):
+    return [sorted(r) for r in estado.adj]
+
+
+@pytest.fixture(scope="module")
+def referencia():
+    """Sorteo de search (backend de conjuntos) por semilla."""
+    firmas = {}
+    for semilla in SEMILLAS:
+        estado = _estado(semilla, "sets")
+        assert solver.search(estado)
+        firmas[semilla] = _firma(estado)
+    return firmas
+
+
+def _dominios(estado):
+    return solver.search_dominios(DomainStore(estado))
+
+
+def _dominios_tt(estado):
+    return solver.search_dominios(DomainStore(estado), tabla=TablaTransposicion())
+
+
+def _iterativo(estado):
+    return BusquedaIterativa(estado).ejecutar()
+
+
+def _cbj(estado):
+    return BusquedaCBJ(DomainStore(estado)).buscar()
+
+
+# Con la MRV por equipos todas exploran el orden de search: mismo sorteo
+@pytest.mark.parametrize("variante", [_dominios, _dominios_tt, _iterativo, _cbj], ids=lambda f: f.__name__[1:])
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_mrv_por_equipos_da_el_sorteo_de_search(referencia, variante, semilla, errores_sorteo):
+    estado = _estado(semilla)
+    assert variante(estado) is True
+    assert errores_sorteo(estado.teams, estado.adj, estado.formato) == []
+    assert _firma(estado) == referencia[semilla]
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_variantes_por_bombo_coinciden(semilla, errores_sorteo):
+    """bombo, CBJ e iterativo con MRV por (equipo, bombo): mismo sorteo entre sí, válido."""
+    firmas = []
+    for buscar in (
+        lambda e: solver.search_dominios(DomainStore(e), por_bombo=True),
+        lambda e: BusquedaCBJ(DomainStore(e), por_bombo=True).buscar(),
+        lambda e: BusquedaIterativa(e, por_bombo=True).ejecutar(),
+    ):
+        estado = _estado(semilla)
+        assert buscar(estado) is True
+        assert errores_sorteo(estado.teams, estado.adj, estado.formato) == []
+        firmas.append(_firma(estado))
+    assert firmas[0] == firmas[1] == firmas[2]
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_pares_de_bombos_resuelve_lo_que_resuelve_search(semilla, errores_sorteo):
+    estado = _estado(semilla)
+    assert solver.resolver(estado, rng=random.Random(semilla), reinicios=50, modo="bombos") is True
+    assert errores_sorteo(estado.teams, estado.adj, estado.formato) == []
+
+
+@pytest.mark.parametrize("modo", ["clasico", "cbj", "bombos"])
+@pytest.mark.parametrize("semilla", SEMILLAS_IMPOSIBLES)
+def test_bombos_imposibles(modo, semilla):
+    estado = _estado(semilla)
+    assert not bombos_viables(estado.teams)
+    assert solver.resolver(estado, rng=random.Random(semilla), modo=modo) is False
+
+
+# Semilla de temporada_sintetica que ambos resuelven volviendo atrás
+SEMILLA_RNG = 6
+
+
+@pytest.mark.parametrize("por_bombo", [False, True])
+@pytest.mark.parametrize("formato", ["europa", "sintetico-64"])
+def test_iterativo_con_rng_sigue_a_search_dominios(formato, por_bombo, errores_sorteo):
+    """Con la misma semilla, el iterativo explora el mismo árbol aleatorio que search_dominios."""
+    tabla = temporada_sintetica(obtener_formato(formato), SEMILLA_RNG)
+    max_nodos = 20 * tabla.formato.n_aristas
+
+    def recursivo(estado, rng):
+        estado.max_calls = max_nodos
+        try:
+            return solver.search_dominios(DomainStore(estado), rng=rng, por_bombo=por_bombo)
+        except solver.LimiteNodos:
+            return None
+
+    def iterativo(estado, rng):
+        # El iterativo lleva su propia cuenta de nodos (ejecutar), no max_calls
+        return BusquedaIterativa(estado, rng, por_bombo).ejecutar(max_nodos)
+
+    firmas = []
+    for buscar in (recursivo, iterativo):
+        rng = random.Random(SEMILLA_RNG)
+        estado = DrawState(load_teams(rng, tabla), backend="bitset", formato=tabla.formato)
+        assert buscar(estado, rng) is True
+        assert errores_sorteo(estado.teams, estado.adj, estado.formato) == []
+        firmas.append((estado.calls, _firma(estado)))
+    assert firmas[0] == firmas[1]
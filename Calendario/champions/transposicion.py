@@ -0,0 +1,46 @@
+"""Tabla de transposición de estados fallidos para el backtracking."""
+
+from collections import OrderedDict
+
+
+class TablaTransposicion:
+    """
+    Conjunto acotado de hashes Zobrist (DrawState.hash) de estados parciales
+    ya demostrados sin solución. Si el solver llega al mismo conjunto de
+    emparejamientos por otro orden de add_edge, corta la rama sin explorarla.
+
+    Cuando se llena se expulsa la entrada usada hace más tiempo (LRU).
+    """
+
+    def __init__(self, max_entradas: int = 1_000_000):
+        self.max_entradas = max_entradas
+        self.tabla = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.tabla)
+
+    def es_fallo(self, h: int) -> bool:
+        """True si el estado con hash h ya se demostró sin solución."""
+        if h in self.tabla:
+            self.tabla.move_to_end(h)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def registrar_fallo(self, h: int) -> None:
+        """Anota que el estado con hash h no tiene solución."""
+        self.tabla[h] = None
+        self.tabla.move_to_end(h)
+        if len(self.tabla) > self.max_entradas:
+            self.tabla.popitem(last=False)
+            self.evictions += 1
+
+    def resumen(self) -> str:
+        return (
+            f"TT: {len(self.tabla)} entradas | {self.hits} hits | "
+            f"{self.misses} misses | {self.evictions} evictions"
+        )
@@ -0,0 +1,208 @@
+"""
+Validación vectorizada de muchos sorteos a la vez con NumPy.
+
+Los verificadores de main.py, verificador_partidos.py y
+verificar_calendario.py revisan un resultado cada vez e imprimen cada
+fallo. Aquí un lote de k sorteos se comprueba con reducciones sobre
+arrays, sin bucles de Python por sorteo:
+
+    adyacencia   (k, n, n) bool: adyacencia[s, a, b] = a y b se enfrentan
+    orientacion  (k, n, n) bool: orientacion[s, a, b] = a recibe a b en casa
+                 (alternativa a adyacencia: esta se deduce como o | oᵀ)
+    bombo        (n,) o (k, n) enteros: bombo de cada equipo (1..n_bombos)
+    pais         (n,) o (k, n) enteros: código de país de cada equipo
+    calendario   (k, J, P, 2) enteros: partido p de la jornada j como
+                 (local, visitante); en la Champions (k, 8, 18, 2)
+
+Las reglas (rivales, rivales por bombo, topes por país) son las del
+formato que se pase, por defecto el de la temporada activa. Para el
+límite de rivales del propio país, que puede depender del país
+(formato.limite_mismo_pais), nombres_paises[c] es el país del código c;
+por defecto, la lista alfabética de la temporada (la codificación de
+apilar_sorteos y de montecarlo.py).
+
+validar_lote devuelve (valido, codigos): valido es una máscara (k,) y
+codigos un entero por sorteo con un bit por cada regla incumplida (ver
+CODIGOS y describir). Los equipos son índices 0..n-1 comunes a todo el
+lote (p. ej. el índice canónico de la temporada, ver montecarlo.py).
+"""
+
+import numpy as np
+
+from temporada import cargar_temporada
+
+# Bits de los códigos de violación
+SIMETRIA = 1 << 0      # adyacencia no simétrica, bucles o partido orientado en ambos sentidos
+GRADO = 1 << 1         # algún equipo sin formato.partidos rivales
+POR_BOMBO = 1 << 2     # algún equipo sin formato.por_bombo rivales de cada bombo
+MISMO_PAIS = 1 << 3    # rival del propio país
+TOPE_PAIS = 1 << 4     # más de formato.max_por_pais rivales de un país extranjero
+CASA_FUERA = 1 << 5    # algún equipo sin formato.casa partidos en casa y fuera
+JORNADA = 1 << 6       # algún equipo no juega exactamente una vez en una jornada
+PARTIDOS = 1 << 7      # el calendario no contiene exactamente los partidos del sorteo
+
+CODIGOS = {
+    SIMETRIA: "simetria",
+    GRADO: "grado",
+    POR_BOMBO: "por_bombo",
+    MISMO_PAIS: "mismo_pais",
+    TOPE_PAIS: "tope_pais",
+    CASA_FUERA: "casa_fuera",
+    JORNADA: "jornada",
+    PARTIDOS: "partidos",
+}
+
+
+def _por_sorteo(x, k: int):
+    """Lleva un vector (n,) o (k, n) a forma (k, n)."""
+    x = np.asarray(x)
+    return np.broadcast_to(x, (k, x.shape[-1]))
+
+
+def _uno_caliente(x, n_clases: int):
+    """(k, n) enteros → (k, n, n_clases) en int32."""
+    return (x[..., None] == np.arange(n_clases)).astype(np.int32)
+
+
+def _matriz_de_partidos(calendario, n: int):
+    """(k, J, P, 2) → (k, n, n) con el nº de veces que aparece cada partido (local, visitante)."""
+    k = calendario.shape[0]
+    local = calendario[..., 0].reshape(k, -1)
+    visitante = calendario[..., 1].reshape(k, -1)
+    plano = (np.arange(k)[:, None] * n + local) * n + visitante
+    return np.bincount(plano.ravel(), minlength=k * n * n).reshape(k, n, n)
+
+
+def validar_lote(bombo, pais, adyacencia=None, orientacion=None, calendario=None, formato=None, nombres_paises=None):
+    """
+    Comprueba las reglas del sorteo (y, si se pasan, la orientación y el
+    calendario) de un lote de sorteos. Devuelve (valido, codigos).
+    """
+    if adyacencia is None and orientacion is None:
+        raise ValueError("Hace falta adyacencia u orientacion")
+    if formato is None:
+        formato = cargar_temporada().formato
+    if nombres_paises is None:
+        nombres_paises = cargar_temporada().lista_paises
+
+    if orientacion is not None:
+        orientacion = np.asarray(orientacion, dtype=bool)
+        doble = (orientacion & orientacion.transpose(0, 2, 1)).any(axis=(1, 2))
+        adyacencia = orientacion | orientacion.transpose(0, 2, 1)
+    else:
+        adyacencia = np.asarray(adyacencia, dtype=bool)
+        doble = np.zeros(adyacencia.shape[0], dtype=bool)
+
+    k, n, _ = adyacencia.shape
+    codigos = np.zeros(k, dtype=np.int32)
+    bombo = _por_sorteo(bombo, k)
+    pais = _por_sorteo(pais, k)
+    a = adyacencia.astype(np.int32)
+
+    # Simetría y diagonal
+    asimetrica = (adyacencia != adyacencia.transpose(0, 2, 1)).any(axis=(1, 2))
+    bucle = np.diagonal(adyacencia, axis1=1, axis2=2).any(axis=1)
+    codigos |= np.where(asimetrica | bucle | doble, SIMETRIA, 0)
+
+    # Grado
+    grado = a.sum(axis=2)
+    codigos |= np.where((grado != formato.partidos).any(axis=1), GRADO, 0)
+
+    # Rivales por bombo: (k, n, n_bombos)
+    n_bombos = int(bombo.max())
+    por_bombo = a @ _uno_caliente(bombo - 1, n_bombos)
+    codigos |= np.where((por_bombo != formato.por_bombo).any(axis=(1, 2)), POR_BOMBO, 0)
+
+    # Rivales por país: (k, n, n_paises); propio país frente a extranjeros
+    n_paises = int(pais.max()) + 1
+    por_pais = a @ _uno_caliente(pais, n_paises)
+    propios = np.take_along_axis(por_pais, pais[..., None], axis=2)[..., 0]
+    # Límite de cada código de país (los que no tienen nombre, el general)
+    limite_pais = np.array([
+        formato.limite_mismo_pais(nombres_paises[c] if c < len(nombres_paises) else None)
+        for c in range(n_paises)
+    ])
+    codigos |= np.where((propios > limite_pais[pais]).any(axis=1), MISMO_PAIS, 0)
+
+    extranjeros = np.where(_uno_caliente(pais, n_paises).astype(bool), 0, por_pais)
+    codigos |= np.where((extranjeros > formato.max_por_pais).any(axis=(1, 2)), TOPE_PAIS, 0)
+
+    # Casa / fuera
+    if orientacion is not None:
+        o = orientacion.astype(np.int32)
+        mitad = formato.casa
+        desequilibrado = (o.sum(axis=2) != mitad) | (o.sum(axis=1) != mitad)
+        codigos |= np.where(desequilibrado.any(axis=1), CASA_FUERA, 0)
+
+    # Calendario: cada equipo una vez por jornada y los mismos partidos que el sorteo
+    if calendario is not None:
+        calendario = np.asarray(calendario)
+        _, n_jornadas, _, _ = calendario.shape
+        por_jornada = calendario.reshape(k * n_jornadas, -1)
+        plano = np.arange(k * n_jornadas)[:, None] * n + por_jornada
+        veces = np.bincount(plano.ravel(), minlength=k * n_jornadas * n).reshape(k, n_jornadas, n)
+        codigos |= np.where((veces != 1).any(axis=(1, 2)), JORNADA, 0)
+
+        partidos = _matriz_de_partidos(calendario, n)
+        if orientacion is not None:
+            distinto = partidos != orientacion
+        else:
+            distinto = (partidos + partidos.transpose(0, 2, 1)) != adyacencia
+        codigos |= np.where(distinto.any(axis=(1, 2)), PARTIDOS, 0)
+
+    return codigos == 0, codigos
+
+
+def describir(codigo: int):
+    """Nombres de las reglas incumplidas en un código de validar_lote."""
+    return [nombre for bit, nombre in CODIGOS.items() if codigo & bit]
+
+
+# ------------------------------------------------------------
+# Conversión desde los objetos del resto del programa
+# ------------------------------------------------------------
+
+def apilar_sorteos(estados, indice=None):
+    """
+    (adyacencia, bombo, pais) de una lista de DrawState resueltos.
+    indice (nombre → posición) fija un orden común de equipos; por defecto
+    el del primer estado. Los países se codifican por orden alfabético.
+    """
+    if indice is None:
+        indice = {t.name: k for k, t in enumerate(estados[0].teams)}
+    n = len(indice)
+    codigo_pais = {c: k for k, c in enumerate(sorted({t.country for e in estados for t in e.teams}))}
+
+    adyacencia = np.zeros((len(estados), n, n), dtype=bool)
+    bombo = np.zeros((len(estados), n), dtype=np.int32)
+    pais = np.zeros((len(estados), n), dtype=np.int32)
+    for s, estado in enumerate(estados):
+        canon = np.fromiter((indice[t.name] for t in estado.teams), dtype=np.intp, count=n)
+        bombo[s, canon] = [t.pot for t in estado.teams]
+        pais[s, canon] = [codigo_pais[t.country] for t in estado.teams]
+        a = np.fromiter((i for i, rivales in enumerate(estado.adj) for _ in rivales), dtype=np.intp)
+        b = np.fromiter((j for rivales in estado.adj for j in rivales), dtype=np.intp)
+        adyacencia[s, canon[a], canon[b]] = True
+    return adyacencia, bombo, pais
+
+
+def apilar_orientaciones(partidos_por_sorteo, n: int):
+    """(k, n, n) a partir de listas de partidos (local, visitante) con índices."""
+    orientacion = np.zeros((len(partidos_por_sorteo), n, n), dtype=bool)
+    for s, partidos in enumerate(partidos_por_sorteo):
+        p = np.asarray(partidos, dtype=np.intp).reshape(-1, 2)
+        orientacion[s, p[:, 0], p[:, 1]] = True
+    return orientacion
+
+
+def apilar_calendarios(calendarios, indice):
+    """
+    (k, J, P, 2) a partir de calendarios {jornada: [(local, visitante)]}
+    con nombres (generate_league_calendar) e indice nombre → posición.
+    Todas las jornadas deben tener el mismo número de partidos.
+    """
+    jornadas = sorted(calendarios[0])
+    return np.array(
+        [[[(indice[l], indice[v]) for l, v in cal[j]] for j in jornadas] for cal in calendarios],
+        dtype=np.intp,
+    )
@@ -1,5 +1,11 @@
-def verificar_partidos(partidos):
-    print("=== VERIFICANDO PARTIDOS ===")
+def verificar_partidos(partidos, casa=None, file=None):
+    """
+    Comprueba una lista de partidos (local, visitante): sin duplicados, sin
+    ida y vuelta y con casa partidos en casa y casa fuera por equipo. Por
+    defecto casa es la mitad de los partidos de cada equipo (4 en la
+    Champions).
+    """
+    print("=== VERIFICANDO PARTIDOS ===", file=file)
 
     # 1. Duplicados exactos
     duplicados = set()
@@ -27,36 +33,41 @@ def verificar_partidos(partidos):
         home[local] = home.get(local, 0) + 1
         away[visitante] = away.get(visitante, 0) + 1
 
-    print("\n> DUPLICADOS EXACTOS:")
-    print(duplicados if duplicados else "✔ Ninguno")
+    print("\n> DUPLICADOS EXACTOS:", file=file)
+    print(duplicados if duplicados else "✔ Ninguno", file=file)
 
-    print("\n> DUPLICADOS INVERTIDOS (IDA/VUELTA NO PERMITIDO):")
+    print("\n> DUPLICADOS INVERTIDOS (IDA/VUELTA NO PERMITIDO):", file=file)
     if invertidos:
-        print("❌ Se encontraron {} parejas invertidas:".format(len(invertidos)))
+        print("❌ Se encontraron {} parejas invertidas:".format(len(invertidos)), file=file)
         for p in invertidos[:20]:
-            print("  -", p)
+            print("  -", p, file=file)
     else:
-        print("✔ Ninguno")
+        print("✔ Ninguno", file=file)
 
-    print("\n> PARTIDOS EN CASA:")
+    print("\n> PARTIDOS EN CASA:", file=file)
     for team, n in sorted(home.items()):
-        print(f"  {team}: {n}")
-    print("\n> PARTIDOS FUERA:")
+        print(f"  {team}: {n}", file=file)
+    print("\n> PARTIDOS FUERA:", file=file)
     for team, n in sorted(away.items()):
-        print(f"  {team}: {n}")
+        print(f"  {team}: {n}", file=file)
 
-    print("\n> VIOLACIONES 4 CASA / 4 FUERA:")
+    equipos = sorted(home.keys() | away.keys())
+    if casa is None:
+        # Cada partido da uno en casa y uno fuera: partidos / equipos de cada
+        casa = len(partidos) // max(len(equipos), 1)
+
+    print(f"\n> VIOLACIONES {casa} CASA / {casa} FUERA:", file=file)
     errores = False
-    for team in home:
-        if home[team] != 4:
-            print(f"❌ {team} tiene {home[team]} partidos en casa")
+    for team in equipos:
+        if home.get(team, 0) != casa:
+            print(f"❌ {team} tiene {home.get(team, 0)} partidos en casa", file=file)
             errores = True
-    for team in away:
-        if away[team] != 4:
-            print(f"❌ {team} tiene {away[team]} partidos fuera")
+    for team in equipos:
+        if away.get(team, 0) != casa:
+            print(f"❌ {team} tiene {away.get(team, 0)} partidos fuera", file=file)
             errores = True
 
     if not errores:
-        print("✔ Todos tienen 4 casa / 4 fuera")
+        print(f"✔ Todos tienen {casa} casa / {casa} fuera", file=file)
 
-    print("\n=== FIN VERIFICACIÓN ===")
+    print("\n=== FIN VERIFICACIÓN ===", file=file)
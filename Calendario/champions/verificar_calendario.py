@@ -1,29 +1,36 @@
 from collections import defaultdict
 
-N_JORNADAS = 8
+from temporada import cargar_temporada
 
 
-def verificar_calendario(calendario):
+def verificar_calendario(calendario, formato=None, file=None):
     """
     Verifica las propiedades básicas del calendario:
-      - Hay exactamente 8 jornadas.
+      - Hay exactamente formato.n_jornadas jornadas (8 en la Champions).
       - En cada jornada ningún equipo juega más de 1 partido.
       - El número total de partidos es coherente con el número de equipos.
-      - Cada equipo juega exactamente 8 partidos (4 en casa y 4 fuera).
+      - Cada equipo juega exactamente formato.partidos partidos (la mitad
+        en casa y la mitad fuera).
+
+    formato es por defecto el de la temporada activa.
 
     NO se comprueban ya:
       - Fechas / horas concretas.
-      - Restricciones de ciudades (clash entre equipos de la misma ciudad).
+      - Restricciones de ciudades (ver verificar_choques_ciudad, que trabaja
+        sobre el reparto por días de league_calendar.asignar_dias).
     """
 
-    print("\n==============================")
-    print("     VERIFICACIÓN DEL CALENDARIO")
-    print("==============================\n")
+    print("\n==============================", file=file)
+    print("     VERIFICACIÓN DEL CALENDARIO", file=file)
+    print("==============================\n", file=file)
+
+    if formato is None:
+        formato = cargar_temporada().formato
 
     # 1) Comprobación de número de jornadas
     jornadas = sorted(calendario.keys())
-    if len(jornadas) != N_JORNADAS:
-        print(f"❌ El calendario tiene {len(jornadas)} jornadas y deberían ser {N_JORNADAS}.")
+    if len(jornadas) != formato.n_jornadas:
+        print(f"❌ El calendario tiene {len(jornadas)} jornadas y deberían ser {formato.n_jornadas}.", file=file)
         return False
 
     # Estructuras para acumular estadísticas
@@ -45,7 +52,7 @@ def verificar_calendario(calendario):
 
         for local, visitante in partidos:
             if local == visitante:
-                print(f"❌ Jornada {j}: partido inválido {local} vs {visitante} (mismo equipo).")
+                print(f"❌ Jornada {j}: partido inválido {local} vs {visitante} (mismo equipo).", file=file)
                 todo_ok = False
                 continue
 
@@ -65,7 +72,8 @@ def verificar_calendario(calendario):
             par_no_ordenado = tuple(sorted((local, visitante)))
             if par_no_ordenado in parejas_globales:
                 print(
-                    f"❌ El emparejamiento {local} vs {visitante} aparece más de una vez en el calendario."
+                    f"❌ El emparejamiento {local} vs {visitante} aparece más de una vez en el calendario.",
+                    file=file,
                 )
                 todo_ok = False
             else:
@@ -76,7 +84,7 @@ def verificar_calendario(calendario):
         # Nadie puede jugar más de una vez en la misma jornada
         for eq, veces in apariciones.items():
             if veces > 1:
-                print(f"❌ Jornada {j}: el equipo {eq} juega {veces} veces (solo debería jugar 1).")
+                print(f"❌ Jornada {j}: el equipo {eq} juega {veces} veces (solo debería jugar 1).", file=file)
                 todo_ok = False
 
         # Si el calendario es perfecto, en cada jornada deben jugar todos los equipos
@@ -85,46 +93,90 @@ def verificar_calendario(calendario):
             if len(partidos) != expected_partidos:
                 print(
                     f"⚠ Jornada {j}: tiene {len(partidos)} partidos; "
-                    f"con {len(equipos)} equipos se esperaban {expected_partidos}."
+                    f"con {len(equipos)} equipos se esperaban {expected_partidos}.",
+                    file=file,
                 )
             if len(apariciones) != len(equipos):
                 print(
                     f"⚠ Jornada {j}: solo aparecen {len(apariciones)} equipos "
-                    f"de {len(equipos)} posibles."
+                    f"de {len(equipos)} posibles.",
+                    file=file,
                 )
 
     total_partidos = sum(partidos_por_jornada.values())
 
-    print("----------------------------------------------")
-    print(f"Jornadas totales: {len(jornadas)}")
-    print(f"Equipos detectados: {len(equipos)}")
-    print(f"Partidos totales: {total_partidos}")
-    print("----------------------------------------------\n")
+    print("----------------------------------------------", file=file)
+    print(f"Jornadas totales: {len(jornadas)}", file=file)
+    print(f"Equipos detectados: {len(equipos)}", file=file)
+    print(f"Partidos totales: {total_partidos}", file=file)
+    print("----------------------------------------------\n", file=file)
 
-    # 3) Comprobación de partidos por equipo (8) y reparto 4/4
+    # 3) Comprobación de partidos por equipo y reparto casa / fuera
     for eq in sorted(equipos):
         total = partidos_por_equipo[eq]
         h = home_count[eq]
         a = away_count[eq]
 
-        if total != 8:
-            print(f"❌ El equipo {eq} juega {total} partidos y debería jugar 8.")
+        if total != formato.partidos:
+            print(f"❌ El equipo {eq} juega {total} partidos y debería jugar {formato.partidos}.", file=file)
             todo_ok = False
 
-        if h != 4 or a != 4:
+        if h != formato.casa or a != formato.casa:
             print(
                 f"❌ El equipo {eq} tiene {h} partidos en casa y {a} fuera "
-                "(deberían ser 4 y 4)."
+                f"(deberían ser {formato.casa} y {formato.casa}).",
+                file=file,
             )
             todo_ok = False
 
     if todo_ok:
-        print("----------------------------------------------")
-        print("TODO CORRECTO – El calendario cumple todas las reglas básicas.")
-        print("----------------------------------------------")
+        print("----------------------------------------------", file=file)
+        print("TODO CORRECTO – El calendario cumple todas las reglas básicas.", file=file)
+        print("----------------------------------------------", file=file)
     else:
-        print("----------------------------------------------")
-        print("Se han encontrado problemas en el calendario.")
-        print("----------------------------------------------")
+        print("----------------------------------------------", file=file)
+        print("Se han encontrado problemas en el calendario.", file=file)
+        print("----------------------------------------------", file=file)
+
+    return todo_ok
 
+
+def verificar_choques_ciudad(calendario_dias, temporada=None, file=None):
+    """
+    Sobre {jornada: {dia: [(local, visitante)]}} comprueba que ningún día
+    juegan en casa dos equipos de la misma ciudad de temporada (por defecto
+    la activa, ver temporada.py) y que los días de cada jornada tienen el
+    mismo número de partidos (±1).
+    """
+    print("\n==============================", file=file)
+    print("   VERIFICACIÓN DE DÍAS Y CIUDADES", file=file)
+    print("==============================\n", file=file)
+
+    team_city = (temporada or cargar_temporada()).ciudad
+    todo_ok = True
+    for j in sorted(calendario_dias):
+        dias = calendario_dias[j]
+        cargas = [len(ps) for ps in dias.values()]
+        if cargas and max(cargas) - min(cargas) > 1:
+            print(f"❌ Jornada {j}: días desequilibrados {cargas}.", file=file)
+            todo_ok = False
+
+        for d, partidos in sorted(dias.items()):
+            ciudades = {}
+            for local, _ in partidos:
+                ciudad = team_city.get(local)
+                if ciudad is None:
+                    continue
+                if ciudad in ciudades:
+                    print(
+                        f"❌ Jornada {j}, día {d}: {local} y {ciudades[ciudad]} "
+                        f"juegan en casa en {ciudad}.",
+                        file=file,
+                    )
+                    todo_ok = False
+                else:
+                    ciudades[ciudad] = local
+
+    if todo_ok:
+        print("✔ Sin choques de ciudad y con los días equilibrados", file=file)
     return todo_ok